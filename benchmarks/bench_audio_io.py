@@ -0,0 +1,94 @@
+"""Decode + resample: ``openvoice.audio.load`` against ``librosa.load``.
+
+Runs on the mp3s in ``resources/`` (and a WAV copy of each, to time the
+memory-mapped reader) at the rates the models use, checks that both paths
+return the same samples and reports the best time of each.
+
+    python benchmarks/bench_audio_io.py --repeat 5
+"""
+import argparse
+import glob
+import json
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+import librosa
+import numpy as np
+import soundfile
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from openvoice import audio  # noqa: E402
+
+RESOURCES = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "resources")
+
+
+def best_of(fn, repeat):
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - start)
+    return min(times)
+
+
+def bench_file(path, sr, repeat, mmap=False):
+    ref, _ = librosa.load(path, sr=sr, dtype=np.float32)
+    out, _ = audio.load(path, sr=sr, mmap=mmap)
+    assert out.shape == ref.shape, (path, sr, out.shape, ref.shape)
+    max_diff = float(np.abs(out - ref).max()) if out.size else 0.0
+    assert max_diff == 0.0, (path, sr, max_diff)
+
+    t_librosa = best_of(lambda: librosa.load(path, sr=sr, dtype=np.float32), repeat)
+    t_audio = best_of(lambda: audio.load(path, sr=sr, mmap=mmap), repeat)
+    native_sr, frames, channels = audio.info(path)
+    return {
+        "file": os.path.basename(path),
+        "native_sr": native_sr,
+        "channels": channels,
+        "seconds": round(frames / native_sr, 2),
+        "sr": sr,
+        "mmap": mmap,
+        "librosa_ms": round(1000 * t_librosa, 2),
+        "openvoice_ms": round(1000 * t_audio, 2),
+        "speedup": round(t_librosa / t_audio, 2),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--rates", type=int, nargs="+", default=[16000, 22050])
+    parser.add_argument("--json", default=None, help="also write the results here")
+    args = parser.parse_args()
+
+    files = sorted(glob.glob(os.path.join(RESOURCES, "*.mp3")))
+    tmp_dir = tempfile.mkdtemp()
+    results = []
+    try:
+        for path in files:
+            # the WAV copy is what extract_se sees after se_extractor has split the reference
+            y, native_sr = soundfile.read(path, dtype="float32")
+            wav_path = os.path.join(tmp_dir, os.path.basename(path).rsplit(".", 1)[0] + ".wav")
+            soundfile.write(wav_path, y, native_sr, subtype="PCM_16")
+            for sr in args.rates:
+                results.append(bench_file(path, sr, args.repeat))
+                results.append(bench_file(wav_path, sr, args.repeat))
+                results.append(bench_file(wav_path, sr, args.repeat, mmap=True))
+    finally:
+        shutil.rmtree(tmp_dir)
+
+    print(f"{'file':<26}{'sr':>7}{'mmap':>6}{'librosa ms':>12}{'openvoice ms':>14}{'speedup':>9}")
+    for r in results:
+        print(f"{r['file']:<26}{r['sr']:>7}{str(r['mmap']):>6}{r['librosa_ms']:>12.2f}"
+              f"{r['openvoice_ms']:>14.2f}{r['speedup']:>8.2f}x")
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
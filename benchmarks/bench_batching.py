@@ -0,0 +1,107 @@
+"""Length-bucketed batched synthesis against one ``infer_tokens`` call per sentence.
+
+Sentences of mixed length are synthesised one by one, with
+``scheduler.infer_many`` at several ``max_tokens`` budgets, and with a
+``BatchScheduler`` serving ``--clients`` concurrent ``tts`` requests. With
+the noise scales at zero, batched audio must have the same length as the
+sentence-by-sentence audio and agree with it up to the padded tail, which
+is reported as the largest difference outside the last 50 ms.
+
+    python benchmarks/bench_batching.py --sentences 32 --max-tokens 1024 4096
+"""
+import argparse
+import sys
+import threading
+import time
+
+import numpy as np
+import torch
+
+from common import SAMPLE_TEXT, build_tts
+from openvoice.scheduler import BatchScheduler, infer_many, plan_batches
+
+WORDS = SAMPLE_TEXT.replace(",", "").replace(".", "").split()
+
+
+def make_sentences(n, seed=0):
+    rng = np.random.default_rng(seed)
+    sentences = []
+    for _ in range(n):
+        start = int(rng.integers(0, len(WORDS) - 2))
+        words = WORDS[start:start + int(rng.integers(2, len(WORDS)))]
+        sentences.append(f"[EN]{' '.join(words).capitalize()}.[EN]")
+    return sentences
+
+
+def timed(fn):
+    start = time.perf_counter()
+    result = fn()
+    return result, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--config", default="base_speaker_small.json")
+    parser.add_argument("--sentences", type=int, default=32)
+    parser.add_argument("--max-tokens", type=int, nargs="+", default=[1024, 2048, 4096])
+    parser.add_argument("--clients", type=int, default=4)
+    parser.add_argument("--tolerance", type=float, default=1e-3)
+    args = parser.parse_args()
+
+    model = build_tts(args.config, frontend_workers=0)
+    tokens = [model.get_text(s, model.hps, False) for s in make_sentences(args.sentences)]
+    lengths = [t.size(0) for t in tokens]
+    params = dict(noise_scale=0.0, noise_scale_w=0.0)
+    tail = int(0.05 * model.sampling_rate)
+    print(f"{len(tokens)} sentences, {min(lengths)}-{max(lengths)} tokens")
+
+    model.infer_tokens(tokens[0], "default", **params)  # warm-up
+    reference, t_single = timed(lambda: [model.infer_tokens(t, "default", **params) for t in tokens])
+    print(f"{'mode':<22}{'batches':>8}{'padding':>9}{'seconds':>9}{'speedup':>9}{'max diff':>10}")
+    print(f"{'one by one':<22}{len(tokens):>8}{0:>9.1%}{t_single:>9.2f}{1:>8.1f}x{0:>10.2e}")
+
+    failures = 0
+    for max_tokens in args.max_tokens:
+        batches = plan_batches(lengths, max_tokens)
+        padded = sum(len(b) * max(lengths[i] for i in b) for b in batches)
+        audio, seconds = timed(lambda: infer_many(model, tokens, "default", max_tokens=max_tokens, **params))
+        diff = 0.0
+        for ref, out in zip(reference, audio):
+            if ref.shape != out.shape:
+                failures += 1
+                print(f"length mismatch: {ref.shape} != {out.shape}", file=sys.stderr)
+                continue
+            diff = max(diff, float(np.abs(ref[:-tail] - out[:-tail]).max(initial=0)))
+        if diff > args.tolerance:
+            failures += 1
+        print(f"{f'max_tokens={max_tokens}':<22}{len(batches):>8}{1 - sum(lengths) / padded:>9.1%}"
+              f"{seconds:>9.2f}{t_single / seconds:>8.1f}x{diff:>10.2e}")
+
+    # the same sentences split over concurrent requests
+    text = " ".join(s[4:-4] for s in make_sentences(args.sentences))
+    per_client = text.split(". ")
+    chunks = [". ".join(per_client[i::args.clients]) + "." for i in range(args.clients)]
+    torch.manual_seed(0)
+    _, t_seq = timed(lambda: [model.tts(c, None, "default", **params) for c in chunks])
+    with BatchScheduler(model, max_tokens=min(args.max_tokens)) as scheduler:
+        def client(chunk):
+            scheduler.tts(chunk, speaker="default", **params)
+        threads = [threading.Thread(target=client, args=(c,)) for c in chunks]
+        start = time.perf_counter()
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        seconds = time.perf_counter() - start
+        stats = scheduler.stats()
+    print(f"{f'{args.clients} clients, tts':<22}{stats['batches']:>8}{stats['padding']:>9.1%}"
+          f"{seconds:>9.2f}{t_seq / seconds:>8.1f}x{'':>10}")
+
+    if failures:
+        print(f"batched audio differs from one-by-one synthesis beyond {args.tolerance}", file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
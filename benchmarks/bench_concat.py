@@ -0,0 +1,71 @@
+"""Preallocated ``audio_numpy_concat`` against the list-based version it replaced.
+
+Sentence-sized float32 segments are joined with the old ``.tolist()`` loop
+and with the new one; the outputs must be identical. With a small random
+model, the chunks of ``tts_stream`` must also add up to the ``tts`` output.
+
+    python benchmarks/bench_concat.py --minutes 5
+"""
+import argparse
+import sys
+import time
+
+import numpy as np
+
+from common import SAMPLE_TEXT, build_tts
+from openvoice.api import BaseSpeakerTTS
+
+
+def legacy_concat(segment_data_list, sr, speed=1.):
+    audio_segments = []
+    for segment_data in segment_data_list:
+        audio_segments += segment_data.reshape(-1).tolist()
+        audio_segments += [0] * int((sr * 0.05) / speed)
+    return np.array(audio_segments).astype(np.float32)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--minutes", type=float, default=5.0, help="total audio to join")
+    parser.add_argument("--sr", type=int, default=22050)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(args.seed)
+    total = int(args.minutes * 60 * args.sr)
+    segments = []
+    while sum(s.size for s in segments) < total:
+        segments.append(rng.standard_normal(int(rng.uniform(1, 8) * args.sr)).astype(np.float32) * 0.1)
+
+    failures = 0
+    for speed in (0.8, 1.0, 1.3):
+        if not np.array_equal(legacy_concat(segments, args.sr, speed),
+                              BaseSpeakerTTS.audio_numpy_concat(segments, args.sr, speed)):
+            failures += 1
+            print(f"output differs from the list-based concat at speed {speed}", file=sys.stderr)
+
+    start = time.perf_counter()
+    legacy_concat(segments, args.sr)
+    t_old = time.perf_counter() - start
+    start = time.perf_counter()
+    BaseSpeakerTTS.audio_numpy_concat(segments, args.sr)
+    t_new = time.perf_counter() - start
+    print(f"{len(segments)} segments, {args.minutes:g} min: list {t_old * 1e3:.1f} ms, "
+          f"preallocated {t_new * 1e3:.1f} ms ({t_old / t_new:.0f}x)")
+
+    model = build_tts("base_speaker_small.json", frontend_workers=0, pauses={".": 0.3, ",": 0.1})
+    params = dict(speaker="default", noise_scale=0.0, noise_scale_w=0.0)
+    audio = model.tts(SAMPLE_TEXT, None, **params)
+    streamed = np.concatenate(list(model.tts_stream(SAMPLE_TEXT, **params)))
+    if not np.array_equal(audio, streamed):
+        failures += 1
+        print("tts_stream chunks do not add up to the tts output", file=sys.stderr)
+
+    if failures:
+        return 1
+    print("identical to the list-based concat; tts_stream matches tts")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,74 @@
+"""Single-pass ``Replacer`` tables against the per-pair ``re.sub`` loops they replaced.
+
+Every table in ``text.english`` and ``text.mandarin`` is timed both ways on
+a random string drawn from its own patterns, replacements and a few
+unrelated characters. ``tests/test_replacer.py`` checks that the outputs
+are identical.
+
+    python benchmarks/bench_replacer.py --length 200
+"""
+import argparse
+import random
+import re
+import sys
+import time
+
+import common  # noqa: F401  (puts the repo on sys.path)
+
+from openvoice.text import english, mandarin  # noqa: E402
+
+TABLES = {
+    "english._lazy_ipa": english._lazy_ipa,
+    "english._lazy_ipa2": english._lazy_ipa2,
+    "english._ipa_to_ipa2": english._ipa_to_ipa2,
+    "mandarin._latin_to_bopomofo": mandarin._latin_to_bopomofo,
+    "mandarin._bopomofo_to_romaji": mandarin._bopomofo_to_romaji,
+    "mandarin._romaji_to_ipa": mandarin._romaji_to_ipa,
+    "mandarin._bopomofo_to_ipa": mandarin._bopomofo_to_ipa,
+    "mandarin._bopomofo_to_ipa2": mandarin._bopomofo_to_ipa2,
+}
+
+
+def legacy(replacer):
+    pairs = [(re.compile(re.escape(a), replacer._flags), r) for a, r in replacer.pairs]
+
+    def apply(text):
+        for regex, replacement in pairs:
+            text = re.sub(regex, replacement, text)
+        return text
+    return apply
+
+
+def random_text(rng, pieces, length):
+    return "".join(rng.choice(pieces) for _ in range(length))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--length", type=int, default=200, help="pieces per timed string")
+    parser.add_argument("--repeat", type=int, default=2000)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    print(f"{'table':<32}{'mode':>12}{'loop us':>10}{'new us':>10}{'speedup':>9}")
+    for name, replacer in TABLES.items():
+        old = legacy(replacer)
+        pieces = [a for a, _ in replacer.pairs] + [r for _, r in replacer.pairs if r]
+        pieces += [a.upper() for a, _ in replacer.pairs] + list(" .,xyzNn↓ㄧ")
+        text = random_text(rng, pieces, args.length)
+        n = args.repeat
+        start = time.perf_counter()
+        for _ in range(n):
+            old(text)
+        t_old = (time.perf_counter() - start) / n
+        start = time.perf_counter()
+        for _ in range(n):
+            replacer(text)
+        t_new = (time.perf_counter() - start) / n
+        print(f"{name:<32}{replacer.mode:>12}{t_old * 1e6:>10.1f}{t_new * 1e6:>10.1f}{t_old / t_new:>8.1f}x")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
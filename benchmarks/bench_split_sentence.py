@@ -0,0 +1,160 @@
+"""Single-scan ``utils.split_sentence`` against the chain of ``re.sub`` passes it replaced.
+
+A fixed corpus of English and Chinese paragraphs, plus random strings drawn
+from words, punctuation, brackets, quotes and whitespace, must be split
+exactly as the old ``split_sentences_latin``/``split_sentences_zh`` split
+them (with the same ``language_str`` routing), and every span must cover
+the text its sentence came from. Then both are timed on a long document.
+
+    python benchmarks/bench_split_sentence.py --cases 20000
+"""
+import argparse
+import random
+import re
+import sys
+import time
+
+import common  # noqa: F401  (puts the repo on sys.path)
+
+from openvoice import utils  # noqa: E402
+
+CORPUS = [
+    "OpenVoice is a versatile instant voice cloning approach. It requires only a short audio clip!",
+    "Did you hear that? He said, “we leave at noon”; then (after a pause) he left.",
+    "This audio is generated by OpenVoice with a half-performance model.",
+    "  Leading spaces,\ttabs\nand newlines   everywhere .  ",
+    "Mr. Smith met Dr. Jones at 5 p.m. on Jan. 3rd, 2024.",
+    "‘Single quotes’ and «guillemets» and <angle> [square] brackets.",
+    "Short. Very short. Tiny. A. B. C.",
+    "No punctuation at the end of this one",
+    "...!!!???",
+    "",
+    "   ",
+    "今天天气真好，我们去公园散步吧。你觉得怎么样？",
+    "微软公司于周五发布了新版本！用户可以免费下载；但是需要注册。",
+    "「你好」，他说。OpenVoice 支持中文和 English 混合输入。",
+    "好。啊。对。是的。",
+]
+
+PIECES = (["word", "OpenVoice", "cloning", "a", "I", "你好", "天气", "公园", "x"] * 3
+          + list(",.!?;。！？；，") + list("<>()[]\"«»「」“”‘’'")
+          + [" ", " ", " ", "  ", "\n", "\t", "\r", "　", "\xa0"])
+
+
+def legacy_latin(text, min_len=10):
+    text = re.sub(r'[。！？；]', '.', text)
+    text = re.sub(r'[，]', ',', text)
+    text = re.sub(r'[「」"“”]', '"', text)
+    text = re.sub(r'[‘’]', "'", text)
+    text = re.sub(r"[\<\>\(\)\[\]\"«»]+", "", text)
+    text = re.sub(r'[\n\t ]+', ' ', text)
+    text = re.sub(r'([,.!?;])', r'\1 $#!', text)
+    sentences = [s.strip() for s in text.split('$#!')]
+    if len(sentences[-1]) == 0:
+        del sentences[-1]
+
+    new_sentences = []
+    new_sent = []
+    count_len = 0
+    for ind, sent in enumerate(sentences):
+        new_sent.append(sent)
+        count_len += len(sent.split(" "))
+        if count_len > min_len or ind == len(sentences) - 1:
+            count_len = 0
+            new_sentences.append(' '.join(new_sent))
+            new_sent = []
+    return utils.merge_short_sentences_latin(new_sentences)
+
+
+def legacy_zh(text, min_len=10):
+    text = re.sub(r'[。！？；]', '.', text)
+    text = re.sub(r'[，]', ',', text)
+    text = re.sub(r'[\n\t ]+', ' ', text)
+    text = re.sub(r'([,.!?;])', r'\1 $#!', text)
+    sentences = [s.strip() for s in text.split('$#!')]
+    if len(sentences[-1]) == 0:
+        del sentences[-1]
+
+    new_sentences = []
+    new_sent = []
+    count_len = 0
+    for ind, sent in enumerate(sentences):
+        new_sent.append(sent)
+        count_len += len(sent)
+        if count_len > min_len or ind == len(sentences) - 1:
+            count_len = 0
+            new_sentences.append(' '.join(new_sent))
+            new_sent = []
+    return utils.merge_short_sentences_zh(new_sentences)
+
+
+# language_str -> splitter it selects; BaseSpeakerTTS passes the bare marks
+LEGACY = {"[EN]": legacy_latin, "EN": legacy_zh, "ZH": legacy_zh}
+
+
+def check(text, mark, min_len):
+    """None if ``text`` splits as before and the spans line up, else a description."""
+    expected = LEGACY[mark](text, min_len=min_len)
+    spans = utils.split_sentence_spans(text, min_len=min_len, language_str=mark)
+    got = [span.text for span in spans]
+    if got != expected:
+        return f"{got!r} != {expected!r}"
+    end = 0
+    for span in spans:
+        if span.start < end or span.end <= span.start:
+            return f"bad span {span}"
+        end = span.end
+        # the source text, cleaned by the old code as a whole, gives the
+        # sentence up to the spaces between pieces
+        source = "".join(LEGACY[mark](text[span.start:span.end], min_len=1 << 30))
+        if re.sub(r"\s", "", source) != re.sub(r"\s", "", span.text):
+            return f"span {span} covers {text[span.start:span.end]!r}"
+    return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--cases", type=int, default=5000, help="random strings per language")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    failures = 0
+    for mark in LEGACY:
+        cases = [(text, 10) for text in CORPUS]
+        for _ in range(args.cases):
+            text = "".join(rng.choice(PIECES) for _ in range(rng.randint(0, 40)))
+            cases.append((text, rng.choice([0, 2, 5, 10, 20])))
+        for text, min_len in cases:
+            error = check(text, mark, min_len)
+            if error is not None:
+                failures += 1
+                print(f"MISMATCH {mark} {text!r} (min_len={min_len}): {error}", file=sys.stderr)
+
+    document = " ".join(CORPUS) * 50
+    print(f"{'language':<10}{'old ms':>10}{'new ms':>10}{'speedup':>9}{'spans ms':>10}")
+    for mark, old in LEGACY.items():
+        n = 50
+        start = time.perf_counter()
+        for _ in range(n):
+            old(document)
+        t_old = (time.perf_counter() - start) / n
+        start = time.perf_counter()
+        for _ in range(n):
+            utils.split_sentence(document, language_str=mark)
+        t_new = (time.perf_counter() - start) / n
+        start = time.perf_counter()
+        for _ in range(n):
+            utils.split_sentence_spans(document, language_str=mark)
+        t_spans = (time.perf_counter() - start) / n
+        print(f"{mark:<10}{t_old * 1e3:>10.2f}{t_new * 1e3:>10.2f}{t_old / t_new:>8.1f}x{t_spans * 1e3:>10.2f}")
+
+    if failures:
+        print(f"{failures} case(s) differ from the old splitter", file=sys.stderr)
+        return 1
+    print(f"identical on the corpus and {args.cases} random strings per language")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,85 @@
+"""Segmentation after VAD: the numpy path in ``se_extractor`` against the pydub loop it replaced.
+
+Uses a synthetic reference with a voiced region every ``--period`` seconds,
+so neither Silero nor ffmpeg is needed. Both paths must produce the same
+number of pieces with lengths within one pydub millisecond of each other.
+
+    python benchmarks/bench_split_vad.py --minutes 10
+"""
+import argparse
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+import numpy as np
+import soundfile
+from pydub import AudioSegment
+
+from common import synthetic_speech  # noqa: E402  (also puts the repo on sys.path)
+
+from openvoice import se_extractor  # noqa: E402
+
+
+def legacy_split(audio_path, segments, wavs_folder, audio_name, split_seconds=10.0):
+    audio_active = AudioSegment.silent(duration=0)
+    audio = AudioSegment.from_file(audio_path, format="wav")
+    for start_time, end_time in segments:
+        audio_active += audio[int(start_time * 1000): int(end_time * 1000)]
+
+    audio_dur = audio_active.duration_seconds
+    start_time = 0.
+    num_splits = int(np.round(audio_dur / split_seconds))
+    interval = audio_dur / num_splits
+    lengths = []
+    for i in range(num_splits):
+        end_time = min(start_time + interval, audio_dur)
+        if i == num_splits - 1:
+            end_time = audio_dur
+        audio_seg = audio_active[int(start_time * 1000): int(end_time * 1000)]
+        audio_seg.export(f"{wavs_folder}/{audio_name}_seg{i}.wav", format="wav")
+        lengths.append(len(audio_seg.get_array_of_samples()))
+        start_time = end_time
+    return lengths
+
+
+def new_split(audio_path, segments, wavs_folder, audio_name, split_seconds=10.0):
+    pieces, sr = se_extractor.split_audio_vad_arrays(audio_path, split_seconds, segments=segments)
+    se_extractor.write_segments(pieces, sr, wavs_folder, audio_name)
+    return [p.shape[-1] for p in pieces]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--minutes", type=float, default=10.0)
+    parser.add_argument("--period", type=float, default=2.0, help="one voiced region every PERIOD seconds")
+    parser.add_argument("--sr", type=int, default=44100)
+    args = parser.parse_args()
+
+    seconds = args.minutes * 60
+    segments = [(t + 0.3, t + args.period - 0.4) for t in np.arange(0, seconds - args.period, args.period)]
+    tmp_dir = tempfile.mkdtemp()
+    try:
+        audio_path = os.path.join(tmp_dir, "reference.wav")
+        soundfile.write(audio_path, synthetic_speech(seconds, sr=args.sr), args.sr, subtype="PCM_16")
+        results = {}
+        for name, fn in (("pydub", legacy_split), ("numpy", new_split)):
+            wavs_folder = os.path.join(tmp_dir, name)
+            os.makedirs(wavs_folder)
+            start = time.perf_counter()
+            lengths = fn(audio_path, segments, wavs_folder, "reference")
+            results[name] = (time.perf_counter() - start, lengths)
+    finally:
+        shutil.rmtree(tmp_dir)
+
+    (t_old, old), (t_new, new) = results["pydub"], results["numpy"]
+    assert len(old) == len(new), (len(old), len(new))
+    max_diff = max(abs(a - b) for a, b in zip(old, new))
+    assert max_diff <= args.sr // 1000 * 2, max_diff
+    print(f"{len(segments)} voiced regions, {len(new)} pieces, max length difference {max_diff} samples")
+    print(f"pydub: {t_old:.3f}s  numpy: {t_new:.3f}s  speedup {t_old / t_new:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,117 @@
+"""Sweep torch intra-op threads and replica counts for ``tts`` and ``convert``.
+
+Every (replicas, threads) point launches ``replicas`` worker processes at
+once. Each worker is configured through the ``OPENVOICE_*`` environment
+variables read by ``openvoice.runtime.RuntimeConfig`` and runs
+``--requests`` requests back to back. The table reports per-request latency
+percentiles and the aggregate throughput, which is what to look at when
+choosing how many cores to give each replica.
+
+    python benchmarks/bench_threads.py --threads 1 2 4 8 --replicas 1 2 4 --requests 5
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+import soundfile
+
+from common import SAMPLE_TEXT, build_converter, build_tts, percentiles, random_se, synthetic_speech
+from openvoice.runtime import available_cores, current_settings
+
+
+def run_worker(task, requests, seconds):
+    if task == "tts":
+        model = build_tts()
+
+        def request():
+            model.tts(SAMPLE_TEXT, None, speaker="default", language="English")
+    else:
+        model = build_converter()
+        src_se, tgt_se = random_se(model, 0), random_se(model, 1)
+        src_path = os.path.join(tempfile.mkdtemp(), "src.wav")
+        soundfile.write(src_path, synthetic_speech(seconds), model.hps.data.sampling_rate)
+
+        def request():
+            model.convert(src_path, src_se, tgt_se, output_path=None)
+
+    request()  # warm-up
+    latencies = []
+    start = time.time()
+    for _ in range(requests):
+        t0 = time.perf_counter()
+        request()
+        latencies.append(time.perf_counter() - t0)
+    end = time.time()
+    print(json.dumps({"start": start, "end": end, "latencies": latencies, "settings": current_settings()}))
+
+
+def run_point(task, replicas, threads, args):
+    env = dict(os.environ)
+    env.update({
+        "OPENVOICE_NUM_THREADS": str(threads),
+        "OPENVOICE_NUM_INTEROP_THREADS": str(args.interop_threads),
+    })
+    cmd = [sys.executable, os.path.abspath(__file__), "--worker", "--task", task,
+           "--requests", str(args.requests), "--seconds", str(args.seconds)]
+    procs = [subprocess.Popen(cmd, env=env, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, text=True)
+             for _ in range(replicas)]
+    results = []
+    for proc in procs:
+        out, _ = proc.communicate()
+        if proc.returncode != 0:
+            raise RuntimeError(f"worker failed for task={task} replicas={replicas} threads={threads}")
+        results.append(json.loads(out.strip().splitlines()[-1]))
+
+    latencies = [lat for r in results for lat in r["latencies"]]
+    wall = max(r["end"] for r in results) - min(r["start"] for r in results)
+    return {
+        "task": task,
+        "replicas": replicas,
+        "threads": threads,
+        "requests": len(latencies),
+        "throughput_rps": len(latencies) / wall,
+        **percentiles(latencies),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--task", nargs="+", default=["tts", "convert"], choices=["tts", "convert"])
+    parser.add_argument("--threads", type=int, nargs="+", default=[1, 2, 4])
+    parser.add_argument("--replicas", type=int, nargs="+", default=[1])
+    parser.add_argument("--interop-threads", type=int, default=1)
+    parser.add_argument("--requests", type=int, default=5, help="timed requests per worker")
+    parser.add_argument("--seconds", type=float, default=5.0, help="source audio length for convert")
+    parser.add_argument("--oversubscribe", action="store_true", help="also run points using more threads than cores")
+    parser.add_argument("--output", default=None, help="write the results as JSON")
+    parser.add_argument("--worker", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        return run_worker(args.task[0], args.requests, args.seconds)
+
+    cores = available_cores()
+    print(f"cores={cores}")
+    print(f"{'task':8} {'replicas':>8} {'threads':>7} {'req/s':>8} {'p50 s':>8} {'p90 s':>8} {'p99 s':>8}")
+    results = []
+    for task in args.task:
+        for replicas in args.replicas:
+            for threads in args.threads:
+                if replicas * threads > cores and not args.oversubscribe:
+                    continue
+                r = run_point(task, replicas, threads, args)
+                results.append(r)
+                print(f"{task:8} {replicas:8d} {threads:7d} {r['throughput_rps']:8.2f} "
+                      f"{r['p50']:8.3f} {r['p90']:8.3f} {r['p99']:8.3f}", flush=True)
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump({"cores": cores, "results": results}, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,182 @@
+"""Microbenchmark and exactness check for the rational-quadratic spline.
+
+Compares ``openvoice.transforms`` against the previous implementation (kept
+below as ``legacy_*``) on inputs shaped like the ones ``ConvFlow`` produces
+inside the stochastic duration predictor.
+
+    python benchmarks/bench_transforms.py --frames 400 --repeat 200
+"""
+import argparse
+import os
+import sys
+import time
+
+import torch
+from torch.nn import functional as F
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from openvoice import transforms
+
+
+def legacy_searchsorted(bin_locations, inputs, eps=1e-6):
+    bin_locations[..., -1] += eps
+    return torch.sum(inputs[..., None] >= bin_locations, dim=-1) - 1
+
+
+def legacy_rational_quadratic_spline(inputs, unnormalized_widths, unnormalized_heights,
+                                     unnormalized_derivatives, inverse=False, left=0.0, right=1.0,
+                                     bottom=0.0, top=1.0, min_bin_width=1e-3, min_bin_height=1e-3,
+                                     min_derivative=1e-3):
+    num_bins = unnormalized_widths.shape[-1]
+
+    widths = F.softmax(unnormalized_widths, dim=-1)
+    widths = min_bin_width + (1 - min_bin_width * num_bins) * widths
+    cumwidths = torch.cumsum(widths, dim=-1)
+    cumwidths = F.pad(cumwidths, pad=(1, 0), mode="constant", value=0.0)
+    cumwidths = (right - left) * cumwidths + left
+    cumwidths[..., 0] = left
+    cumwidths[..., -1] = right
+    widths = cumwidths[..., 1:] - cumwidths[..., :-1]
+
+    derivatives = min_derivative + F.softplus(unnormalized_derivatives)
+
+    heights = F.softmax(unnormalized_heights, dim=-1)
+    heights = min_bin_height + (1 - min_bin_height * num_bins) * heights
+    cumheights = torch.cumsum(heights, dim=-1)
+    cumheights = F.pad(cumheights, pad=(1, 0), mode="constant", value=0.0)
+    cumheights = (top - bottom) * cumheights + bottom
+    cumheights[..., 0] = bottom
+    cumheights[..., -1] = top
+    heights = cumheights[..., 1:] - cumheights[..., :-1]
+
+    if inverse:
+        bin_idx = legacy_searchsorted(cumheights, inputs)[..., None]
+    else:
+        bin_idx = legacy_searchsorted(cumwidths, inputs)[..., None]
+
+    input_cumwidths = cumwidths.gather(-1, bin_idx)[..., 0]
+    input_bin_widths = widths.gather(-1, bin_idx)[..., 0]
+    input_cumheights = cumheights.gather(-1, bin_idx)[..., 0]
+    delta = heights / widths
+    input_delta = delta.gather(-1, bin_idx)[..., 0]
+    input_derivatives = derivatives.gather(-1, bin_idx)[..., 0]
+    input_derivatives_plus_one = derivatives[..., 1:].gather(-1, bin_idx)[..., 0]
+    input_heights = heights.gather(-1, bin_idx)[..., 0]
+
+    if inverse:
+        a = (inputs - input_cumheights) * (
+            input_derivatives + input_derivatives_plus_one - 2 * input_delta
+        ) + input_heights * (input_delta - input_derivatives)
+        b = input_heights * input_derivatives - (inputs - input_cumheights) * (
+            input_derivatives + input_derivatives_plus_one - 2 * input_delta
+        )
+        c = -input_delta * (inputs - input_cumheights)
+        discriminant = b.pow(2) - 4 * a * c
+        root = (2 * c) / (-b - torch.sqrt(discriminant))
+        outputs = root * input_bin_widths + input_cumwidths
+        theta_one_minus_theta = root * (1 - root)
+        denominator = input_delta + (
+            (input_derivatives + input_derivatives_plus_one - 2 * input_delta) * theta_one_minus_theta
+        )
+        derivative_numerator = input_delta.pow(2) * (
+            input_derivatives_plus_one * root.pow(2)
+            + 2 * input_delta * theta_one_minus_theta
+            + input_derivatives * (1 - root).pow(2)
+        )
+        logabsdet = torch.log(derivative_numerator) - 2 * torch.log(denominator)
+        return outputs, -logabsdet
+    else:
+        theta = (inputs - input_cumwidths) / input_bin_widths
+        theta_one_minus_theta = theta * (1 - theta)
+        numerator = input_heights * (input_delta * theta.pow(2) + input_derivatives * theta_one_minus_theta)
+        denominator = input_delta + (
+            (input_derivatives + input_derivatives_plus_one - 2 * input_delta) * theta_one_minus_theta
+        )
+        outputs = input_cumheights + numerator / denominator
+        derivative_numerator = input_delta.pow(2) * (
+            input_derivatives_plus_one * theta.pow(2)
+            + 2 * input_delta * theta_one_minus_theta
+            + input_derivatives * (1 - theta).pow(2)
+        )
+        logabsdet = torch.log(derivative_numerator) - 2 * torch.log(denominator)
+        return outputs, logabsdet
+
+
+def legacy_unconstrained_rational_quadratic_spline(inputs, unnormalized_widths, unnormalized_heights,
+                                                   unnormalized_derivatives, inverse=False, tail_bound=1.0,
+                                                   min_derivative=1e-3):
+    inside_interval_mask = (inputs >= -tail_bound) & (inputs <= tail_bound)
+    outside_interval_mask = ~inside_interval_mask
+    outputs = torch.zeros_like(inputs)
+    logabsdet = torch.zeros_like(inputs)
+    unnormalized_derivatives = F.pad(unnormalized_derivatives, pad=(1, 1))
+    constant = torch.log(torch.exp(torch.tensor(1 - min_derivative)) - 1)
+    unnormalized_derivatives[..., 0] = constant
+    unnormalized_derivatives[..., -1] = constant
+    outputs[outside_interval_mask] = inputs[outside_interval_mask]
+    logabsdet[outside_interval_mask] = 0
+    outputs[inside_interval_mask], logabsdet[inside_interval_mask] = legacy_rational_quadratic_spline(
+        inputs=inputs[inside_interval_mask],
+        unnormalized_widths=unnormalized_widths[inside_interval_mask, :],
+        unnormalized_heights=unnormalized_heights[inside_interval_mask, :],
+        unnormalized_derivatives=unnormalized_derivatives[inside_interval_mask, :],
+        inverse=inverse, left=-tail_bound, right=tail_bound, bottom=-tail_bound, top=tail_bound,
+        min_derivative=min_derivative,
+    )
+    return outputs, logabsdet
+
+
+def make_inputs(batch, frames, num_bins, tail_bound, seed=0):
+    # [b, 1, t] inputs and [b, 1, t, bins] parameters, as in ConvFlow
+    generator = torch.Generator().manual_seed(seed)
+    inputs = torch.randn(batch, 1, frames, generator=generator) * tail_bound * 0.6
+    # hit the bin edges exactly as well, including both tail bounds
+    inputs[..., :3] = torch.tensor([-tail_bound, 0.0, tail_bound])
+    widths = torch.randn(batch, 1, frames, num_bins, generator=generator)
+    heights = torch.randn(batch, 1, frames, num_bins, generator=generator)
+    derivatives = torch.randn(batch, 1, frames, num_bins - 1, generator=generator)
+    return inputs, widths, heights, derivatives
+
+
+def timeit(fn, repeat):
+    fn()
+    start = time.perf_counter()
+    for _ in range(repeat):
+        fn()
+    return (time.perf_counter() - start) / repeat
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--batch", type=int, default=1)
+    parser.add_argument("--frames", type=int, default=400, help="text frames per utterance")
+    parser.add_argument("--num-bins", type=int, default=10)
+    parser.add_argument("--tail-bound", type=float, default=5.0)
+    parser.add_argument("--repeat", type=int, default=200)
+    args = parser.parse_args()
+
+    inputs, widths, heights, derivatives = make_inputs(args.batch, args.frames, args.num_bins, args.tail_bound)
+
+    with torch.no_grad():
+        for inverse in (False, True):
+            def new():
+                return transforms.piecewise_rational_quadratic_transform(
+                    inputs, widths, heights, derivatives, inverse=inverse,
+                    tails="linear", tail_bound=args.tail_bound)
+
+            def old():
+                return legacy_unconstrained_rational_quadratic_spline(
+                    inputs, widths, heights, derivatives, inverse=inverse, tail_bound=args.tail_bound)
+
+            (out_new, logdet_new), (out_old, logdet_old) = new(), old()
+            assert torch.equal(out_new, out_old), "outputs differ from the legacy spline"
+            assert torch.equal(logdet_new, logdet_old), "log-determinants differ from the legacy spline"
+
+            t_old, t_new = timeit(old, args.repeat), timeit(new, args.repeat)
+            print(f"inverse={inverse!s:5}  legacy {t_old * 1e3:7.3f} ms  new {t_new * 1e3:7.3f} ms  "
+                  f"speedup {t_old / t_new:4.2f}x  (outputs identical)")
+
+
+if __name__ == "__main__":
+    main()
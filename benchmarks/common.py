@@ -0,0 +1,59 @@
+"""Shared helpers for the benchmark scripts.
+
+Models are built from the configs in ``benchmarks/configs`` with random
+weights, so no checkpoint download or network access is needed. Timings
+depend on layer sizes, not on the weight values.
+"""
+import os
+import sys
+
+import numpy as np
+import torch
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+CONFIG_DIR = os.path.join(BENCH_DIR, "configs")
+sys.path.insert(0, os.path.dirname(BENCH_DIR))
+
+from openvoice.api import BaseSpeakerTTS, ToneColorConverter  # noqa: E402
+
+SAMPLE_TEXT = (
+    "He hoped there would be stew for dinner, turnips and carrots and bruised potatoes "
+    "and fat mutton pieces to be ladled out in thick, peppered, flour-fattened sauce."
+)
+
+
+def config_path(name):
+    return os.path.join(CONFIG_DIR, name)
+
+
+def build_tts(config="base_speaker.json", device="cpu", **kwargs):
+    torch.manual_seed(0)
+    return BaseSpeakerTTS(config_path(config), device=device, **kwargs)
+
+
+def build_converter(config="converter.json", device="cpu", **kwargs):
+    torch.manual_seed(0)
+    return ToneColorConverter(config_path(config), device=device, enable_watermark=False, **kwargs)
+
+
+def random_se(model, seed=0):
+    # tone color embeddings are [1, gin_channels, 1]
+    generator = torch.Generator().manual_seed(seed)
+    se = torch.randn(1, model.hps.model.gin_channels, 1, generator=generator)
+    return se.to(model.device)
+
+
+def synthetic_speech(seconds, sr=22050, seed=0):
+    """Speech-like test signal: a gliding harmonic tone with a syllabic envelope."""
+    rng = np.random.default_rng(seed)
+    t = np.arange(int(seconds * sr)) / sr
+    f0 = 120 + 30 * np.sin(2 * np.pi * 0.5 * t)
+    phase = 2 * np.pi * np.cumsum(f0) / sr
+    audio = sum(np.sin(k * phase) / k for k in range(1, 8))
+    audio *= 0.5 * (1 + np.sin(2 * np.pi * 4 * t)) ** 2
+    audio += 0.01 * rng.standard_normal(len(t))
+    return (0.3 * audio / np.abs(audio).max()).astype(np.float32)
+
+
+def percentiles(samples, qs=(50, 90, 99)):
+    return {f"p{q}": float(np.percentile(samples, q)) for q in qs}
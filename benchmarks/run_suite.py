@@ -0,0 +1,224 @@
+"""Latency and real-time factor of the inference hot paths, for regression tracking.
+
+Cases (random weights, built from ``benchmarks/configs``):
+
+    text_to_sequence   text frontend (cleaners + symbol ids) per text length, with
+                       empty (cold) and filled (warm) G2P caches
+    spectrogram_torch  STFT magnitude per audio length and batch size
+    tts                BaseSpeakerTTS.tts per text length
+    tts_infer          SynthesizerTrn.infer on a padded batch of one sentence
+    convert            ToneColorConverter.convert per audio length
+    voice_conversion   SynthesizerTrn.voice_conversion per audio length and batch size
+    extract_se         ToneColorConverter.extract_se per reference length
+
+Results go to a JSON file; ``--compare`` checks a run against an earlier one
+and exits with status 1 if any case got slower than ``--threshold``.
+
+    python benchmarks/run_suite.py --size small --output base.json
+    python benchmarks/run_suite.py --size small --output new.json --compare base.json
+"""
+import argparse
+import json
+import platform
+import subprocess
+import sys
+import time
+
+import numpy as np
+import torch
+
+from common import BENCH_DIR, SAMPLE_TEXT, build_converter, build_tts, percentiles, random_se, synthetic_speech
+from openvoice.mel_processing import spectrogram_torch
+from openvoice.text import cache as text_cache
+from openvoice.text import text_to_sequence
+
+TEXTS = {
+    "short": "Hello there, how are you today?",
+    "medium": SAMPLE_TEXT,
+    "long": " ".join([SAMPLE_TEXT] * 4),
+}
+AUDIO_SECONDS = (1, 5, 20)
+BATCH_SIZES = (1, 4)
+
+
+def measure(fn, repeat, warmup=1):
+    for _ in range(warmup):
+        fn()
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - start)
+    return times
+
+
+def summarize(name, params, times, audio_seconds=None):
+    result = {"name": name, "params": params, "repeat": len(times), "mean": float(np.mean(times))}
+    result.update(percentiles(times))
+    if audio_seconds:
+        # real-time factor: seconds of compute per second of audio, lower is better
+        result["audio_seconds"] = audio_seconds
+        result["rtf"] = result["p50"] / audio_seconds
+    return result
+
+
+def case_id(result):
+    params = ",".join(f"{k}={v}" for k, v in sorted(result["params"].items()))
+    return f"{result['name']}[{params}]"
+
+
+def text_cases(tts, repeat):
+    hps = tts.hps
+    for label, text in TEXTS.items():
+        sentences = tts.prepare_sentences(text, "English")
+
+        def frontend(cold):
+            if cold:
+                text_cache.clear()
+            return [text_to_sequence(s, hps.symbols, hps.data.text_cleaners) for s in sentences]
+        for state in ("cold", "warm"):
+            times = measure(lambda: frontend(state == "cold"), repeat)
+            yield summarize("text_to_sequence", {"text": label, "chars": len(text), "cache": state}, times)
+
+
+def spectrogram_cases(converter, repeat):
+    d = converter.hps.data
+    for seconds in AUDIO_SECONDS:
+        for batch in BATCH_SIZES:
+            y = torch.from_numpy(np.stack([synthetic_speech(seconds, d.sampling_rate, seed=i) for i in range(batch)]))
+            times = measure(lambda: spectrogram_torch(y, d.filter_length, d.sampling_rate, d.hop_length,
+                                                      d.win_length, center=False), repeat)
+            yield summarize("spectrogram_torch", {"seconds": seconds, "batch": batch}, times, seconds * batch)
+
+
+def tts_cases(tts, repeat):
+    sr = tts.hps.data.sampling_rate
+    for label, text in TEXTS.items():
+        torch.manual_seed(0)
+        audio_seconds = len(tts.tts(text, None, speaker="default")) / sr
+        times = measure(lambda: tts.tts(text, None, speaker="default"), repeat, warmup=0)
+        yield summarize("tts", {"text": label, "chars": len(text)}, times, audio_seconds)
+
+    sentence = tts.prepare_sentences(TEXTS["medium"], "English")[0]
+    x = tts.get_text(sentence, tts.hps, False)
+    for batch in BATCH_SIZES:
+        xs = x.unsqueeze(0).repeat(batch, 1)
+        lengths = torch.full((batch,), x.size(0), dtype=torch.long)
+        sid = torch.zeros(batch, dtype=torch.long)
+
+        def infer():
+            with torch.no_grad():
+                return tts.model.infer(xs, lengths, sid=sid, noise_scale=0.667, noise_scale_w=0.6, sdp_ratio=0.2)[0]
+        torch.manual_seed(0)
+        audio_seconds = infer().shape[-1] * batch / sr
+        times = measure(infer, repeat)
+        yield summarize("tts_infer", {"batch": batch, "tokens": x.size(0)}, times, audio_seconds)
+
+
+def convert_cases(converter, repeat):
+    d = converter.hps.data
+    src_se, tgt_se = random_se(converter, 0), random_se(converter, 1)
+    for seconds in AUDIO_SECONDS:
+        audio = synthetic_speech(seconds, d.sampling_rate)
+        times = measure(lambda: converter.convert(audio, src_se, tgt_se), repeat)
+        yield summarize("convert", {"seconds": seconds}, times, seconds)
+
+        for batch in BATCH_SIZES:
+            y = torch.from_numpy(np.stack([audio] * batch))
+            spec = spectrogram_torch(y, d.filter_length, d.sampling_rate, d.hop_length, d.win_length, center=False)
+            lengths = torch.full((batch,), spec.size(-1), dtype=torch.long)
+
+            def vc():
+                with torch.no_grad():
+                    return converter.model.voice_conversion(spec, lengths, sid_src=src_se.expand(batch, -1, -1),
+                                                            sid_tgt=tgt_se.expand(batch, -1, -1), tau=0.3)
+            times = measure(vc, repeat)
+            yield summarize("voice_conversion", {"seconds": seconds, "batch": batch}, times, seconds * batch)
+
+        times = measure(lambda: converter.extract_se([audio]), repeat)
+        yield summarize("extract_se", {"seconds": seconds}, times, seconds)
+
+
+def metadata(args):
+    try:
+        commit = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=BENCH_DIR,
+                                capture_output=True, text=True).stdout.strip()
+    except OSError:
+        commit = None
+    return {
+        "size": args.size,
+        "repeat": args.repeat,
+        "commit": commit,
+        "torch": torch.__version__,
+        "num_threads": torch.get_num_threads(),
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "processor": platform.processor(),
+        "time": time.strftime("%Y-%m-%dT%H:%M:%S"),
+    }
+
+
+def compare(results, baseline_path, threshold):
+    with open(baseline_path, "r", encoding="utf-8") as f:
+        baseline = {case_id(r): r for r in json.load(f)["results"]}
+    regressions = []
+    print(f"\n{'case':<52}{'base p50 ms':>12}{'new p50 ms':>12}{'change':>9}")
+    for r in results:
+        key = case_id(r)
+        if key not in baseline:
+            print(f"{key:<52}{'-':>12}{r['p50'] * 1000:>12.2f}{'new':>9}")
+            continue
+        change = r["p50"] / baseline[key]["p50"] - 1
+        flag = ""
+        if change > threshold:
+            regressions.append(key)
+            flag = "  <-- slower"
+        print(f"{key:<52}{baseline[key]['p50'] * 1000:>12.2f}{r['p50'] * 1000:>12.2f}{change:>+9.1%}{flag}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--size", default="small", choices=["small", "full"],
+                        help="model configs: small for CI, full for V1-size layers")
+    parser.add_argument("--repeat", type=int, default=10)
+    parser.add_argument("--only", nargs="+", default=None,
+                        help="case groups to run: text spectrogram tts convert")
+    parser.add_argument("--output", default=None, help="write results as JSON")
+    parser.add_argument("--compare", default=None, help="earlier JSON results to compare against")
+    parser.add_argument("--threshold", type=float, default=0.10, help="relative p50 slowdown counted as a regression")
+    args = parser.parse_args()
+
+    suffix = "_small" if args.size == "small" else ""
+    tts = build_tts(f"base_speaker{suffix}.json")
+    converter = build_converter(f"converter{suffix}.json")
+    groups = {
+        "text": lambda: text_cases(tts, args.repeat),
+        "spectrogram": lambda: spectrogram_cases(converter, args.repeat),
+        "tts": lambda: tts_cases(tts, args.repeat),
+        "convert": lambda: convert_cases(converter, args.repeat),
+    }
+
+    results = []
+    print(f"{'case':<52}{'p50 ms':>10}{'p90 ms':>10}{'p99 ms':>10}{'rtf':>8}")
+    for group in args.only or groups:
+        for r in groups[group]():
+            results.append(r)
+            rtf = f"{r['rtf']:.4f}" if "rtf" in r else "-"
+            print(f"{case_id(r):<52}{r['p50'] * 1000:>10.2f}{r['p90'] * 1000:>10.2f}{r['p99'] * 1000:>10.2f}{rtf:>8}",
+                  flush=True)
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump({"meta": metadata(args), "results": results}, f, indent=2)
+
+    if args.compare:
+        regressions = compare(results, args.compare, args.threshold)
+        if regressions:
+            print(f"\n{len(regressions)} case(s) slower than {args.threshold:.0%}", file=sys.stderr)
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
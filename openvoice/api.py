@@ -1,23 +1,39 @@
+import functools
+import logging
 import torch
 import numpy as np
 import re
 import soundfile
 from openvoice import utils
 from openvoice import commons
+from openvoice import audio as audio_io
+from openvoice import profiling
 import os
-import librosa
 from openvoice.text import text_to_sequence
 from openvoice.mel_processing import spectrogram_torch
 from openvoice.models import SynthesizerTrn
+from openvoice.runtime import RuntimeConfig
+from openvoice.frontend import TextFrontend
+
+logger = logging.getLogger(__name__)
+
+# "[EN]" / "[ZH]" wrapped around the sentences by prepare_sentences
+_LANGUAGE_MARK = re.compile(r'\[[A-Z]{2}\]$')
 
 
 class OpenVoiceBaseClass(object):
     def __init__(self, 
                 config_path, 
-                device='cuda:0'):
+                device='cuda:0',
+                runtime=None):
         if 'cuda' in device:
             assert torch.cuda.is_available()
 
+        # thread/backend settings; falls back to OPENVOICE_* environment variables
+        if runtime is None:
+            runtime = RuntimeConfig.from_env()
+        runtime.apply()
+
         hps = utils.get_hparams_from_file(config_path)
 
         model = SynthesizerTrn(
@@ -32,12 +48,16 @@ class OpenVoiceBaseClass(object):
         self.hps = hps
         self.device = device
 
+    @property
+    def sampling_rate(self):
+        return self.hps.data.sampling_rate
+
     def load_ckpt(self, ckpt_path):
         # Actualizado para compatibilidad con torch.load más reciente
         checkpoint_dict = torch.load(ckpt_path, map_location=torch.device(self.device), weights_only=False)
         a, b = self.model.load_state_dict(checkpoint_dict['model'], strict=False)
-        print("Loaded checkpoint '{}'".format(ckpt_path))
-        print('missing/unexpected keys:', a, b)
+        logger.info("Loaded checkpoint '%s'", ckpt_path)
+        logger.info("missing/unexpected keys: %s %s", a, b)
 
 
 class BaseSpeakerTTS(OpenVoiceBaseClass):
@@ -46,6 +66,31 @@ class BaseSpeakerTTS(OpenVoiceBaseClass):
         "chinese": "ZH",
     }
 
+    # sdp_ratio implied by each duration mode; "mixed" uses the sdp_ratio argument.
+    # "dp" and "sdp" skip the other duration predictor entirely.
+    duration_modes = {
+        "dp": 0.0,
+        "sdp": 1.0,
+        "mixed": None,
+    }
+
+    def __init__(self, *args, **kwargs):
+        # sentences cleaned ahead of inference; frontend_workers=0 cleans inline
+        frontend_workers = kwargs.pop('frontend_workers', 1)
+        max_in_flight = kwargs.pop('max_in_flight', 4)
+        frontend_executor = kwargs.pop('frontend_executor', None)
+        # seconds of silence after each sentence, by its final punctuation mark;
+        # keys are normalized like the split sentences, so '。' means '.'
+        self.pause = kwargs.pop('pause', 0.05)
+        self.pauses = {utils.normalize_punctuation(mark): seconds
+                       for mark, seconds in (kwargs.pop('pauses', None) or {}).items()}
+        if self.pause < 0 or any(seconds < 0 for seconds in self.pauses.values()):
+            raise ValueError(f"pauses must not be negative; got pause={self.pause}, pauses={self.pauses}")
+        super().__init__(*args, **kwargs)
+        self.frontend = TextFrontend(functools.partial(self.get_text, hps=self.hps, is_symbol=False),
+                                     workers=frontend_workers, max_in_flight=max_in_flight,
+                                     executor=frontend_executor)
+
     @staticmethod
     def get_text(text, hps, is_symbol):
         text_norm = text_to_sequence(text, hps.symbols, [] if is_symbol else hps.data.text_cleaners)
@@ -55,55 +100,125 @@ class BaseSpeakerTTS(OpenVoiceBaseClass):
         return text_norm
 
     @staticmethod
-    def audio_numpy_concat(segment_data_list, sr, speed=1.):
-        audio_segments = []
-        for segment_data in segment_data_list:
-            audio_segments += segment_data.reshape(-1).tolist()
-            audio_segments += [0] * int((sr * 0.05)/speed)
-        audio_segments = np.array(audio_segments).astype(np.float32)
-        return audio_segments
+    def audio_numpy_concat(segment_data_list, sr, speed=1., pause=0.05):
+        """Segments, each followed by ``pause`` seconds of silence (one value or one per segment), as float32."""
+        if np.ndim(pause) == 0:
+            pause = [pause] * len(segment_data_list)
+        return audio_io.concat(segment_data_list, [audio_io.pause_samples(sr, p, speed) for p in pause])
+
+    def sentence_pause(self, sentence):
+        """Seconds of silence after ``sentence``: ``pauses`` of its final punctuation mark, else ``pause``."""
+        if not self.pauses:
+            return self.pause
+        text = _LANGUAGE_MARK.sub('', sentence).rstrip()
+        return self.pauses.get(text[-1:], self.pause)
 
     @staticmethod
     def split_sentences_into_pieces(text, language_str):
         texts = utils.split_sentence(text, language_str=language_str)
-        print(" > Text splitted to sentences.")
-        print('\n'.join(texts))
-        print(" > ===========================")
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("Text split into %d sentences:\n%s", len(texts), '\n'.join(texts))
         return texts
 
-    def tts(self, text, output_path, speaker, language='English', speed=1.0):
+    def resolve_sdp_ratio(self, duration_mode, sdp_ratio):
+        assert duration_mode in self.duration_modes, f"duration mode {duration_mode} is not supported"
+        if self.duration_modes[duration_mode] is not None:
+            return self.duration_modes[duration_mode]
+        return sdp_ratio
+
+    def prepare_sentences(self, text, language='English'):
+        """Split ``text`` into sentences wrapped in the language mark, ready for ``infer_sentence``."""
         mark = self.language_marks.get(language.lower(), None)
         assert mark is not None, f"language {language} is not supported"
-
         texts = self.split_sentences_into_pieces(text, mark)
-
-        audio_list = []
+        sentences = []
         for t in texts:
             t = re.sub(r'([a-z])([A-Z])', r'\1 \2', t)
-            t = f'[{mark}]{t}[{mark}]'
-            stn_tst = self.get_text(t, self.hps, False)
-            device = self.device
-            speaker_id = self.hps.speakers[speaker]
-            with torch.no_grad():
-                x_tst = stn_tst.unsqueeze(0).to(device)
-                x_tst_lengths = torch.LongTensor([stn_tst.size(0)]).to(device)
-                sid = torch.LongTensor([speaker_id]).to(device)
-                audio = self.model.infer(x_tst, x_tst_lengths, sid=sid, noise_scale=0.667, noise_scale_w=0.6,
-                                    length_scale=1.0 / speed)[0][0, 0].data.cpu().float().numpy()
-            audio_list.append(audio)
-        audio = self.audio_numpy_concat(audio_list, sr=self.hps.data.sampling_rate, speed=speed)
+            sentences.append(f'[{mark}]{t}[{mark}]')
+        return sentences
+
+    def infer_sentence(self, sentence, speaker, speed=1.0, noise_scale=0.667, noise_scale_w=0.6, sdp_ratio=0.2):
+        """Audio of one sentence from ``prepare_sentences``, as float32 numpy."""
+        with profiling.stage("text"):
+            stn_tst = self.get_text(sentence, self.hps, False)
+        return self.infer_tokens(stn_tst, speaker, speed=speed, noise_scale=noise_scale,
+                                 noise_scale_w=noise_scale_w, sdp_ratio=sdp_ratio)
+
+    def infer_tokens(self, stn_tst, speaker, speed=1.0, noise_scale=0.667, noise_scale_w=0.6, sdp_ratio=0.2):
+        """``infer_sentence`` for a sentence already turned into symbol ids by ``get_text``."""
+        device = self.device
+        speaker_id = self.hps.speakers[speaker]
+        with torch.no_grad(), profiling.stage("infer", x=stn_tst):
+            x_tst = stn_tst.unsqueeze(0).to(device)
+            x_tst_lengths = torch.LongTensor([stn_tst.size(0)]).to(device)
+            sid = torch.LongTensor([speaker_id]).to(device)
+            audio = self.model.infer(x_tst, x_tst_lengths, sid=sid, noise_scale=noise_scale, noise_scale_w=noise_scale_w,
+                                length_scale=1.0 / speed, sdp_ratio=sdp_ratio)[0][0, 0].data.cpu().float().numpy()
+        return audio
+
+    def infer_batch(self, tokens, speakers, speed=1.0, noise_scale=0.667, noise_scale_w=0.6, sdp_ratio=0.2):
+        """``infer_tokens`` for several sentences in one zero-padded batch; one array per sentence, in order.
+
+        ``speakers`` is a speaker name for all sentences or one name per sentence.
+        """
+        device = self.device
+        if isinstance(speakers, str):
+            speakers = [speakers] * len(tokens)
+        lengths = torch.LongTensor([t.size(0) for t in tokens])
+        x = torch.zeros(len(tokens), int(lengths.max()), dtype=torch.long)
+        for i, t in enumerate(tokens):
+            x[i, :t.size(0)] = t
+        with torch.no_grad(), profiling.stage("infer", x=x):
+            sid = torch.LongTensor([self.hps.speakers[s] for s in speakers]).to(device)
+            o, _, y_mask, _ = self.model.infer(x.to(device), lengths.to(device), sid=sid, noise_scale=noise_scale,
+                                               noise_scale_w=noise_scale_w, length_scale=1.0 / speed,
+                                               sdp_ratio=sdp_ratio)
+            audio = o[:, 0].data.cpu().float().numpy()
+            # the decoder upsamples every frame by hop_length samples
+            samples = (y_mask.sum([1, 2]).long() * self.hps.data.hop_length).tolist()
+        return [audio[i, :n] for i, n in enumerate(samples)]
+
+    def tts(self, text, output_path, speaker, language='English', speed=1.0,
+            noise_scale=0.667, noise_scale_w=0.6, sdp_ratio=0.2, duration_mode='mixed'):
+        sdp_ratio = self.resolve_sdp_ratio(duration_mode, sdp_ratio)
+        with profiling.stage("tts"):
+            with profiling.stage("split"):
+                sentences = self.prepare_sentences(text, language)
+
+            audio_list = []
+            # the frontend cleans the next sentences while this one is synthesised
+            for _, stn_tst in self.frontend.stream(sentences):
+                audio_list.append(self.infer_tokens(stn_tst, speaker, speed=speed, noise_scale=noise_scale,
+                                                    noise_scale_w=noise_scale_w, sdp_ratio=sdp_ratio))
+            with profiling.stage("concat"):
+                audio = self.audio_numpy_concat(audio_list, sr=self.hps.data.sampling_rate, speed=speed,
+                                                pause=[self.sentence_pause(s) for s in sentences])
 
         if output_path is None:
             return audio
         else:
             soundfile.write(output_path, audio, self.hps.data.sampling_rate)
 
+    def tts_stream(self, text, speaker, language='English', speed=1.0,
+                   noise_scale=0.667, noise_scale_w=0.6, sdp_ratio=0.2, duration_mode='mixed'):
+        """Yield ``tts`` audio one sentence at a time, each chunk followed by its pause.
+
+        Concatenating the chunks gives the ``tts`` output.
+        """
+        sdp_ratio = self.resolve_sdp_ratio(duration_mode, sdp_ratio)
+        sr = self.hps.data.sampling_rate
+        for sentence, stn_tst in self.frontend.stream(self.prepare_sentences(text, language)):
+            audio = self.infer_tokens(stn_tst, speaker, speed=speed, noise_scale=noise_scale,
+                                      noise_scale_w=noise_scale_w, sdp_ratio=sdp_ratio)
+            yield audio_io.concat([audio], audio_io.pause_samples(sr, self.sentence_pause(sentence), speed))
+
 
 class ToneColorConverter(OpenVoiceBaseClass):
     def __init__(self, *args, **kwargs):
+        enable_watermark = kwargs.pop('enable_watermark', True)
         super().__init__(*args, **kwargs)
 
-        if kwargs.get('enable_watermark', True):
+        if enable_watermark:
             import wavmark
             self.watermark_model = wavmark.load_model().to(self.device)
         else:
@@ -111,6 +226,20 @@ class ToneColorConverter(OpenVoiceBaseClass):
         self.version = getattr(self.hps, '_version_', "v1")
 
     def extract_se(self, ref_wav_list, se_save_path=None):
+        gs = self.extract_segment_ses(ref_wav_list).mean(0)
+
+        if se_save_path is not None:
+            os.makedirs(os.path.dirname(se_save_path), exist_ok=True)
+            torch.save(gs.cpu(), se_save_path)
+
+        return gs
+
+    def extract_segment_ses(self, ref_wav_list, sample_rate=None):
+        """One tone color per reference segment, stacked as ``[n, 1, gin_channels, 1]``.
+
+        Segments are file paths or in-memory arrays at ``sample_rate``.
+        ``extract_se`` is the mean over the first dimension.
+        """
         if isinstance(ref_wav_list, str):
             ref_wav_list = [ref_wav_list]
         
@@ -118,46 +247,70 @@ class ToneColorConverter(OpenVoiceBaseClass):
         hps = self.hps
         gs = []
         
-        for fname in ref_wav_list:
-            # Actualizado para librosa 0.11.0 - asegurar tipo float32
-            audio_ref, sr = librosa.load(fname, sr=hps.data.sampling_rate, dtype=np.float32)
-            y = torch.FloatTensor(audio_ref)
-            y = y.to(device)
-            y = y.unsqueeze(0)
-            y = spectrogram_torch(y, hps.data.filter_length,
-                                        hps.data.sampling_rate, hps.data.hop_length, hps.data.win_length,
-                                        center=False).to(device)
-            with torch.no_grad():
-                g = self.model.ref_enc(y.transpose(1, 2)).unsqueeze(-1)
-                gs.append(g.detach())
-        gs = torch.stack(gs).mean(0)
+        with profiling.stage("extract_se"):
+            for ref in ref_wav_list:
+                with profiling.stage("load"):
+                    if isinstance(ref, str):
+                        # the references are usually the wav segments written by se_extractor
+                        y, sr = audio_io.load_tensor(ref, sr=hps.data.sampling_rate, mmap=True)
+                    else:
+                        y = self.load_source(ref, sample_rate=sample_rate)
+                y = y.to(device)
+                y = y.unsqueeze(0)
+                with profiling.stage("spectrogram", y=y):
+                    y = spectrogram_torch(y, hps.data.filter_length,
+                                                hps.data.sampling_rate, hps.data.hop_length, hps.data.win_length,
+                                                center=False).to(device)
+                with torch.no_grad(), profiling.stage("ref_enc", spec=y):
+                    g = self.model.ref_enc(y.transpose(1, 2)).unsqueeze(-1)
+                    gs.append(g.detach())
+        return torch.stack(gs)
 
-        if se_save_path is not None:
-            os.makedirs(os.path.dirname(se_save_path), exist_ok=True)
-            torch.save(gs.cpu(), se_save_path)
+    def load_source(self, audio, sample_rate=None):
+        """Return ``audio`` as a float32 tensor at the model sampling rate.
 
-        return gs
+        ``audio`` is a file path, or a mono float array/tensor sampled at
+        ``sample_rate`` (default: the model rate). In-memory audio is only
+        resampled when its rate differs from the model rate.
+        """
+        target_sr = self.hps.data.sampling_rate
+        if isinstance(audio, str):
+            audio, _ = audio_io.load_tensor(audio, sr=target_sr)
+            return audio
 
-    def convert(self, audio_src_path, src_se, tgt_se, output_path=None, tau=0.3, message="default"):
+        if isinstance(audio, torch.Tensor):
+            audio = audio.detach().float().reshape(-1)
+        else:
+            audio = np.asarray(audio, dtype=np.float32).reshape(-1)
+        if sample_rate is not None and sample_rate != target_sr:
+            audio = audio_io.resample(audio, sample_rate, target_sr)
+        if isinstance(audio, np.ndarray):
+            audio = torch.from_numpy(audio)
+        return audio
+
+    def convert(self, audio_src_path, src_se, tgt_se, output_path=None, tau=0.3, message="default", sample_rate=None):
         hps = self.hps
-        # load audio - actualizado para librosa 0.11.0
-        audio, sample_rate = librosa.load(audio_src_path, sr=hps.data.sampling_rate, dtype=np.float32)
-        audio = torch.tensor(audio).float()
-        
-        with torch.no_grad():
-            y = torch.FloatTensor(audio).to(self.device)
-            y = y.unsqueeze(0)
-            spec = spectrogram_torch(y, hps.data.filter_length,
-                                    hps.data.sampling_rate, hps.data.hop_length, hps.data.win_length,
-                                    center=False).to(self.device)
-            spec_lengths = torch.LongTensor([spec.size(-1)]).to(self.device)
-            audio = self.model.voice_conversion(spec, spec_lengths, sid_src=src_se, sid_tgt=tgt_se, tau=tau)[0][
-                        0, 0].data.cpu().float().numpy()
-            audio = self.add_watermark(audio, message)
-            if output_path is None:
-                return audio
-            else:
-                soundfile.write(output_path, audio, hps.data.sampling_rate)
+        with profiling.stage("convert"):
+            with profiling.stage("load"):
+                audio = self.load_source(audio_src_path, sample_rate=sample_rate)
+
+            with torch.no_grad():
+                y = audio.to(self.device)
+                y = y.unsqueeze(0)
+                with profiling.stage("spectrogram", y=y):
+                    spec = spectrogram_torch(y, hps.data.filter_length,
+                                            hps.data.sampling_rate, hps.data.hop_length, hps.data.win_length,
+                                            center=False).to(self.device)
+                spec_lengths = torch.LongTensor([spec.size(-1)]).to(self.device)
+                with profiling.stage("voice_conversion", spec=spec):
+                    audio = self.model.voice_conversion(spec, spec_lengths, sid_src=src_se, sid_tgt=tgt_se, tau=tau)[0][
+                                0, 0].data.cpu().float().numpy()
+                with profiling.stage("watermark"):
+                    audio = self.add_watermark(audio, message)
+        if output_path is None:
+            return audio
+        else:
+            soundfile.write(output_path, audio, hps.data.sampling_rate)
     
     def add_watermark(self, audio, message):
         if self.watermark_model is None:
@@ -171,7 +324,7 @@ class ToneColorConverter(OpenVoiceBaseClass):
         for n in range(n_repeat):
             trunck = audio[(coeff * n) * K: (coeff * n + 1) * K]
             if len(trunck) != K:
-                print('Audio too short, fail to add watermark')
+                logger.warning('Audio too short, fail to add watermark')
                 break
             message_npy = bits[n * 32: (n + 1) * 32]
             
@@ -190,7 +343,7 @@ class ToneColorConverter(OpenVoiceBaseClass):
         for n in range(n_repeat):
             trunck = audio[(coeff * n) * K: (coeff * n + 1) * K]
             if len(trunck) != K:
-                print('Audio too short, fail to detect watermark')
+                logger.warning('Audio too short, fail to detect watermark')
                 return 'Fail'
             with torch.no_grad():
                 signal = torch.FloatTensor(trunck).to(self.device).unsqueeze(0)
@@ -199,3 +352,17 @@ class ToneColorConverter(OpenVoiceBaseClass):
         bits = np.stack(bits).reshape(-1, 8)
         message = utils.bits_to_string(bits)
         return message
+
+
+def tts_then_convert(tts_model, converter, text, src_se, tgt_se, output_path=None, speaker='default',
+                     language='English', speed=1.0, tau=0.3, message="default", **tts_kwargs):
+    """Synthesise ``text`` with ``tts_model`` and convert it to ``tgt_se`` without temporary files.
+
+    The base speaker audio is handed to ``converter`` in memory and is only
+    resampled if the two models run at different sampling rates. Returns the
+    converted float32 audio at ``converter.sampling_rate`` when
+    ``output_path`` is None, like ``ToneColorConverter.convert``.
+    """
+    audio = tts_model.tts(text, None, speaker=speaker, language=language, speed=speed, **tts_kwargs)
+    return converter.convert(audio, src_se, tgt_se, output_path=output_path, tau=tau, message=message,
+                             sample_rate=tts_model.sampling_rate)
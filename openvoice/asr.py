@@ -0,0 +1,148 @@
+"""Shared faster-whisper model for ``se_extractor.split_audio_whisper``.
+
+The model is loaded on first use (or by ``warmup``), shared by every thread
+of the process and released again after ``idle_timeout`` seconds without a
+transcription. Size, compute type and timeout come from the constructor or
+from ``OPENVOICE_WHISPER_MODEL``, ``OPENVOICE_WHISPER_COMPUTE_TYPE``,
+``OPENVOICE_WHISPER_CPU_THREADS`` and ``OPENVOICE_WHISPER_IDLE_TIMEOUT``.
+"""
+import gc
+import os
+import threading
+import time
+
+import numpy as np
+import torch
+
+from openvoice.runtime import ENV_PREFIX
+
+DEFAULT_MODEL_SIZE = "medium"
+
+_default_backend = None
+_default_backend_lock = threading.Lock()
+
+
+def default_compute_type(device):
+    # int8 on CPU is ~2x faster than float32 and a quarter of the memory;
+    # segment boundaries do not need more precision
+    return "float16" if device.startswith("cuda") else "int8"
+
+
+class WhisperBackend(object):
+    def __init__(self,
+                model_size=None,
+                device=None,
+                compute_type=None,
+                cpu_threads=None,
+                num_workers=1,
+                idle_timeout=None):
+        environ = os.environ
+        self.model_size = model_size or environ.get(ENV_PREFIX + "WHISPER_MODEL") or DEFAULT_MODEL_SIZE
+        # Usar CPU si no hay GPU disponible
+        self.device = device or ("cuda" if torch.cuda.is_available() else "cpu")
+        self.compute_type = (compute_type or environ.get(ENV_PREFIX + "WHISPER_COMPUTE_TYPE")
+                             or default_compute_type(self.device))
+        if cpu_threads is None:
+            cpu_threads = int(environ.get(ENV_PREFIX + "WHISPER_CPU_THREADS") or 0)
+        self.cpu_threads = cpu_threads
+        # concurrent transcriptions; faster-whisper runs this many in parallel
+        self.num_workers = num_workers
+        if idle_timeout is None:
+            value = environ.get(ENV_PREFIX + "WHISPER_IDLE_TIMEOUT")
+            idle_timeout = float(value) if value else None
+        self.idle_timeout = idle_timeout
+
+        self._model = None
+        self._lock = threading.Lock()
+        self._slots = threading.BoundedSemaphore(num_workers)
+        self._active = 0
+        self._last_used = 0.0
+        self._timer = None
+
+    @property
+    def loaded(self):
+        return self._model is not None
+
+    def _acquire_model(self):
+        with self._lock:
+            if self._model is None:
+                from faster_whisper import WhisperModel
+                self._model = WhisperModel(self.model_size, device=self.device, compute_type=self.compute_type,
+                                           cpu_threads=self.cpu_threads, num_workers=self.num_workers)
+            self._active += 1
+            return self._model
+
+    def _release_model(self):
+        with self._lock:
+            self._active -= 1
+            self._last_used = time.monotonic()
+            self._schedule_unload()
+
+    def warmup(self):
+        """Load the model and run it once on a second of silence."""
+        self.transcribe(np.zeros(16000, dtype=np.float32), beam_size=1)
+        return self
+
+    def transcribe(self, audio, **kwargs):
+        """``WhisperModel.transcribe`` with the segments already consumed into a list."""
+        with self._slots:
+            model = self._acquire_model()
+            try:
+                segments, info = model.transcribe(audio, **kwargs)
+                # the generator does the decoding, so it has to run while we hold the model
+                return list(segments), info
+            finally:
+                self._release_model()
+
+    def unload(self, idle_for=None):
+        """Drop the model; the next ``transcribe`` loads it again.
+
+        No-op while a transcription is running, or if the model was used in
+        the last ``idle_for`` seconds.
+        """
+        with self._lock:
+            if self._active or self._model is None:
+                return False
+            if idle_for is not None and time.monotonic() - self._last_used < idle_for:
+                return False
+            self._model = None
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+        gc.collect()
+        if self.device.startswith("cuda"):
+            torch.cuda.empty_cache()
+        return True
+
+    def _schedule_unload(self):
+        # called with self._lock held
+        if not self.idle_timeout or self._active:
+            return
+        if self._timer is not None:
+            self._timer.cancel()
+        self._timer = threading.Timer(self.idle_timeout, self.unload, kwargs={"idle_for": self.idle_timeout})
+        self._timer.daemon = True
+        self._timer.start()
+
+    def __repr__(self):
+        return (f"{self.__class__.__name__}(model_size={self.model_size!r}, device={self.device!r}, "
+                f"compute_type={self.compute_type!r}, loaded={self.loaded})")
+
+
+def get_backend():
+    """The process-wide backend, created from the environment on first use."""
+    global _default_backend
+    with _default_backend_lock:
+        if _default_backend is None:
+            _default_backend = WhisperBackend()
+        return _default_backend
+
+
+def set_backend(backend):
+    """Replace the process-wide backend, unloading the previous one."""
+    global _default_backend
+    with _default_backend_lock:
+        previous, _default_backend = _default_backend, backend
+    if previous is not None and previous is not backend:
+        previous.unload()
+    return backend
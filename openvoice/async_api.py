@@ -0,0 +1,111 @@
+"""asyncio front end for ``BaseSpeakerTTS`` and ``ToneColorConverter``.
+
+Inference runs on a fixed thread pool; at most ``max_pending`` jobs are
+queued or running at a time, and further callers wait (backpressure) instead
+of piling work onto the pool. ``tts`` submits one sentence at a time, so a
+cancelled request stops after the sentence that is running. Reading and
+writing audio files happens on the event loop's default executor, never on
+the loop itself.
+
+    ov = AsyncOpenVoice(tts_model, converter, max_workers=2)
+    audio = await ov.tts(text, speaker='default')
+    await ov.convert(audio, src_se, tgt_se, output_path='out.wav', sample_rate=ov.tts_model.sampling_rate)
+"""
+import asyncio
+import contextvars
+import functools
+from concurrent.futures import ThreadPoolExecutor
+
+import soundfile
+import torch
+
+from openvoice import audio as audio_io
+
+
+class AsyncOpenVoice(object):
+    def __init__(self, tts_model=None, converter=None, max_workers=1, max_pending=None, executor=None):
+        self.tts_model = tts_model
+        self.converter = converter
+        self.max_pending = max_pending or 2 * max_workers
+        self._own_executor = executor is None
+        self._executor = executor or ThreadPoolExecutor(max_workers, thread_name_prefix="openvoice")
+        # created on first use, inside the running loop
+        self._slots = None
+
+    async def _run(self, fn, *args, **kwargs):
+        """Run ``fn`` on the inference pool once a slot is free.
+
+        The slot is given back when the job really finishes, not when the
+        awaiting task is cancelled, so cancelled work still counts until the
+        thread is done with it. The job runs in a copy of the task's context.
+        """
+        if self._slots is None:
+            self._slots = asyncio.Semaphore(self.max_pending)
+        await self._slots.acquire()
+        loop = asyncio.get_running_loop()
+        try:
+            context = contextvars.copy_context()
+            future = self._executor.submit(context.run, functools.partial(fn, *args, **kwargs))
+        except BaseException:
+            self._slots.release()
+            raise
+        future.add_done_callback(lambda _: loop.call_soon_threadsafe(self._slots.release))
+        return await asyncio.wrap_future(future)
+
+    @staticmethod
+    async def _io(fn, *args, **kwargs):
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(None, functools.partial(fn, *args, **kwargs))
+
+    async def tts(self, text, output_path=None, speaker='default', language='English', speed=1.0,
+                  noise_scale=0.667, noise_scale_w=0.6, sdp_ratio=0.2, duration_mode='mixed'):
+        """``BaseSpeakerTTS.tts``; cancellable between sentences."""
+        model = self.tts_model
+        sdp_ratio = model.resolve_sdp_ratio(duration_mode, sdp_ratio)
+        sentences = await self._io(model.prepare_sentences, text, language)
+
+        audio_list = []
+        for sentence in sentences:
+            audio_list.append(await self._run(model.infer_sentence, sentence, speaker, speed=speed,
+                                              noise_scale=noise_scale, noise_scale_w=noise_scale_w,
+                                              sdp_ratio=sdp_ratio))
+        audio = model.audio_numpy_concat(audio_list, sr=model.sampling_rate, speed=speed,
+                                         pause=[model.sentence_pause(s) for s in sentences])
+
+        if output_path is None:
+            return audio
+        await self._io(soundfile.write, output_path, audio, model.sampling_rate)
+
+    async def convert(self, audio, src_se, tgt_se, output_path=None, tau=0.3, message="default", sample_rate=None):
+        """``ToneColorConverter.convert``; a file path is decoded off the loop first."""
+        converter = self.converter
+        if isinstance(audio, str):
+            audio, sample_rate = await self._io(audio_io.load, audio, sr=converter.sampling_rate)
+        converted = await self._run(converter.convert, audio, src_se, tgt_se, tau=tau,
+                                    message=message, sample_rate=sample_rate)
+        if output_path is None:
+            return converted
+        await self._io(soundfile.write, output_path, converted, converter.sampling_rate)
+
+    async def extract_se(self, ref_wav_list, sample_rate=None):
+        """``ToneColorConverter.extract_se``; one job per reference segment, cancellable in between."""
+        if isinstance(ref_wav_list, str):
+            ref_wav_list = [ref_wav_list]
+        converter = self.converter
+        gs = []
+        for ref in ref_wav_list:
+            sr = sample_rate
+            if isinstance(ref, str):
+                ref, sr = await self._io(audio_io.load, ref, sr=converter.sampling_rate, mmap=True)
+            gs.append(await self._run(converter.extract_segment_ses, [ref], sample_rate=sr))
+        return torch.cat(gs).mean(0)
+
+    def close(self, wait=True):
+        if self._own_executor:
+            self._executor.shutdown(wait=wait)
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        await self._io(self.close)
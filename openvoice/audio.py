@@ -0,0 +1,224 @@
+"""Audio decoding and resampling for the inference hot paths.
+
+``load`` reads through soundfile and resamples with soxr, which is what
+``librosa.load`` ends up doing for the formats we use, without librosa's
+dispatch and extra copies. The output matches ``librosa.load`` sample for
+sample. Formats libsndfile cannot decode still go through librosa.
+"""
+import math
+import os
+import struct
+from functools import lru_cache
+
+import numpy as np
+import soundfile
+import soxr
+import torch
+
+DEFAULT_RES_TYPE = "soxr_hq"
+
+# wav subtypes np.memmap can read directly: (format tag, bits) -> dtype
+_WAV_FORMAT_PCM = 1
+_WAV_FORMAT_FLOAT = 3
+_WAV_FORMAT_EXTENSIBLE = 0xFFFE
+_WAV_DTYPES = {
+    (_WAV_FORMAT_PCM, 16): np.dtype("<i2"),
+    (_WAV_FORMAT_PCM, 32): np.dtype("<i4"),
+    (_WAV_FORMAT_FLOAT, 32): np.dtype("<f4"),
+}
+
+
+def info(path):
+    """``(sampling_rate, frames, channels)`` of ``path`` without decoding it."""
+    sf_info = soundfile.info(path)
+    return sf_info.samplerate, sf_info.frames, sf_info.channels
+
+
+def load(path, sr=None, mono=True, offset=0.0, duration=None, mmap=False, res_type=DEFAULT_RES_TYPE):
+    """Decode ``path`` to float32, like ``librosa.load(path, sr=sr, mono=mono)``.
+
+    Returns ``(audio, sr)``; ``audio`` is ``[samples]`` when ``mono`` or the
+    file has one channel, and ``[channels, samples]`` otherwise. ``sr=None`` keeps the native rate.
+    With ``mmap=True`` uncompressed WAVs are memory-mapped, so reading a
+    short window of a long file only touches that window.
+    """
+    audio, sr_native = None, None
+    if mmap:
+        mapped = _read_wav_mmap(path, offset, duration)
+        if mapped is not None:
+            audio, sr_native = mapped
+    if audio is None:
+        try:
+            audio, sr_native = _read_soundfile(path, offset, duration)
+        except soundfile.LibsndfileError:
+            import librosa
+            audio, sr_native = librosa.load(path, sr=None, mono=False, offset=offset,
+                                            duration=duration, dtype=np.float32)
+            audio = audio.reshape(-1, audio.shape[-1]).T
+
+    # audio is [samples, channels] here
+    if mono:
+        audio = audio[:, 0] if audio.shape[1] == 1 else audio.mean(axis=1)
+    else:
+        # librosa also drops the channel axis of single-channel files
+        audio = audio[:, 0] if audio.shape[1] == 1 else audio.T
+
+    if sr is not None and sr != sr_native:
+        audio = resample(audio, sr_native, sr, res_type=res_type)
+    else:
+        sr = sr_native
+    return np.ascontiguousarray(audio, dtype=np.float32), sr
+
+
+def load_tensor(path, sr=None, mono=True, **kwargs):
+    """``load`` returning a tensor that shares memory with the decoded array."""
+    audio, sr = load(path, sr=sr, mono=mono, **kwargs)
+    if not audio.flags.writeable:
+        # a float32 wav mapped at its native rate; torch needs writable memory
+        audio = audio.copy()
+    return torch.from_numpy(audio), sr
+
+
+def resample(audio, orig_sr, target_sr, res_type=DEFAULT_RES_TYPE):
+    """Resample along the last axis; the length is ``ceil(n * target_sr / orig_sr)`` as in librosa.
+
+    ``res_type`` is ``"soxr_vhq"``, ``"soxr_hq"``, ``"soxr_mq"``, ``"soxr_lq"``
+    or ``"polyphase"`` (integer rates only; the filter is cached per ratio).
+    """
+    if orig_sr == target_sr:
+        return audio
+    if isinstance(audio, torch.Tensor):
+        audio = audio.detach().cpu().numpy()
+    audio = np.asarray(audio, dtype=np.float32)
+    n_samples = int(math.ceil(audio.shape[-1] * float(target_sr) / orig_sr))
+
+    if res_type == "polyphase":
+        from scipy.signal import resample_poly
+        up, down = _polyphase_ratio(int(orig_sr), int(target_sr))
+        out = resample_poly(audio, up, down, axis=-1, window=_polyphase_filter(up, down)).astype(np.float32)
+    elif audio.ndim == 1:
+        out = soxr.resample(audio, orig_sr, target_sr, quality=res_type)
+    else:
+        # soxr wants [samples, channels]
+        out = soxr.resample(audio.T, orig_sr, target_sr, quality=res_type).T
+    return _fix_length(out, n_samples)
+
+
+def pause_samples(sr, seconds=0.05, speed=1.0):
+    """Samples of silence for a ``seconds`` pause spoken at ``speed``."""
+    if seconds < 0:
+        raise ValueError(f"pause must not be negative, got {seconds}")
+    return int((sr * seconds) / speed)
+
+
+def concat(segments, gaps=0, dtype=np.float32):
+    """Segments, each followed by ``gaps`` samples of silence, in one array.
+
+    ``gaps`` is one count for every segment or a list with one per segment,
+    as Python or numpy integers, none of them negative. The output is
+    allocated once (zeroed, so the gaps need no writes) and every segment is
+    copied into place.
+    """
+    if np.ndim(gaps) == 0:
+        gaps = [gaps] * len(segments)
+    gaps = [int(gap) for gap in gaps]
+    if any(gap < 0 for gap in gaps):
+        raise ValueError(f"gaps must not be negative, got {min(gaps)}")
+    segments = [np.asarray(s).reshape(-1) for s in segments]
+    out = np.zeros(sum(s.size for s in segments) + sum(gaps), dtype=dtype)
+    pos = 0
+    for segment, gap in zip(segments, gaps):
+        out[pos:pos + segment.size] = segment
+        pos += segment.size + gap
+    return out
+
+
+def _fix_length(audio, size):
+    n = audio.shape[-1]
+    if n > size:
+        return audio[..., :size]
+    if n < size:
+        pad = [(0, 0)] * (audio.ndim - 1) + [(0, size - n)]
+        return np.pad(audio, pad)
+    return audio
+
+
+@lru_cache(maxsize=None)
+def _polyphase_ratio(orig_sr, target_sr):
+    g = math.gcd(orig_sr, target_sr)
+    return target_sr // g, orig_sr // g
+
+
+@lru_cache(maxsize=16)
+def _polyphase_filter(up, down):
+    # the same kaiser low-pass resample_poly designs on every call
+    from scipy.signal import firwin
+    max_rate = max(up, down)
+    half_len = 10 * max_rate
+    h = firwin(2 * half_len + 1, 1.0 / max_rate, window=("kaiser", 5.0))
+    h.setflags(write=False)
+    return h
+
+
+def _read_soundfile(path, offset, duration):
+    with soundfile.SoundFile(path) as f:
+        sr_native = f.samplerate
+        if offset:
+            f.seek(int(offset * sr_native))
+        frames = int(duration * sr_native) if duration is not None else -1
+        audio = f.read(frames=frames, dtype="float32", always_2d=True)
+    return audio, sr_native
+
+
+def _read_wav_mmap(path, offset=0.0, duration=None):
+    """Memory-map the data chunk of a PCM16/PCM32/float32 WAV.
+
+    Returns ``([samples, channels] float32, sr)``, or None when the file is
+    not a WAV this can map (compressed, 24-bit, RF64, ...). Float32 files
+    come back as a read-only view of the file.
+    """
+    if not isinstance(path, str):
+        return None
+    with open(path, "rb") as f:
+        header = f.read(12)
+        if len(header) < 12 or header[:4] != b"RIFF" or header[8:12] != b"WAVE":
+            return None
+        fmt = None
+        while True:
+            chunk = f.read(8)
+            if len(chunk) < 8:
+                return None
+            chunk_id, chunk_size = struct.unpack("<4sI", chunk)
+            if chunk_id == b"fmt ":
+                body = f.read(chunk_size)
+                tag, channels, sr_native, _, _, bits = struct.unpack("<HHIIHH", body[:16])
+                if tag == _WAV_FORMAT_EXTENSIBLE and len(body) >= 26:
+                    tag = struct.unpack("<H", body[24:26])[0]
+                fmt = (tag, channels, sr_native, bits)
+                if chunk_size % 2:
+                    f.seek(1, 1)
+            elif chunk_id == b"data":
+                if fmt is None:
+                    return None
+                data_offset = f.tell()
+                break
+            else:
+                f.seek(chunk_size + chunk_size % 2, 1)
+
+    tag, channels, sr_native, bits = fmt
+    dtype = _WAV_DTYPES.get((tag, bits))
+    if dtype is None:
+        return None
+    # clamp to the file size: truncated or streamed WAVs overstate the data size
+    file_frames = (min(chunk_size, os.path.getsize(path) - data_offset)) // (dtype.itemsize * channels)
+    start = min(int(offset * sr_native), file_frames)
+    stop = file_frames if duration is None else min(file_frames, start + int(duration * sr_native))
+    if stop <= start:
+        return np.zeros((0, channels), dtype=np.float32), sr_native
+
+    data = np.memmap(path, dtype=dtype, mode="r", offset=data_offset + start * dtype.itemsize * channels,
+                     shape=(stop - start, channels))
+    if dtype.kind == "f":
+        return data, sr_native
+    # same scaling as libsndfile
+    return data * np.float32(1.0 / 2 ** (bits - 1)), sr_native
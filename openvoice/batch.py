@@ -0,0 +1,282 @@
+"""Offline batch conversion: ``openvoice-batch manifest.jsonl --converter checkpoints_v2/converter``.
+
+Each manifest row (CSV with a header, or JSON lines) describes one clip:
+
+    id         optional, defaults to the row number
+    text       text to synthesise with the base speaker (needs --base-speaker), or
+    source     path of the source audio to convert
+    reference  reference audio of the target voice
+    output     where to write the converted wav
+    speaker, language, speed   optional, for text rows
+
+Rows run on a process pool in which every worker loads the models once.
+The tone color of each distinct reference is extracted by a single task
+first (``se_extractor.get_se`` writes its cache directory non-atomically, so
+two workers must not extract the same voice at once) and handed to the rows
+that use it. Every finished row is appended to a progress file; re-running
+the same command skips it.
+"""
+import argparse
+import csv
+import json
+import os
+import sys
+import time
+import traceback
+from collections import OrderedDict
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+import multiprocessing
+
+from openvoice.log import request_context, setup_logging
+from openvoice.runtime import RuntimeConfig, available_cores
+
+# per-process state, filled by _init_worker
+_worker = {}
+
+
+def read_manifest(path):
+    rows = []
+    with open(path, "r", encoding="utf-8") as f:
+        if path.endswith(".csv"):
+            rows = [dict(row) for row in csv.DictReader(f)]
+        else:
+            rows = [json.loads(line) for line in f if line.strip()]
+
+    for i, row in enumerate(rows):
+        row["id"] = str(row.get("id") or i)
+        if not row.get("text") and not row.get("source"):
+            raise ValueError(f"manifest row {row['id']}: needs either 'text' or 'source'")
+        for key in ("reference", "output"):
+            if not row.get(key):
+                raise ValueError(f"manifest row {row['id']}: missing '{key}'")
+    return rows
+
+
+def read_progress(path):
+    done = set()
+    if os.path.isfile(path):
+        with open(path, "r", encoding="utf-8") as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    continue  # a line cut short by an interrupted run
+                if record.get("status") == "ok":
+                    done.add(record["id"])
+    return done
+
+
+def group_references(rows):
+    """Reference paths of ``rows`` grouped by the cache entry ``get_se`` gives them.
+
+    Copies of the same file share an entry, so they are extracted once too.
+    """
+    from openvoice.se_extractor import hash_file
+
+    groups = OrderedDict()
+    for reference in OrderedDict.fromkeys(row["reference"] for row in rows):
+        try:
+            key = (os.path.basename(reference).rsplit(".", 1)[0], hash_file(reference))
+        except OSError:
+            key = reference  # fails in _extract_target_se, with the rows that use it
+        groups.setdefault(key, []).append(reference)
+    return list(groups.values())
+
+
+def _init_worker(options):
+    from openvoice.api import BaseSpeakerTTS, ToneColorConverter
+    import torch
+
+    setup_logging(options["log_level"])
+    runtime = RuntimeConfig(num_threads=options["threads"], num_interop_threads=1)
+    device = options["device"]
+
+    converter = ToneColorConverter(os.path.join(options["converter"], "config.json"), device=device,
+                                   enable_watermark=options["watermark"], runtime=runtime)
+    converter.load_ckpt(os.path.join(options["converter"], "checkpoint.pth"))
+
+    tts = None
+    if options["base_speaker"]:
+        tts = BaseSpeakerTTS(os.path.join(options["base_speaker"], "config.json"), device=device, runtime=runtime)
+        tts.load_ckpt(os.path.join(options["base_speaker"], "checkpoint.pth"))
+        from openvoice.text import warmup as warmup_text
+        # only the languages the manifest uses; rows in a language the base
+        # speaker does not support fail on their own in _process_row
+        warmup_text([language for language in options["languages"] if language.lower() in tts.language_marks])
+
+    if options["vad"] == "whisper":
+        # load whisper here rather than inside the first row
+        from openvoice import asr
+        asr.set_backend(asr.WhisperBackend(device="cuda" if device.startswith("cuda") else "cpu",
+                                           cpu_threads=options["threads"])).warmup()
+
+    source_se = None
+    if options["source_se"]:
+        source_se = torch.load(options["source_se"], map_location=device)
+
+    _worker.update(
+        options=options,
+        converter=converter,
+        tts=tts,
+        source_se=source_se,
+        source_ses={},
+    )
+
+
+def _extract_target_se(reference):
+    from openvoice import se_extractor
+
+    options = _worker["options"]
+    se, _ = se_extractor.get_se(reference, _worker["converter"], target_dir=options["cache_dir"], vad=options["vad"])
+    return se.cpu()
+
+
+def _source_se(source):
+    if _worker["source_se"] is not None:
+        return _worker["source_se"]
+    ses = _worker["source_ses"]
+    if source not in ses:
+        ses[source] = _worker["converter"].extract_se([source])
+    return ses[source]
+
+
+def _process_row(row, tgt_se):
+    options = _worker["options"]
+    converter = _worker["converter"]
+
+    if row.get("text"):
+        tts = _worker["tts"]
+        if tts is None:
+            raise ValueError("text rows need --base-speaker")
+        if _worker["source_se"] is None:
+            raise ValueError("text rows need --source-se")
+        source = tts.tts(row["text"], None, speaker=row.get("speaker") or "default",
+                         language=row.get("language") or "English", speed=float(row.get("speed") or 1.0))
+        sample_rate = tts.sampling_rate
+        src_se = _worker["source_se"]
+    else:
+        source = row["source"]
+        sample_rate = None
+        src_se = _source_se(source)
+
+    tgt_se = tgt_se.to(converter.device)
+    output_dir = os.path.dirname(row["output"])
+    if output_dir:
+        os.makedirs(output_dir, exist_ok=True)
+    converter.convert(source, src_se, tgt_se, output_path=row["output"],
+                      tau=options["tau"], message=options["message"], sample_rate=sample_rate)
+
+
+def _run_row(row, tgt_se):
+    start = time.perf_counter()
+    try:
+        # log records of the row carry its manifest id
+        with request_context(row["id"]):
+            _process_row(row, tgt_se)
+        return {"id": row["id"], "status": "ok", "seconds": time.perf_counter() - start}
+    except Exception as e:
+        return _error_result(row, e, traceback.format_exc())
+
+
+def _error_result(row, e, traceback_text):
+    return {"id": row["id"], "status": "error", "error": f"{type(e).__name__}: {e}", "traceback": traceback_text}
+
+
+def get_parser():
+    parser = argparse.ArgumentParser(prog="openvoice-batch", description=__doc__.split("\n\n")[0])
+    parser.add_argument("manifest", help="CSV or JSONL manifest")
+    parser.add_argument("--converter", required=True, help="directory with the converter config.json and checkpoint.pth")
+    parser.add_argument("--base-speaker", default=None, help="directory with the base speaker config.json and checkpoint.pth, for text rows")
+    parser.add_argument("--source-se", default=None, help="source tone color (.pth) of the base speaker; required for text rows")
+    parser.add_argument("--workers", type=int, default=None, help="worker processes (default: cores / threads)")
+    parser.add_argument("--threads", type=int, default=1, help="torch threads per worker")
+    parser.add_argument("--device", default="cpu")
+    parser.add_argument("--progress", default=None, help="progress file (default: <manifest>.progress.jsonl)")
+    parser.add_argument("--cache-dir", default="processed", help="where reference embeddings are cached")
+    parser.add_argument("--vad", default="silero", choices=["silero", "energy", "whisper"],
+                        help="how references are segmented; 'energy' needs no model")
+    parser.add_argument("--no-vad", dest="vad", action="store_const", const="whisper", help="same as --vad whisper")
+    parser.add_argument("--tau", type=float, default=0.3)
+    parser.add_argument("--message", default="@MyShell", help="watermark message")
+    parser.add_argument("--no-watermark", dest="watermark", action="store_false")
+    parser.add_argument("--log-level", default="WARNING", help="log level of the workers")
+    return parser
+
+
+def main(argv=None):
+    args = get_parser().parse_args(argv)
+
+    rows = read_manifest(args.manifest)
+    progress_path = args.progress or args.manifest + ".progress.jsonl"
+    done = read_progress(progress_path)
+    pending = [row for row in rows if row["id"] not in done]
+    print(f"{len(rows)} rows, {len(done)} already done, {len(pending)} to process")
+    if not pending:
+        return 0
+
+    workers = args.workers or max(1, available_cores() // args.threads)
+    rows_by_reference = OrderedDict()
+    for row in pending:
+        rows_by_reference.setdefault(row["reference"], []).append(row)
+    options = {
+        "converter": args.converter,
+        "base_speaker": args.base_speaker,
+        "source_se": args.source_se,
+        "device": args.device,
+        "threads": args.threads,
+        "cache_dir": args.cache_dir,
+        "vad": args.vad,
+        "tau": args.tau,
+        "message": args.message,
+        "watermark": args.watermark,
+        "log_level": args.log_level,
+        "languages": sorted({row.get("language") or "English" for row in pending if row.get("text")}),
+    }
+
+    counts = {"ok": 0, "error": 0}
+    start = time.time()
+
+    def record(result):
+        traceback_text = result.pop("traceback", None)
+        progress.write(json.dumps(result) + "\n")
+        progress.flush()
+        counts[result["status"]] += 1
+        if result["status"] != "ok":
+            print(f"[{result['id']}] {result['error']}", file=sys.stderr)
+            if traceback_text:
+                print(traceback_text, file=sys.stderr)
+        n_done = counts["ok"] + counts["error"]
+        print(f"{n_done}/{len(pending)} done, {counts['error']} failed, "
+              f"{n_done / (time.time() - start):.2f} rows/s", flush=True)
+
+    # spawn: forked children would inherit the parent's torch thread pools
+    context = multiprocessing.get_context("spawn")
+    with open(progress_path, "a", encoding="utf-8") as progress, \
+            ProcessPoolExecutor(max_workers=workers, mp_context=context,
+                                initializer=_init_worker, initargs=(options,)) as pool:
+        # future -> the references it extracts, or the row it converts
+        tasks = {pool.submit(_extract_target_se, references[0]): references
+                 for references in group_references(pending)}
+        while tasks:
+            finished, _ = wait(tasks, return_when=FIRST_COMPLETED)
+            for future in finished:
+                task = tasks.pop(future)
+                if isinstance(task, dict):
+                    record(future.result())
+                    continue
+                rows = [row for reference in task for row in rows_by_reference[reference]]
+                try:
+                    tgt_se = future.result()
+                except Exception as e:
+                    traceback_text = "".join(traceback.format_exception(type(e), e, e.__traceback__))
+                    for row in rows:
+                        record(_error_result(row, e, traceback_text))
+                    continue
+                for row in rows:
+                    tasks[pool.submit(_run_row, row, tgt_se)] = row
+
+    return 1 if counts["error"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,98 @@
+"""Tone color of a voice kept as per-segment embeddings plus their running sum.
+
+``ToneColorConverter.extract_se`` averages ``ref_enc`` over every segment of
+the reference each time it is called. ``VoiceEnrollment`` keeps the segment
+embeddings instead, so adding reference audio only runs ``ref_enc`` on the
+new segments, and dropping audio is a subtraction:
+
+    enrollment = VoiceEnrollment()
+    enrollment.add_reference(converter, 'first_take.wav')
+    enrollment.add_reference(converter, 'second_take.wav')   # only this file is processed
+    enrollment.remove_reference('first_take.wav')
+    tgt_se = enrollment.se
+"""
+from collections import OrderedDict
+
+import torch
+
+from openvoice import se_extractor
+
+
+class VoiceEnrollment(object):
+    def __init__(self):
+        self.segments = OrderedDict()  # segment id -> [gin_channels] float32 tensor
+        # float64 so that adding and removing many segments does not drift
+        self._sum = None
+
+    def __len__(self):
+        return len(self.segments)
+
+    @property
+    def count(self):
+        return len(self.segments)
+
+    @property
+    def se(self):
+        """The mean tone color, ``[1, gin_channels, 1]`` like ``extract_se``."""
+        if not self.segments:
+            raise ValueError("no segments enrolled")
+        return (self._sum / len(self.segments)).float().view(1, -1, 1)
+
+    def add(self, ids, ses):
+        """Add segment embeddings (``[n, ...]``, e.g. from ``extract_segment_ses``) under ``ids``.
+
+        An id that is already enrolled is replaced.
+        """
+        ses = ses.detach().cpu().float().reshape(len(ids), -1)
+        if self._sum is None:
+            self._sum = torch.zeros(ses.shape[1], dtype=torch.float64)
+        for segment_id, g in zip(ids, ses):
+            previous = self.segments.pop(segment_id, None)
+            if previous is not None:
+                self._sum -= previous.double()
+            self.segments[segment_id] = g.clone()
+            self._sum += g.double()
+
+    def remove(self, ids):
+        for segment_id in ids:
+            self._sum -= self.segments.pop(segment_id).double()
+        if not self.segments and self._sum is not None:
+            self._sum.zero_()
+
+    def _reference_ids(self, key):
+        prefix = key + ":"
+        return [segment_id for segment_id in self.segments if segment_id.startswith(prefix)]
+
+    def add_reference(self, converter, audio_path, vad='silero', split_seconds=10.0):
+        """Segment ``audio_path`` and enroll its segments; a file already enrolled is skipped.
+
+        ``vad`` is ``'silero'`` (the default, as in ``se_extractor.get_se``) or
+        ``'energy'``, which needs no model.
+        Returns the ids of the new segments.
+        """
+        key = se_extractor.hash_file(audio_path)
+        if self._reference_ids(key):
+            return []
+        pieces, sr = se_extractor.split_audio_vad_arrays(audio_path, split_seconds=split_seconds, method=vad)
+        ses = converter.extract_segment_ses(pieces, sample_rate=sr)
+        ids = [f"{key}:{i}" for i in range(len(pieces))]
+        self.add(ids, ses)
+        return ids
+
+    def remove_reference(self, audio_path):
+        """Drop every segment that came from ``audio_path``; returns their ids."""
+        ids = self._reference_ids(se_extractor.hash_file(audio_path))
+        self.remove(ids)
+        return ids
+
+    def save(self, path):
+        torch.save({"segments": dict(self.segments)}, path)
+
+    @classmethod
+    def load(cls, path):
+        state = torch.load(path, map_location="cpu")
+        enrollment = cls()
+        if state["segments"]:
+            ids = list(state["segments"])
+            enrollment.add(ids, torch.stack([state["segments"][i] for i in ids]))
+        return enrollment
@@ -0,0 +1,74 @@
+"""Text cleaning and tokenization ahead of inference.
+
+``BaseSpeakerTTS.tts`` runs the cleaners (jieba, inflect, eng_to_ipa) of the
+next sentences on a worker pool while the current sentence is in
+``SynthesizerTrn.infer``, so on long documents the model does not wait for
+the frontend. At most ``max_in_flight`` sentences are queued or being
+encoded at a time, which bounds the memory held by a long narration.
+
+The default pool is one thread: inference releases the GIL, so a single
+frontend thread already overlaps with it. Pass a ``ProcessPoolExecutor``
+to clean several sentences truly in parallel.
+"""
+import contextvars
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+from openvoice import profiling
+
+
+class TextFrontend(object):
+    def __init__(self, encode, workers=1, max_in_flight=4, executor=None):
+        self.encode = encode
+        self.workers = workers
+        self.max_in_flight = max(1, max_in_flight)
+        self._executor = executor
+        self._own_executor = executor is None
+
+    def _get_executor(self):
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(self.workers, thread_name_prefix="openvoice-frontend")
+        return self._executor
+
+    def _encode(self, sentence):
+        with profiling.stage("text"):
+            return self.encode(sentence)
+
+    def _submit(self, sentence):
+        executor = self._get_executor()
+        if isinstance(executor, ThreadPoolExecutor):
+            # in the caller's context, so profiling stages and request ids follow
+            return executor.submit(contextvars.copy_context().run, self._encode, sentence)
+        return executor.submit(self.encode, sentence)
+
+    def stream(self, sentences):
+        """Yield ``(sentence, tokens)`` in order, encoding up to ``max_in_flight`` sentences ahead."""
+        if (not self.workers and self._executor is None) or \
+                (isinstance(sentences, (list, tuple)) and len(sentences) < 2):
+            # nothing to overlap with
+            for sentence in sentences:
+                yield sentence, self._encode(sentence)
+            return
+
+        pending = deque()
+        sentences = iter(sentences)
+        try:
+            while True:
+                while len(pending) < self.max_in_flight:
+                    sentence = next(sentences, None)
+                    if sentence is None:
+                        break
+                    pending.append((sentence, self._submit(sentence)))
+                if not pending:
+                    return
+                sentence, future = pending.popleft()
+                yield sentence, future.result()
+        finally:
+            # the consumer stopped early: drop what has not started yet
+            for _, future in pending:
+                future.cancel()
+
+    def shutdown(self, wait=True):
+        if self._own_executor and self._executor is not None:
+            self._executor.shutdown(wait=wait)
+            self._executor = None
@@ -0,0 +1,70 @@
+"""Logging setup and request-id correlation.
+
+Library modules log through ``logging.getLogger(__name__)`` and never
+configure handlers; applications call ``setup_logging`` once. Inside
+``request_context(request_id)`` every record carries ``request_id``, also on
+the threads of ``ModelPool`` and ``AsyncOpenVoice``, which run jobs in the
+caller's context.
+
+    setup_logging()            # level from OPENVOICE_LOG_LEVEL, default INFO
+    with request_context():
+        converter.convert(...)
+"""
+import contextlib
+import contextvars
+import logging
+import os
+import sys
+import uuid
+
+DEFAULT_FORMAT = "%(asctime)s %(levelname)s %(name)s [%(request_id)s] %(message)s"
+
+_request_id = contextvars.ContextVar("openvoice_request_id", default="-")
+
+# the handler installed by the last setup_logging call
+_handler = None
+
+
+def get_request_id():
+    return _request_id.get()
+
+
+@contextlib.contextmanager
+def request_context(request_id=None):
+    """Tag the records logged inside the block with ``request_id`` (a new uuid by default)."""
+    if request_id is None:
+        request_id = uuid.uuid4().hex[:12]
+    token = _request_id.set(request_id)
+    try:
+        yield request_id
+    finally:
+        _request_id.reset(token)
+
+
+class RequestIdFilter(logging.Filter):
+    def filter(self, record):
+        record.request_id = _request_id.get()
+        return True
+
+
+def setup_logging(level=None, fmt=DEFAULT_FORMAT, stream=None):
+    """Send ``openvoice`` records to ``stream`` (stderr) with the request id; returns the handler.
+
+    Calling it again replaces the handler of the previous call, so records
+    are never printed twice.
+    """
+    global _handler
+    if level is None:
+        level = os.environ.get("OPENVOICE_LOG_LEVEL", "INFO")
+    if isinstance(level, str):
+        level = level.upper()
+    handler = logging.StreamHandler(stream or sys.stderr)
+    handler.addFilter(RequestIdFilter())
+    handler.setFormatter(logging.Formatter(fmt))
+    logger = logging.getLogger("openvoice")
+    if _handler is not None:
+        logger.removeHandler(_handler)
+    logger.addHandler(handler)
+    _handler = handler
+    logger.setLevel(level)
+    return handler
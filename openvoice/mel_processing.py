@@ -1,3 +1,5 @@
+import logging
+
 import torch
 import torch.utils.data
 from librosa.filters import mel as librosa_mel_fn
@@ -34,15 +36,23 @@ def spectral_de_normalize_torch(magnitudes):
     return output
 
 
+logger = logging.getLogger(__name__)
+
 mel_basis = {}
 hann_window = {}
 
 
+def _check_range(y, limit):
+    # one pass for both bounds
+    lo, hi = torch.aminmax(y)
+    if lo < -limit:
+        logger.warning("min value is %s", lo.item())
+    if hi > limit:
+        logger.warning("max value is %s", hi.item())
+
+
 def spectrogram_torch(y, n_fft, sampling_rate, hop_size, win_size, center=False):
-    if torch.min(y) < -1.1:
-        print("min value is ", torch.min(y))
-    if torch.max(y) > 1.1:
-        print("max value is ", torch.max(y))
+    _check_range(y, 1.1)
 
     global hann_window
     dtype_device = str(y.dtype) + "_" + str(y.device)
@@ -136,7 +146,7 @@ def spectrogram_torch_conv(y, n_fft, sampling_rate, hop_size, win_size, center=F
     
     # Verificación con tolerancia
     if not torch.allclose(spec1, spec2_magnitude, atol=1e-4):
-        print(f"Warning: spectrogram methods differ. Max diff: {(spec1 - spec2_magnitude).abs().max().item()}")
+        logger.warning("spectrogram methods differ. Max diff: %s", (spec1 - spec2_magnitude).abs().max().item())
 
     spec = torch.sqrt(spec2.pow(2).sum(-1) + 1e-6)
     return spec
@@ -159,10 +169,7 @@ def spec_to_mel_torch(spec, n_fft, num_mels, sampling_rate, fmin, fmax):
 def mel_spectrogram_torch(
     y, n_fft, num_mels, sampling_rate, hop_size, win_size, fmin, fmax, center=False
 ):
-    if torch.min(y) < -1.0:
-        print("min value is ", torch.min(y))
-    if torch.max(y) > 1.0:
-        print("max value is ", torch.max(y))
+    _check_range(y, 1.0)
 
     global mel_basis, hann_window
     dtype_device = str(y.dtype) + "_" + str(y.device)
@@ -1,3 +1,4 @@
+import logging
 import math
 import torch
 from torch import nn
@@ -6,6 +7,7 @@ from torch.nn import functional as F
 from openvoice import commons
 from openvoice import modules
 from openvoice import attentions
+from openvoice import profiling
 
 from torch.nn import Conv1d, ConvTranspose1d, Conv2d
 # Actualizado para PyTorch 2.x: usar parametrizations en lugar de utils para weight_norm
@@ -20,6 +22,8 @@ except ImportError:
 
 from openvoice.commons import init_weights, get_padding
 
+logger = logging.getLogger(__name__)
+
 
 class TextEncoder(nn.Module):
     def __init__(self,
@@ -298,8 +302,33 @@ class Generator(torch.nn.Module):
 
         return x
 
+    def forward_inference(self, x, g=None):
+        """Same result as ``forward``, for use under ``torch.no_grad()``.
+
+        Opt-in: ``forward`` is not routed here, as the in-place work did not
+        make the decoder measurably faster (see ``benchmarks/bench_generator.py``).
+
+        Every full-rate activation is applied in place on tensors owned by this
+        method, the resblocks of a stage share one ``leaky_relu`` of their
+        input, and their outputs are summed into the first one.
+        """
+        x = self.conv_pre(x)
+        if g is not None:
+            x.add_(self.cond(g))
+
+        for i in range(self.num_upsamples):
+            x = self.ups[i](F.leaky_relu_(x, modules.LRELU_SLOPE))
+            xt = F.leaky_relu(x, modules.LRELU_SLOPE)
+            xs = None
+            for j in range(self.num_kernels):
+                out = self.resblocks[i * self.num_kernels + j].forward_inference(x, xt=xt)
+                xs = out if xs is None else xs.add_(out)
+            x = xs.div_(self.num_kernels)
+        x = self.conv_post(F.leaky_relu_(x))
+        return torch.tanh_(x)
+
     def remove_weight_norm(self):
-        print("Removing weight norm...")
+        logger.info("Removing weight norm...")
         for layer in self.ups:
             remove_weight_norm(layer)
         for layer in self.resblocks:
@@ -473,35 +502,58 @@ class SynthesizerTrn(nn.Module):
         self.zero_g = zero_g
 
     def infer(self, x, x_lengths, sid=None, noise_scale=1, length_scale=1, noise_scale_w=1., sdp_ratio=0.2, max_len=None):
-        x, m_p, logs_p, x_mask = self.enc_p(x, x_lengths)
+        with profiling.stage("enc_p", x=x) as st:
+            x, m_p, logs_p, x_mask = self.enc_p(x, x_lengths)
+            st.shapes(out=x)
         if self.n_speakers > 0:
             g = self.emb_g(sid).unsqueeze(-1) # [b, h, 1]
         else:
             g = None
 
-        logw = self.sdp(x, x_mask, g=g, reverse=True, noise_scale=noise_scale_w) * sdp_ratio \
-            + self.dp(x, x_mask, g=g) * (1 - sdp_ratio)
-
-        w = torch.exp(logw) * x_mask * length_scale
-        w_ceil = torch.ceil(w)
-        y_lengths = torch.clamp_min(torch.sum(w_ceil, [1, 2]), 1).long()
-        y_mask = torch.unsqueeze(commons.sequence_mask(y_lengths, None), 1).to(x_mask.dtype)
-        attn_mask = torch.unsqueeze(x_mask, 2) * torch.unsqueeze(y_mask, -1)
-        attn = commons.generate_path(w_ceil, attn_mask)
-
-        m_p = torch.matmul(attn.squeeze(1), m_p.transpose(1, 2)).transpose(1, 2) # [b, t', t], [b, t, d] -> [b, d, t']
-        logs_p = torch.matmul(attn.squeeze(1), logs_p.transpose(1, 2)).transpose(1, 2) # [b, t', t], [b, t, d] -> [b, d, t']
+        # Only run the duration predictors that contribute to the mix: the
+        # stochastic one reverses several spline flows and is the costlier of the two.
+        if sdp_ratio == 0:
+            with profiling.stage("dp", x=x):
+                logw = self.dp(x, x_mask, g=g)
+        elif sdp_ratio == 1:
+            with profiling.stage("sdp", x=x):
+                logw = self.sdp(x, x_mask, g=g, reverse=True, noise_scale=noise_scale_w)
+        else:
+            with profiling.stage("sdp", x=x):
+                logw_sdp = self.sdp(x, x_mask, g=g, reverse=True, noise_scale=noise_scale_w)
+            with profiling.stage("dp", x=x):
+                logw_dp = self.dp(x, x_mask, g=g)
+            logw = logw_sdp * sdp_ratio + logw_dp * (1 - sdp_ratio)
+
+        with profiling.stage("align") as st:
+            w = torch.exp(logw) * x_mask * length_scale
+            w_ceil = torch.ceil(w)
+            y_lengths = torch.clamp_min(torch.sum(w_ceil, [1, 2]), 1).long()
+            y_mask = torch.unsqueeze(commons.sequence_mask(y_lengths, None), 1).to(x_mask.dtype)
+            attn_mask = torch.unsqueeze(x_mask, 2) * torch.unsqueeze(y_mask, -1)
+            attn = commons.generate_path(w_ceil, attn_mask)
+
+            m_p = torch.matmul(attn.squeeze(1), m_p.transpose(1, 2)).transpose(1, 2) # [b, t', t], [b, t, d] -> [b, d, t']
+            logs_p = torch.matmul(attn.squeeze(1), logs_p.transpose(1, 2)).transpose(1, 2) # [b, t', t], [b, t, d] -> [b, d, t']
+            st.shapes(attn=attn)
 
         z_p = m_p + torch.randn_like(m_p) * torch.exp(logs_p) * noise_scale
-        z = self.flow(z_p, y_mask, g=g, reverse=True)
-        o = self.dec((z * y_mask)[:,:,:max_len], g=g)
+        with profiling.stage("flow", z=z_p):
+            z = self.flow(z_p, y_mask, g=g, reverse=True)
+        with profiling.stage("dec", z=z) as st:
+            o = self.dec((z * y_mask)[:,:,:max_len], g=g)
+            st.shapes(out=o)
         return o, attn, y_mask, (z, z_p, m_p, logs_p)
 
     def voice_conversion(self, y, y_lengths, sid_src, sid_tgt, tau=1.0):
         g_src = sid_src
         g_tgt = sid_tgt
-        z, m_q, logs_q, y_mask = self.enc_q(y, y_lengths, g=g_src if not self.zero_g else torch.zeros_like(g_src), tau=tau)
-        z_p = self.flow(z, y_mask, g=g_src)
-        z_hat = self.flow(z_p, y_mask, g=g_tgt, reverse=True)
-        o_hat = self.dec(z_hat * y_mask, g=g_tgt if not self.zero_g else torch.zeros_like(g_tgt))
+        with profiling.stage("enc_q", spec=y):
+            z, m_q, logs_q, y_mask = self.enc_q(y, y_lengths, g=g_src if not self.zero_g else torch.zeros_like(g_src), tau=tau)
+        with profiling.stage("flow", z=z):
+            z_p = self.flow(z, y_mask, g=g_src)
+            z_hat = self.flow(z_p, y_mask, g=g_tgt, reverse=True)
+        with profiling.stage("dec", z=z_hat) as st:
+            o_hat = self.dec(z_hat * y_mask, g=g_tgt if not self.zero_g else torch.zeros_like(g_tgt))
+            st.shapes(out=o_hat)
         return o_hat, y_mask, (z, z_p, z_hat)
@@ -317,6 +317,20 @@ class ResBlock1(torch.nn.Module):
             x = x * x_mask
         return x
 
+    def forward_inference(self, x, xt=None):
+        """No-grad variant of ``forward`` that activates and sums in place.
+
+        ``xt`` may hold ``leaky_relu(x)`` precomputed by the caller, so the
+        Generator can share it between the resblocks of one upsampling stage.
+        ``x`` itself is never modified.
+        """
+        for i, (c1, c2) in enumerate(zip(self.convs1, self.convs2)):
+            if i > 0 or xt is None:
+                xt = F.leaky_relu(x, LRELU_SLOPE)
+            xt = F.leaky_relu_(c1(xt), LRELU_SLOPE)
+            x = c2(xt).add_(x)
+        return x
+
     def remove_weight_norm(self):
         for l in self.convs1:
             remove_weight_norm(l)
@@ -364,6 +378,14 @@ class ResBlock2(torch.nn.Module):
             x = x * x_mask
         return x
 
+    def forward_inference(self, x, xt=None):
+        """No-grad variant of ``forward``; see ``ResBlock1.forward_inference``."""
+        for i, c in enumerate(self.convs):
+            if i > 0 or xt is None:
+                xt = F.leaky_relu(x, LRELU_SLOPE)
+            x = c(xt).add_(x)
+        return x
+
     def remove_weight_norm(self):
         for l in self.convs:
             remove_weight_norm(l)
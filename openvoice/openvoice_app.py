@@ -1,15 +1,32 @@
 import os
+import logging
 import torch
 import argparse
 import gradio as gr
 import langid
 from openvoice import se_extractor
-from openvoice.api import BaseSpeakerTTS, ToneColorConverter
+from openvoice.api import BaseSpeakerTTS, ToneColorConverter, tts_then_convert
+from openvoice.runtime import RuntimeConfig
+from openvoice.log import request_context, setup_logging
+from openvoice.text import warmup as warmup_text
+
+logger = logging.getLogger("openvoice.app")
 
 parser = argparse.ArgumentParser()
 parser.add_argument("--share", action='store_true', default=False, help="make link public")
+parser.add_argument("--num-threads", type=int, default=None, help="torch intra-op threads (default: OPENVOICE_NUM_THREADS or all cores)")
+parser.add_argument("--num-interop-threads", type=int, default=None, help="torch inter-op threads")
+parser.add_argument("--log-level", default=None, help="logging level (default: OPENVOICE_LOG_LEVEL or INFO)")
 args = parser.parse_args()
 
+setup_logging(args.log_level)
+
+runtime = RuntimeConfig.from_env()
+if args.num_threads is not None:
+    runtime.num_threads = args.num_threads
+if args.num_interop_threads is not None:
+    runtime.num_interop_threads = args.num_interop_threads
+
 en_ckpt_base = 'checkpoints/base_speakers/EN'
 zh_ckpt_base = 'checkpoints/base_speakers/ZH'
 ckpt_converter = 'checkpoints/converter'
@@ -18,11 +35,13 @@ output_dir = 'outputs'
 os.makedirs(output_dir, exist_ok=True)
 
 # load models
-en_base_speaker_tts = BaseSpeakerTTS(f'{en_ckpt_base}/config.json', device=device)
+en_base_speaker_tts = BaseSpeakerTTS(f'{en_ckpt_base}/config.json', device=device, runtime=runtime)
 en_base_speaker_tts.load_ckpt(f'{en_ckpt_base}/checkpoint.pth')
-zh_base_speaker_tts = BaseSpeakerTTS(f'{zh_ckpt_base}/config.json', device=device)
+zh_base_speaker_tts = BaseSpeakerTTS(f'{zh_ckpt_base}/config.json', device=device, runtime=runtime)
 zh_base_speaker_tts.load_ckpt(f'{zh_ckpt_base}/checkpoint.pth')
-tone_color_converter = ToneColorConverter(f'{ckpt_converter}/config.json', device=device)
+# load the jieba, pypinyin and eng_to_ipa dictionaries before the first request
+warmup_text(['EN', 'ZH'])
+tone_color_converter = ToneColorConverter(f'{ckpt_converter}/config.json', device=device, runtime=runtime)
 tone_color_converter.load_ckpt(f'{ckpt_converter}/checkpoint.pth')
 
 # load speaker embeddings
@@ -34,6 +53,11 @@ zh_source_se = torch.load(f'{zh_ckpt_base}/zh_default_se.pth').to(device)
 supported_languages = ['zh', 'en']
 
 def predict(prompt, style, audio_file_pth, agree):
+    # tag every log record of this request with the same id
+    with request_context():
+        return _predict(prompt, style, audio_file_pth, agree)
+
+def _predict(prompt, style, audio_file_pth, agree):
     # initialize a empty info
     text_hint = ''
     # agree with the terms
@@ -48,7 +72,7 @@ def predict(prompt, style, audio_file_pth, agree):
 
     # first detect the input language
     language_predicted = langid.classify(prompt)[0].strip()  
-    print(f"Detected language:{language_predicted}")
+    logger.info("Detected language: %s", language_predicted)
 
     if language_predicted not in supported_languages:
         text_hint += f"[ERROR] The detected language {language_predicted} for your input text is not in our Supported Languages: {supported_languages}\n"
@@ -125,17 +149,18 @@ def predict(prompt, style, audio_file_pth, agree):
             None,
         )
 
-    src_path = f'{output_dir}/tmp.wav'
-    tts_model.tts(prompt, src_path, speaker=style, language=language)
-
     save_path = f'{output_dir}/output.wav'
-    # Run the tone color converter
+    # Run the base speaker and the tone color converter in memory
     encode_message = "@MyShell"
-    tone_color_converter.convert(
-        audio_src_path=src_path, 
-        src_se=source_se, 
-        tgt_se=target_se, 
+    tts_then_convert(
+        tts_model,
+        tone_color_converter,
+        prompt,
+        src_se=source_se,
+        tgt_se=target_se,
         output_path=save_path,
+        speaker=style,
+        language=language,
         message=encode_message)
 
     text_hint += f'''Get response successfully \n'''
@@ -4,71 +4,90 @@ import torch
 import argparse
 import gradio as gr
 import langid
-import sys
 import socket
+import logging
 from openvoice import se_extractor
 from openvoice.api import BaseSpeakerTTS, ToneColorConverter
+from openvoice.runtime import RuntimeConfig, available_cores
+from openvoice.pool import ModelPool
+from openvoice.speaker_store import SpeakerStore
+from openvoice.log import request_context, setup_logging
+from openvoice.text import warmup as warmup_text
 
-# Configurar para que todo se muestre inmediatamente
-sys.stdout.reconfigure(line_buffering=True)
-sys.stderr.reconfigure(line_buffering=True)
+logger = logging.getLogger("openvoice.app")
 
 parser = argparse.ArgumentParser()
 parser.add_argument("--share", action='store_true', default=False, help="make link public")
 parser.add_argument("--port", type=int, default=7860, help="puerto para el servidor")
+parser.add_argument("--num-threads", type=int, default=None, help="hilos intra-op de torch (por defecto: OPENVOICE_NUM_THREADS o todos los núcleos)")
+parser.add_argument("--num-interop-threads", type=int, default=None, help="hilos inter-op de torch")
+parser.add_argument("--replicas", type=int, default=1, help="peticiones de conversión en paralelo (réplicas del convertidor, comparten los pesos)")
+parser.add_argument("--log-level", default=None, help="nivel de logging (por defecto: OPENVOICE_LOG_LEVEL o INFO)")
 args = parser.parse_args()
 
-print("="*60)
-print("🚀 INICIANDO OPENVOICE CON 3 MOTORES TTS")
-print("="*60)
+# cada registro va a stderr con la hora y el id de la petición
+setup_logging(args.log_level)
+
+runtime = RuntimeConfig.from_env()
+if args.num_threads is not None:
+    runtime.num_threads = args.num_threads
+if args.num_interop_threads is not None:
+    runtime.num_interop_threads = args.num_interop_threads
+
+logger.info("=" * 60)
+logger.info("🚀 INICIANDO OPENVOICE CON 3 MOTORES TTS")
+logger.info("=" * 60)
 
 device = 'cuda' if torch.cuda.is_available() else 'cpu'
-print(f"🔧 Dispositivo: {device}")
+logger.info("🔧 Dispositivo: %s", device)
+logger.info("🧵 Runtime: %s", runtime)
 output_dir = 'outputs'
 os.makedirs(output_dir, exist_ok=True)
-print(f"📁 Directorio de salida: {output_dir}")
+logger.info("📁 Directorio de salida: %s", output_dir)
 
 # ========== CARGAR MODELOS V1 ==========
-print("\n📦 CARGANDO MODELOS V1...")
+logger.info("📦 CARGANDO MODELOS V1...")
 v1_en_ckpt = 'checkpoints/base_speakers/EN'
 v1_zh_ckpt = 'checkpoints/base_speakers/ZH'
 v1_ckpt_converter = 'checkpoints/converter'
 
 # Modelos base V1
-print("  → Cargando modelo base EN...")
-v1_en_base_tts = BaseSpeakerTTS(f'{v1_en_ckpt}/config.json', device=device)
+logger.info("  → Cargando modelo base EN...")
+v1_en_base_tts = BaseSpeakerTTS(f'{v1_en_ckpt}/config.json', device=device, runtime=runtime)
 v1_en_base_tts.load_ckpt(f'{v1_en_ckpt}/checkpoint.pth')
-print("  → Cargando modelo base ZH...")
-v1_zh_base_tts = BaseSpeakerTTS(f'{v1_zh_ckpt}/config.json', device=device)
+logger.info("  → Cargando modelo base ZH...")
+v1_zh_base_tts = BaseSpeakerTTS(f'{v1_zh_ckpt}/config.json', device=device, runtime=runtime)
 v1_zh_base_tts.load_ckpt(f'{v1_zh_ckpt}/checkpoint.pth')
+# diccionarios de jieba, pypinyin y eng_to_ipa antes de la primera petición
+warmup_text(['EN', 'ZH'])
 
 # Convertidor V1
-print("  → Cargando convertidor V1...")
-v1_tone_converter = ToneColorConverter(f'{v1_ckpt_converter}/config.json', device=device)
+logger.info("  → Cargando convertidor V1...")
+v1_tone_converter = ToneColorConverter(f'{v1_ckpt_converter}/config.json', device=device, runtime=runtime)
 v1_tone_converter.load_ckpt(f'{v1_ckpt_converter}/checkpoint.pth')
 
 # Embeddings V1
-print("  → Cargando embeddings V1...")
+logger.info("  → Cargando embeddings V1...")
 v1_en_default_se = torch.load(f'{v1_en_ckpt}/en_default_se.pth').to(device)
 v1_en_style_se = torch.load(f'{v1_en_ckpt}/en_style_se.pth').to(device)
 v1_zh_source_se = torch.load(f'{v1_zh_ckpt}/zh_default_se.pth').to(device)
 
-print("✅ MODELOS V1 CARGADOS")
+logger.info("✅ MODELOS V1 CARGADOS")
 
 # ========== CARGAR MODELOS V2 ==========
-print("\n📦 CARGANDO MODELOS V2...")
+logger.info("📦 CARGANDO MODELOS V2...")
 v2_ckpt_converter = 'checkpoints_v2/converter'
 
 # Convertidor V2
-print("  → Cargando convertidor V2...")
-v2_tone_converter = ToneColorConverter(f'{v2_ckpt_converter}/config.json', device=device)
+logger.info("  → Cargando convertidor V2...")
+v2_tone_converter = ToneColorConverter(f'{v2_ckpt_converter}/config.json', device=device, runtime=runtime)
 v2_tone_converter.load_ckpt(f'{v2_ckpt_converter}/checkpoint.pth')
 
 # Cargar TODOS los embeddings de V2
 v2_ses_path = 'checkpoints_v2/base_speakers/ses'
 v2_ses_embeddings = {}
 if os.path.exists(v2_ses_path):
-    print(f"  → Buscando embeddings en {v2_ses_path}")
+    logger.info("  → Buscando embeddings en %s", v2_ses_path)
     for file in os.listdir(v2_ses_path):
         if file.endswith('.pth'):
             name = file[:-4]  # quitar .pth
@@ -77,28 +96,43 @@ if os.path.exists(v2_ses_path):
                     os.path.join(v2_ses_path, file), 
                     map_location=device
                 )
-                print(f"    ✓ {name}")
+                logger.info("    ✓ %s", name)
             except Exception as e:
-                print(f"    ✗ {file}: {e}")
+                logger.warning("    ✗ %s: %s", file, e)
 else:
-    print(f"  ⚠️ No existe el directorio {v2_ses_path}")
+    logger.warning("  ⚠️ No existe el directorio %s", v2_ses_path)
+
+logger.info("✅ MODELOS V2 CARGADOS (Embeddings: %s)", len(v2_ses_embeddings))
+
+# Réplicas de los convertidores: cada una usa su parte de los núcleos
+threads_per_replica = None
+if args.replicas > 1:
+    threads_per_replica = max(1, (runtime.num_threads or available_cores()) // args.replicas)
+converter_pools = {
+    converter: ModelPool(converter, replicas=args.replicas, threads_per_replica=threads_per_replica)
+    for converter in (v1_tone_converter, v2_tone_converter)
+}
+logger.info("  → Réplicas del convertidor: %s (hilos por réplica: %s)", args.replicas, threads_per_replica or 'por defecto')
 
-print(f"✅ MODELOS V2 CARGADOS (Embeddings: {len(v2_ses_embeddings)})")
+# Embeddings de las voces de referencia subidas por los usuarios: una sola matriz
+# en disco en lugar de un se.pth por voz
+speaker_store = SpeakerStore('processed/speaker_store')
+logger.info("  → Voces en el almacén: %s", len(speaker_store))
 
 # ========== CARGAR MODELO MELOTTS ==========
-print("\n📦 INTENTANDO CARGAR MELOTTS...")
+logger.info("📦 INTENTANDO CARGAR MELOTTS...")
 melo_models = {}
 melo_speakers_cache = {}
 
 try:
     from melo.api import TTS
-    print("  → Importando MeloTTS...")
+    logger.info("  → Importando MeloTTS...")
     
     supported_languages = ['EN', 'ES', 'FR', 'ZH', 'JP', 'KR']
     
     for lang in supported_languages:
         try:
-            print(f"  → Cargando modelo {lang}...")
+            logger.info("  → Cargando modelo %s...", lang)
             model = TTS(language=lang, device=device)
             melo_models[lang] = model
             
@@ -110,18 +144,18 @@ try:
                 'available_speakers': list(speaker_ids_dict.keys())
             }
             
-            print(f"    ✓ Modelo {lang} cargado ({len(speaker_ids_dict)} speakers)")
+            logger.info("    ✓ Modelo %s cargado (%s speakers)", lang, len(speaker_ids_dict))
                 
         except Exception as e:
-            print(f"    ✗ Error cargando modelo {lang}: {e}")
+            logger.warning("    ✗ Error cargando modelo %s: %s", lang, e)
     
-    print("✅ MeloTTS cargado exitosamente")
+    logger.info("✅ MeloTTS cargado exitosamente")
     
 except ImportError as e:
-    print(f"  ⚠️ No se pudo importar MeloTTS: {e}")
-    print("  ℹ️ Instala MeloTTS con: pip install git+https://github.com/myshell-ai/MeloTTS.git")
+    logger.warning("  ⚠️ No se pudo importar MeloTTS: %s", e)
+    logger.info("  ℹ️ Instala MeloTTS con: pip install git+https://github.com/myshell-ai/MeloTTS.git")
 except Exception as e:
-    print(f"  ⚠️ Error cargando MeloTTS: {e}")
+    logger.warning("  ⚠️ Error cargando MeloTTS: %s", e)
 
 # Idiomas soportados
 v1_supported_languages = ['zh', 'en']
@@ -163,13 +197,13 @@ v2_style_to_melo_config = {
 }
 
 def predict(version, prompt, style, audio_file_pth, agree, speed=1.0):
-    print(f"\n🎯 PREDICCIÓN INICIADA:")
-    print(f"   Versión: {version}")
-    print(f"   Estilo: {style}")
-    print(f"   Texto: {prompt[:50]}...")
-    print(f"   Audio: {audio_file_pth}")
-    print(f"   Aceptado: {agree}")
-    print(f"   Velocidad: {speed}")
+    # todos los registros de la petición llevan el mismo id
+    with request_context():
+        return _predict(version, prompt, style, audio_file_pth, agree, speed)
+
+def _predict(version, prompt, style, audio_file_pth, agree, speed=1.0):
+    logger.info("🎯 PREDICCIÓN INICIADA: versión=%s estilo=%s texto=%r audio=%s aceptado=%s velocidad=%s",
+                version, style, prompt[:50], audio_file_pth, agree, speed)
     
     text_hint = ''
     
@@ -187,11 +221,11 @@ def predict(version, prompt, style, audio_file_pth, agree, speed=1.0):
 
     # Detectar idioma (solo para información)
     language_predicted = langid.classify(prompt)[0].strip()
-    print(f"🔤 Idioma detectado: {language_predicted}")
+    logger.info("🔤 Idioma detectado: %s", language_predicted)
     
     # ========== VERSIÓN 1 ==========
     if version == "V1":
-        print("📝 Usando V1 (OpenVoice original)")
+        logger.info("📝 Usando V1 (OpenVoice original)")
         if language_predicted not in v1_supported_languages:
             text_hint += f"[ERROR] Idioma {language_predicted} no soportado en V1. Soporta: {v1_supported_languages}\n"
             gr.Warning(f"Idioma {language_predicted} no soportado en V1")
@@ -222,7 +256,7 @@ def predict(version, prompt, style, audio_file_pth, agree, speed=1.0):
     
     # ========== VERSIÓN 2 (LEGACY - TTS integrado de V1) ==========
     elif version == "V2 (Legacy TTS)":
-        print("📝 Usando V2 con TTS integrado de OpenVoice V1 (Legacy)")
+        logger.info("📝 Usando V2 con TTS integrado de OpenVoice V1 (Legacy)")
         tts_model = v1_en_base_tts
         language = 'English'
         
@@ -239,7 +273,7 @@ def predict(version, prompt, style, audio_file_pth, agree, speed=1.0):
     
     # ========== VERSIÓN 2 (MELOTTS - RECOMENDADO) ==========
     else:
-        print("📝 Usando V2 con MeloTTS (Recomendado)")
+        logger.info("📝 Usando V2 con MeloTTS (Recomendado)")
         
         if not melo_models:
             text_hint += "[ERROR] MeloTTS no está disponible\n"
@@ -267,7 +301,7 @@ def predict(version, prompt, style, audio_file_pth, agree, speed=1.0):
                 'language': melo_lang,
                 'speaker_name': melo_speaker
             }
-            print(f"⚠️  Mapeo automático creado: {style} -> {melo_lang}/{melo_speaker}")
+            logger.warning("⚠️  Mapeo automático creado: %s -> %s/%s", style, melo_lang, melo_speaker)
         
         melo_config = v2_style_to_melo_config[style]
         style_language = v2_style_to_language.get(style, style)
@@ -308,7 +342,7 @@ def predict(version, prompt, style, audio_file_pth, agree, speed=1.0):
             gr.Warning(f"Speaker '{melo_config['speaker_name']}' no encontrado")
             return text_hint, None, None
         
-        print(f"  → Speaker encontrado: {target_speaker_name} (ID: {target_speaker_id})")
+        logger.info("  → Speaker encontrado: %s (ID: %s)", target_speaker_name, target_speaker_id)
         
         source_se = v2_ses_embeddings[style]
         converter = v2_tone_converter
@@ -325,75 +359,89 @@ def predict(version, prompt, style, audio_file_pth, agree, speed=1.0):
         return text_hint, None, None
 
     # Procesar audio de referencia
-    print("🎤 Extrayendo características de voz...")
+    logger.info("🎤 Extrayendo características de voz...")
     try:
         target_se, audio_name = se_extractor.get_se(
             audio_file_pth, 
             converter, 
             target_dir='processed', 
-            vad=True
+            vad=True,
+            store=speaker_store
         )
-        print("✅ Características extraídas")
+        logger.info("✅ Características extraídas")
     except Exception as e:
         text_hint += f"[ERROR] Error extrayendo características de voz: {str(e)}\n"
         gr.Warning("Error extrayendo características de voz")
-        print(f"❌ Error: {e}")
+        logger.error("❌ Error: %s", e)
         return text_hint, None, None
 
-    # Generar audio base
-    src_path = f'{output_dir}/tmp.wav'
-    print(f"🔊 Generando audio base en: {src_path}")
+    # Generar audio base (en memoria, sin archivo temporal)
+    logger.info("🔊 Generando audio base...")
     
     if version == "V1":
-        tts_model.tts(prompt, src_path, speaker=style, language=language)
-        print("✅ Audio base generado con TTS V1")
+        src_audio = tts_model.tts(prompt, None, speaker=style, language=language)
+        src_sr = tts_model.sampling_rate
+        logger.info("✅ Audio base generado con TTS V1")
     
     elif version == "V2 (Legacy TTS)":
-        tts_model.tts(prompt, src_path, speaker='default', language='English')
-        print("✅ Audio base generado con TTS Legacy (V1)")
+        src_audio = tts_model.tts(prompt, None, speaker='default', language='English')
+        src_sr = tts_model.sampling_rate
+        logger.info("✅ Audio base generado con TTS Legacy (V1)")
     
     else:
         try:
-            print(f"  → Generando con MeloTTS: {melo_config['language']}, speaker: {target_speaker_name} (ID: {target_speaker_id}), velocidad: {speed}")
+            logger.info("  → Generando con MeloTTS: %s, speaker: %s (ID: %s), velocidad: %s", melo_config['language'], target_speaker_name, target_speaker_id, speed)
             
             # ¡ESTA ES LA LLAVE! Según la API que compartiste
-            melo_model.tts_to_file(
+            src_sr = melo_model.hps.data.sampling_rate
+            src_audio = melo_model.tts_to_file(
                 text=prompt,
                 speaker_id=target_speaker_id,
-                output_path=src_path,
+                output_path=None,
                 speed=float(speed),  # Convertir a float y usar el valor del slider
                 quiet=True
             )
-            print("✅ Audio base generado con MeloTTS")
+            logger.info("✅ Audio base generado con MeloTTS")
             
         except Exception as e:
             text_hint += f"[ERROR] Error generando audio con MeloTTS: {str(e)}\n"
             gr.Warning("Error generando audio con MeloTTS")
-            print(f"❌ Error MeloTTS: {e}")
+            logger.error("❌ Error MeloTTS: %s", e)
             
             try:
-                print("  → Intentando método posicional...")
-                melo_model.tts_to_file(prompt, target_speaker_id, src_path, speed=float(speed), quiet=True)
-                print("✅ Audio base generado con MeloTTS (método posicional)")
+                logger.info("  → Intentando método posicional...")
+                src_audio = melo_model.tts_to_file(prompt, target_speaker_id, None, speed=float(speed), quiet=True)
+                logger.info("✅ Audio base generado con MeloTTS (método posicional)")
             except Exception as e2:
                 text_hint += f"[ERROR] Método alternativo también falló: {str(e2)}\n"
-                print(f"❌ Error alternativo: {e2}")
+                logger.error("❌ Error alternativo: %s", e2)
                 return text_hint, None, None
 
     # Convertir voz
-    save_path = f'{output_dir}/output.wav'
+    # con varias réplicas hay peticiones simultáneas: el audio se devuelve en
+    # memoria en lugar de escribir un archivo por petición que nadie borra
+    save_path = None if args.replicas > 1 else f'{output_dir}/output.wav'
     encode_message = "@MyShell"
     
-    print("🔄 Convirtiendo voz...")
-    converter.convert(
-        audio_src_path=src_path,
+    logger.info("🔄 Convirtiendo voz...")
+    pool = converter_pools[converter]
+    logger.info("  → Carga de las réplicas: %s", pool.queue_depths())
+    audio = pool.run(
+        "convert",
+        src_audio,
         src_se=source_se,
         tgt_se=target_se,
         output_path=save_path,
-        message=encode_message
+        message=encode_message,
+        sample_rate=src_sr
     )
     
-    print(f"✅ Audio final guardado en: {save_path}")
+    if save_path is None:
+        output = (converter.hps.data.sampling_rate, audio)
+        logger.info("✅ Audio final generado en memoria")
+    else:
+        output = save_path
+        logger.info("✅ Audio final guardado en: %s", save_path)
     text_hint += f"✅ Audio generado exitosamente usando {version}\n"
     if version != "V1":
         text_hint += f"   Estilo: {style} ({v2_style_to_language.get(style, 'varios acentos')})\n"
@@ -403,11 +451,11 @@ def predict(version, prompt, style, audio_file_pth, agree, speed=1.0):
         elif "Legacy" in version:
             text_hint += "   Motor TTS: OpenVoice V1 (legacy)\n"
     
-    return text_hint, save_path, audio_file_pth
+    return text_hint, output, audio_file_pth
 
-print("\n" + "="*60)
-print("🎨 CREANDO INTERFAZ GRADIO...")
-print("="*60)
+logger.info("=" * 60)
+logger.info("🎨 CREANDO INTERFAZ GRADIO...")
+logger.info("=" * 60)
 
 with gr.Blocks(title="OpenVoice - 3 Motores TTS", theme=gr.themes.Soft()) as demo:
     gr.Markdown("""
@@ -529,11 +577,14 @@ with gr.Blocks(title="OpenVoice - 3 Motores TTS", theme=gr.themes.Soft()) as dem
         outputs=[output_text, output_audio, reference_used]
     )
 
-print("\n" + "="*60)
-print("🚀 LANZANDO APLICACIÓN GRADIO...")
-print("="*60)
-print("📢 SI TODO VA BIEN, VERÁS UN ENLACE ABAJO:")
-print("="*60)
+if args.replicas > 1:
+    demo.queue(default_concurrency_limit=args.replicas)
+
+logger.info("=" * 60)
+logger.info("🚀 LANZANDO APLICACIÓN GRADIO...")
+logger.info("=" * 60)
+logger.info("📢 SI TODO VA BIEN, VERÁS UN ENLACE ABAJO:")
+logger.info("=" * 60)
 
 def find_free_port(start_port=7860, max_attempts=10):
     for port in range(start_port, start_port + max_attempts):
@@ -551,7 +602,7 @@ max_attempts = 5
 
 while attempts < max_attempts:
     try:
-        print(f"🔧 Intentando con puerto: {target_port}")
+        logger.info("🔧 Intentando con puerto: %s", target_port)
         
         demo.launch(
             debug=True,
@@ -566,20 +617,20 @@ while attempts < max_attempts:
         
     except OSError as e:
         if "Address already in use" in str(e) or "address already in use" in str(e).lower():
-            print(f"⚠️  Puerto {target_port} ocupado, buscando puerto libre...")
+            logger.warning("⚠️  Puerto %s ocupado, buscando puerto libre...", target_port)
             target_port = find_free_port(target_port + 1)
             attempts += 1
         else:
-            print(f"❌ Error inesperado: {e}")
+            logger.error("❌ Error inesperado: %s", e)
             raise
     except Exception as e:
-        print(f"❌ Error al lanzar la aplicación: {e}")
+        logger.error("❌ Error al lanzar la aplicación: %s", e)
         break
 
 if attempts >= max_attempts:
-    print("❌ No se pudo encontrar un puerto libre después de varios intentos")
-    print("💡 Intenta detener otras instancias de Gradio o especifica un puerto diferente con --port")
+    logger.error("❌ No se pudo encontrar un puerto libre después de varios intentos")
+    logger.info("💡 Intenta detener otras instancias de Gradio o especifica un puerto diferente con --port")
 
-print("\n" + "="*60)
-print("📝 APLICACIÓN FINALIZADA")
-print("="*60)
+logger.info("=" * 60)
+logger.info("📝 APLICACIÓN FINALIZADA")
+logger.info("=" * 60)
@@ -0,0 +1,142 @@
+"""Several inference lanes over one model, for machines with many cores.
+
+``ModelPool`` runs ``replicas`` worker threads. By default they all call the
+same model object, so the weights are in memory once. ``models.py`` falls
+back to the hook-based ``torch.nn.utils.weight_norm`` (current torch has no
+``parametrizations.remove_weight_norm``), whose pre-forward hook recomputes
+``weight`` from ``weight_g``/``weight_v`` and assigns it to the module on
+every call. Concurrent replicas therefore overwrite each other's ``weight``,
+but always with the same values, since nothing changes ``weight_g`` or
+``weight_v`` during inference. Pass a ``factory`` instead to give every
+replica its own copy (for example one per GPU).
+
+``threads_per_replica`` is applied through ``RuntimeConfig`` and sets
+torch's intra-op thread count for the whole process, not per replica: every
+other model in the process uses it too.
+
+Each replica has its own queue. A request goes to the replica with the
+fewest queued plus running jobs, and a replica that runs dry takes the
+oldest waiting job from the most loaded queue, so one long request does not
+hold up the ones queued behind it.
+
+    pool = ModelPool(converter, replicas=8, threads_per_replica=8)
+    future = pool.submit("convert", audio, src_se, tgt_se, sample_rate=22050)
+    audio = future.result()
+"""
+import contextvars
+import threading
+from collections import deque
+from concurrent.futures import Future
+
+from openvoice.runtime import RuntimeConfig
+
+
+class ModelPool(object):
+    def __init__(self, model=None, replicas=2, threads_per_replica=None, factory=None):
+        if (model is None) == (factory is None):
+            raise ValueError("pass either a model to share or a factory to build one model per replica")
+        self.models = [factory(i) for i in range(replicas)] if factory else [model] * replicas
+        self.threads_per_replica = threads_per_replica
+        if threads_per_replica:
+            # process-wide: torch keeps one intra-op thread count, and each
+            # replica thread running an op uses up to that many threads, so
+            # plan for replicas x threads_per_replica cores
+            RuntimeConfig(num_threads=threads_per_replica).apply()
+
+        self._cond = threading.Condition()
+        self._queues = [deque() for _ in range(replicas)]
+        self._running = [0] * replicas
+        self._completed = [0] * replicas
+        self._stolen = [0] * replicas
+        self._closed = False
+        self._threads = []
+        for i in range(replicas):
+            thread = threading.Thread(target=self._worker, args=(i,), name=f"openvoice-replica-{i}", daemon=True)
+            thread.start()
+            self._threads.append(thread)
+
+    @property
+    def replicas(self):
+        return len(self.models)
+
+    def submit(self, method, *args, **kwargs):
+        """Call ``model.<method>(*args, **kwargs)`` on the least loaded replica; returns a Future.
+
+        The call runs in a copy of the caller's context, so request ids and
+        profiles set with contextvars carry over to the replica thread.
+        """
+        future = Future()
+        context = contextvars.copy_context()
+        with self._cond:
+            if self._closed:
+                raise RuntimeError("pool is shut down")
+            depths = self._depths()
+            target = depths.index(min(depths))
+            self._queues[target].append((future, context, method, args, kwargs))
+            self._cond.notify_all()
+        return future
+
+    def run(self, method, *args, **kwargs):
+        return self.submit(method, *args, **kwargs).result()
+
+    def _depths(self):
+        return [len(q) + r for q, r in zip(self._queues, self._running)]
+
+    def queue_depths(self):
+        """Queued plus running jobs of each replica."""
+        with self._cond:
+            return self._depths()
+
+    def stats(self):
+        with self._cond:
+            return [{"replica": i, "queued": len(self._queues[i]), "running": self._running[i],
+                     "completed": self._completed[i], "stolen": self._stolen[i]}
+                    for i in range(self.replicas)]
+
+    def _next_job(self, index):
+        # called with self._cond held
+        if self._queues[index]:
+            return self._queues[index].popleft()
+        victim = max(range(self.replicas), key=lambda i: len(self._queues[i]))
+        if self._queues[victim]:
+            self._stolen[index] += 1
+            return self._queues[victim].popleft()
+        return None
+
+    def _worker(self, index):
+        model = self.models[index]
+        while True:
+            with self._cond:
+                job = self._next_job(index)
+                while job is None and not self._closed:
+                    self._cond.wait()
+                    job = self._next_job(index)
+                if job is None:
+                    return
+                self._running[index] += 1
+
+            future, context, method, args, kwargs = job
+            if future.set_running_or_notify_cancel():
+                try:
+                    future.set_result(context.run(getattr(model, method), *args, **kwargs))
+                except BaseException as e:
+                    future.set_exception(e)
+
+            with self._cond:
+                self._running[index] -= 1
+                self._completed[index] += 1
+
+    def shutdown(self, wait=True):
+        """Stop accepting work; queued jobs still run before the workers exit."""
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+        if wait:
+            for thread in self._threads:
+                thread.join()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.shutdown()
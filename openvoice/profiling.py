@@ -0,0 +1,206 @@
+"""Per-stage wall time and tensor shapes of the inference pipeline.
+
+``tts``, ``convert``, ``extract_se``, ``SynthesizerTrn.infer`` and
+``SynthesizerTrn.voice_conversion`` mark their stages with ``stage``. Nothing
+is measured unless someone listens, either a ``Profile`` on the current
+thread or task:
+
+    with profiling.Profile() as prof:
+        tts_model.tts(text, None, speaker='default')
+    print(prof.table())
+
+or a process-wide callback, which sees the stages of every thread:
+
+    exporter = profiling.PrometheusExporter()
+    profiling.add_callback(exporter)
+    exporter.serve(9100)
+
+Stage names are nested with dots, e.g. ``tts.infer.flow``. With
+``Profile(record_function=True)`` each stage is also a
+``torch.profiler.record_function`` range, so it shows up in traces taken
+with ``torch.profiler.profile``.
+"""
+import contextvars
+import threading
+import time
+from collections import namedtuple
+
+import torch
+
+StageRecord = namedtuple("StageRecord", ["name", "seconds", "shapes", "start"])
+
+_profiles = contextvars.ContextVar("openvoice_profiles", default=())
+_path = contextvars.ContextVar("openvoice_stage_path", default="")
+_callbacks = []
+
+
+def add_callback(fn):
+    """Call ``fn(record)`` with the ``StageRecord`` of every stage, from any thread."""
+    _callbacks.append(fn)
+
+
+def remove_callback(fn):
+    _callbacks.remove(fn)
+
+
+def _shapes(tensors):
+    return {k: tuple(v.shape) for k, v in tensors.items() if hasattr(v, "shape")}
+
+
+class _NullStage(object):
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def shapes(self, **tensors):
+        pass
+
+
+_NULL_STAGE = _NullStage()
+
+
+class _Stage(object):
+    def __init__(self, name, profiles, tensors):
+        self.name = name
+        self.profiles = profiles
+        self._shapes = _shapes(tensors)
+        self._function = None
+
+    def shapes(self, **tensors):
+        """Record more shapes, typically the outputs of the stage."""
+        self._shapes.update(_shapes(tensors))
+
+    def __enter__(self):
+        parent = _path.get()
+        self.path = f"{parent}.{self.name}" if parent else self.name
+        self._token = _path.set(self.path)
+        if any(p.record_function for p in self.profiles):
+            self._function = torch.profiler.record_function(self.path)
+            self._function.__enter__()
+        self._start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        if torch.cuda.is_available() and torch.cuda.is_initialized():
+            # kernels are asynchronous; wait for them so the time lands on this stage
+            torch.cuda.synchronize()
+        seconds = time.perf_counter() - self._start
+        if self._function is not None:
+            self._function.__exit__(*exc)
+        _path.reset(self._token)
+
+        record = StageRecord(self.path, seconds, self._shapes, self._start)
+        for profile in self.profiles:
+            profile.records.append(record)
+        for fn in list(_callbacks):
+            fn(record)
+        return False
+
+
+def stage(name, **tensors):
+    """Context manager timing one stage; keyword tensors have their shapes recorded."""
+    profiles = _profiles.get()
+    if not profiles and not _callbacks:
+        return _NULL_STAGE
+    return _Stage(name, profiles, tensors)
+
+
+def enabled():
+    return bool(_profiles.get() or _callbacks)
+
+
+class Profile(object):
+    """Collects the stages run by the current thread or asyncio task while active."""
+
+    def __init__(self, record_function=False):
+        self.record_function = record_function
+        self.records = []
+
+    def __enter__(self):
+        self._token = _profiles.set(_profiles.get() + (self,))
+        return self
+
+    def __exit__(self, *exc):
+        _profiles.reset(self._token)
+        return False
+
+    def summary(self):
+        """``{stage: {"count", "total", "mean"}}`` in order of first appearance."""
+        stats = {}
+        for r in self.records:
+            s = stats.setdefault(r.name, {"count": 0, "total": 0.0})
+            s["count"] += 1
+            s["total"] += r.seconds
+        for s in stats.values():
+            s["mean"] = s["total"] / s["count"]
+        return stats
+
+    def table(self):
+        lines = [f"{'stage':<40}{'count':>7}{'total ms':>12}{'mean ms':>12}"]
+        for name, s in sorted(self.summary().items()):
+            lines.append(f"{name:<40}{s['count']:>7}{s['total'] * 1000:>12.2f}{s['mean'] * 1000:>12.2f}")
+        return "\n".join(lines)
+
+
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+
+class PrometheusExporter(object):
+    """Stage times as a Prometheus histogram, in the text exposition format.
+
+    Register it with ``add_callback``; ``render`` returns the metrics page
+    and ``serve`` exposes it over HTTP from a daemon thread.
+    """
+
+    def __init__(self, name="openvoice_stage_seconds", buckets=DEFAULT_BUCKETS):
+        self.name = name
+        self.buckets = tuple(sorted(buckets))
+        self._lock = threading.Lock()
+        self._stages = {}  # stage -> [bucket counts..., count, sum]
+
+    def __call__(self, record):
+        with self._lock:
+            h = self._stages.get(record.name)
+            if h is None:
+                h = self._stages[record.name] = [0] * (len(self.buckets) + 1) + [0.0]
+            for i, bound in enumerate(self.buckets):
+                if record.seconds <= bound:
+                    h[i] += 1
+            h[-2] += 1
+            h[-1] += record.seconds
+
+    def render(self):
+        lines = [f"# HELP {self.name} Wall time of OpenVoice inference stages.",
+                 f"# TYPE {self.name} histogram"]
+        with self._lock:
+            for stage_name, h in sorted(self._stages.items()):
+                for bound, n in zip(self.buckets, h):
+                    lines.append(f'{self.name}_bucket{{stage="{stage_name}",le="{bound}"}} {n}')
+                lines.append(f'{self.name}_bucket{{stage="{stage_name}",le="+Inf"}} {h[-2]}')
+                lines.append(f'{self.name}_count{{stage="{stage_name}"}} {h[-2]}')
+                lines.append(f'{self.name}_sum{{stage="{stage_name}"}} {h[-1]}')
+        return "\n".join(lines) + "\n"
+
+    def serve(self, port, addr=""):
+        """Serve ``render()`` at ``http://addr:port/metrics``; returns the server."""
+        from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+        exporter = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                body = exporter.render().encode("utf-8")
+                self.send_response(200)
+                self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        server = ThreadingHTTPServer((addr, port), Handler)
+        threading.Thread(target=server.serve_forever, name="openvoice-metrics", daemon=True).start()
+        return server
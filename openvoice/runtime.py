@@ -0,0 +1,123 @@
+import os
+import warnings
+
+import torch
+
+ENV_PREFIX = "OPENVOICE_"
+
+# set_num_interop_threads may only be called once per process, before any
+# inter-op parallel work has started.
+_interop_threads_applied = None
+
+
+def _env_int(environ, name):
+    value = environ.get(ENV_PREFIX + name)
+    if value is None or value.strip() == "":
+        return None
+    return int(value)
+
+
+def _env_bool(environ, name):
+    value = environ.get(ENV_PREFIX + name)
+    if value is None or value.strip() == "":
+        return None
+    return value.strip().lower() in ("1", "true", "yes", "on")
+
+
+class RuntimeConfig(object):
+    """Process-wide torch CPU settings, applied when a model is constructed.
+
+    Every field defaults to ``None``, which leaves the corresponding torch
+    setting untouched. ``from_env`` reads the same fields from
+    ``OPENVOICE_NUM_THREADS``, ``OPENVOICE_NUM_INTEROP_THREADS``,
+    ``OPENVOICE_MKLDNN``, ``OPENVOICE_FLUSH_DENORMAL`` and, to split the
+    machine between several worker processes, ``OPENVOICE_WORKERS`` /
+    ``OPENVOICE_WORKER_INDEX`` (plus ``OPENVOICE_PIN`` to pin each worker
+    to its cores).
+    """
+
+    def __init__(self,
+                num_threads=None,
+                num_interop_threads=None,
+                mkldnn=None,
+                flush_denormal=None,
+                cpu_affinity=None):
+        self.num_threads = num_threads
+        self.num_interop_threads = num_interop_threads
+        self.mkldnn = mkldnn
+        self.flush_denormal = flush_denormal
+        self.cpu_affinity = cpu_affinity
+
+    @classmethod
+    def from_env(cls, environ=None):
+        environ = os.environ if environ is None else environ
+        workers = _env_int(environ, "WORKERS")
+        if workers:
+            config = cls.for_worker(workers, _env_int(environ, "WORKER_INDEX") or 0,
+                                    pin=bool(_env_bool(environ, "PIN")))
+        else:
+            config = cls()
+
+        num_threads = _env_int(environ, "NUM_THREADS")
+        if num_threads is not None:
+            config.num_threads = num_threads
+        num_interop_threads = _env_int(environ, "NUM_INTEROP_THREADS")
+        if num_interop_threads is not None:
+            config.num_interop_threads = num_interop_threads
+        config.mkldnn = _env_bool(environ, "MKLDNN")
+        config.flush_denormal = _env_bool(environ, "FLUSH_DENORMAL")
+        return config
+
+    @classmethod
+    def for_worker(cls, n_workers, worker_index=0, total_cores=None, pin=False):
+        """Give worker ``worker_index`` of ``n_workers`` an equal share of the cores.
+
+        With ``pin=True`` the worker is also restricted to its own contiguous
+        block of cores (Linux only), so replicas do not migrate onto each other.
+        """
+        total_cores = total_cores or available_cores()
+        per_worker = max(1, total_cores // n_workers)
+        affinity = None
+        if pin and hasattr(os, "sched_setaffinity"):
+            cores = sorted(os.sched_getaffinity(0))
+            start = (worker_index * per_worker) % len(cores)
+            affinity = cores[start:start + per_worker]
+        return cls(num_threads=per_worker, num_interop_threads=1, cpu_affinity=affinity)
+
+    def apply(self):
+        global _interop_threads_applied
+
+        if self.cpu_affinity:
+            os.sched_setaffinity(0, self.cpu_affinity)
+        if self.num_threads is not None:
+            torch.set_num_threads(self.num_threads)
+        if self.num_interop_threads is not None and self.num_interop_threads != _interop_threads_applied:
+            try:
+                torch.set_num_interop_threads(self.num_interop_threads)
+                _interop_threads_applied = self.num_interop_threads
+            except RuntimeError as e:
+                warnings.warn(f"Could not set inter-op threads to {self.num_interop_threads}: {e}")
+        if self.mkldnn is not None:
+            torch.backends.mkldnn.enabled = self.mkldnn
+        if self.flush_denormal is not None:
+            torch.set_flush_denormal(self.flush_denormal)
+        return self
+
+    def __repr__(self):
+        return f"{self.__class__.__name__}({self.__dict__!r})"
+
+
+def available_cores():
+    if hasattr(os, "sched_getaffinity"):
+        return len(os.sched_getaffinity(0))
+    return os.cpu_count() or 1
+
+
+def current_settings():
+    """What torch is actually running with, for logging and benchmarks."""
+    return {
+        "num_threads": torch.get_num_threads(),
+        "num_interop_threads": torch.get_num_interop_threads(),
+        "mkldnn": torch.backends.mkldnn.enabled,
+        "available_cores": available_cores(),
+    }
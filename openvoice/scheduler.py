@@ -0,0 +1,185 @@
+"""Length-bucketed batching of sentences for ``BaseSpeakerTTS``.
+
+``SynthesizerTrn.infer`` takes a zero-padded batch, so a batch costs about
+``batch size x longest sentence`` tokens. ``plan_batches`` sorts sentences by
+length and cuts the sorted list whenever the next sentence would push that
+padded size over ``max_tokens``, so short and long sentences do not share a
+batch. ``infer_many`` runs the plan for one set of sentences and puts the
+audio back in the original order.
+
+``BatchScheduler`` does the same across requests: sentences submitted from
+several threads within ``max_wait`` seconds of each other are planned
+together. Sentences are only batched with others that use the same
+``speed``, ``noise_scale``, ``noise_scale_w`` and ``sdp_ratio``, which are
+scalars of the model call; speakers can be mixed.
+
+    scheduler = BatchScheduler(tts_model, max_tokens=1024)
+    audio = scheduler.tts(text, speaker='default', language='English')  # from any number of threads
+
+Batched audio matches sentence-by-sentence synthesis except for the last
+few milliseconds of the shorter sentences, where the decoder's receptive
+field reaches into the padding, and for the random noise, which is drawn
+for the whole batch.
+"""
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future
+
+import soundfile
+
+# padded tokens per batch; benchmarks/bench_batching.py on CPU gives
+# 1.0-1.2x over one call per sentence at 1024 and 0.5x at 4096, where the
+# padding of the longer batches outweighs the fewer calls
+DEFAULT_MAX_TOKENS = 1024
+
+
+def plan_batches(lengths, max_tokens=DEFAULT_MAX_TOKENS, max_batch_size=None):
+    """Indices of ``lengths`` grouped into batches, shortest first.
+
+    The padded size of a batch, ``len(batch) * max(length)``, stays within
+    ``max_tokens``; a sentence longer than that gets a batch of its own.
+    """
+    order = sorted(range(len(lengths)), key=lengths.__getitem__)
+    batches = []
+    batch = []
+    for i in order:
+        # ascending order: lengths[i] is the longest of the batch if added
+        if batch and ((len(batch) + 1) * lengths[i] > max_tokens or len(batch) == max_batch_size):
+            batches.append(batch)
+            batch = []
+        batch.append(i)
+    if batch:
+        batches.append(batch)
+    return batches
+
+
+def infer_many(model, tokens, speakers, max_tokens=DEFAULT_MAX_TOKENS, max_batch_size=None, **params):
+    """``model.infer_tokens`` for every sentence in ``tokens``, run in length-bucketed batches.
+
+    ``params`` are the ``speed``/``noise_scale``/``noise_scale_w``/``sdp_ratio``
+    of ``infer_tokens``. Returns the audio in the order of ``tokens``.
+    """
+    if isinstance(speakers, str):
+        speakers = [speakers] * len(tokens)
+    audio = [None] * len(tokens)
+    for batch in plan_batches([t.size(0) for t in tokens], max_tokens, max_batch_size):
+        outputs = model.infer_batch([tokens[i] for i in batch], [speakers[i] for i in batch], **params)
+        for i, output in zip(batch, outputs):
+            audio[i] = output
+    return audio
+
+
+class BatchScheduler(object):
+    def __init__(self, model, max_tokens=DEFAULT_MAX_TOKENS, max_batch_size=None, max_wait=0.01):
+        self.model = model
+        self.max_tokens = max_tokens
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait
+
+        self._cond = threading.Condition()
+        # (params key, tokens, speaker, future)
+        self._queue = deque()
+        self._queued_tokens = 0
+        self._closed = False
+        self._batches = 0
+        self._sentences = 0
+        self._tokens = 0
+        self._padded_tokens = 0
+        self._thread = threading.Thread(target=self._worker, name="openvoice-batch-scheduler", daemon=True)
+        self._thread.start()
+
+    def submit(self, tokens, speaker, speed=1.0, noise_scale=0.667, noise_scale_w=0.6, sdp_ratio=0.2):
+        """Queue one sentence from ``BaseSpeakerTTS.get_text``; returns a Future of its audio."""
+        future = Future()
+        key = (speed, noise_scale, noise_scale_w, sdp_ratio)
+        with self._cond:
+            if self._closed:
+                raise RuntimeError("scheduler is shut down")
+            self._queue.append((key, tokens, speaker, future))
+            self._queued_tokens += tokens.size(0)
+            self._cond.notify_all()
+        return future
+
+    def tts(self, text, output_path=None, speaker='default', language='English', speed=1.0,
+            noise_scale=0.667, noise_scale_w=0.6, sdp_ratio=0.2, duration_mode='mixed'):
+        """``BaseSpeakerTTS.tts`` with the sentences batched alongside those of concurrent calls."""
+        model = self.model
+        sdp_ratio = model.resolve_sdp_ratio(duration_mode, sdp_ratio)
+        # all sentences at once, so they are planned together
+        sentences = model.prepare_sentences(text, language)
+        tokens = [stn_tst for _, stn_tst in model.frontend.stream(sentences)]
+        futures = [self.submit(stn_tst, speaker, speed=speed, noise_scale=noise_scale,
+                               noise_scale_w=noise_scale_w, sdp_ratio=sdp_ratio)
+                   for stn_tst in tokens]
+        audio = model.audio_numpy_concat([future.result() for future in futures], sr=model.sampling_rate,
+                                         speed=speed, pause=[model.sentence_pause(s) for s in sentences])
+        if output_path is None:
+            return audio
+        soundfile.write(output_path, audio, model.sampling_rate)
+
+    def stats(self):
+        """Batches run so far and the share of their tokens that was padding."""
+        with self._cond:
+            return {"batches": self._batches, "sentences": self._sentences, "queued": len(self._queue),
+                    "padding": 1 - self._tokens / self._padded_tokens if self._padded_tokens else 0.0}
+
+    def _take(self):
+        # called with self._cond held; waits for work, then up to max_wait for more
+        while not self._queue and not self._closed:
+            self._cond.wait()
+        deadline = time.monotonic() + self.max_wait
+        while not self._closed and self._queued_tokens < self.max_tokens:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            self._cond.wait(remaining)
+        jobs = list(self._queue)
+        self._queue.clear()
+        self._queued_tokens = 0
+        return jobs
+
+    def _worker(self):
+        while True:
+            with self._cond:
+                jobs = self._take()
+                if not jobs and self._closed:
+                    return
+            jobs = [job for job in jobs if job[3].set_running_or_notify_cancel()]
+
+            groups = {}
+            for job in jobs:
+                groups.setdefault(job[0], []).append(job)
+            for key, group in groups.items():
+                speed, noise_scale, noise_scale_w, sdp_ratio = key
+                lengths = [tokens.size(0) for _, tokens, _, _ in group]
+                for batch in plan_batches(lengths, self.max_tokens, self.max_batch_size):
+                    try:
+                        outputs = self.model.infer_batch([group[i][1] for i in batch], [group[i][2] for i in batch],
+                                                         speed=speed, noise_scale=noise_scale,
+                                                         noise_scale_w=noise_scale_w, sdp_ratio=sdp_ratio)
+                    except BaseException as e:
+                        for i in batch:
+                            group[i][3].set_exception(e)
+                        continue
+                    for i, output in zip(batch, outputs):
+                        group[i][3].set_result(output)
+                    with self._cond:
+                        self._batches += 1
+                        self._sentences += len(batch)
+                        self._tokens += sum(lengths[i] for i in batch)
+                        self._padded_tokens += len(batch) * max(lengths[i] for i in batch)
+
+    def shutdown(self, wait=True):
+        """Stop accepting sentences; queued ones are still synthesised."""
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+        if wait:
+            self._thread.join()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.shutdown()
@@ -1,33 +1,37 @@
 import os
 import glob
+import logging
 import torch
 import hashlib
-import librosa
 import base64
 import numpy as np
+import soundfile
 from pydub import AudioSegment
-from faster_whisper import WhisperModel
-from whisper_timestamped.transcribe import get_audio_tensor, get_vad_segments
-
-model_size = "medium"
-model = None
-
-def split_audio_whisper(audio_path, audio_name, target_dir='processed'):
-    global model
-    if model is None:
-        # Usar CPU si no hay GPU disponible
-        device = "cuda" if torch.cuda.is_available() else "cpu"
-        compute_type = "float16" if device == "cuda" else "float32"
-        model = WhisperModel(model_size, device=device, compute_type=compute_type)
-    
+from openvoice import asr
+from openvoice import audio as audio_io
+from openvoice.vad import energy_vad
+
+logger = logging.getLogger(__name__)
+
+# faster_whisper y whisper_timestamped se importan solo cuando se usan:
+# vad='energy' funciona sin ninguno de los dos.
+
+VAD_METHODS = ('silero', 'energy', 'whisper')
+
+def split_audio_whisper(audio_path, audio_name, target_dir='processed', backend=None):
+    """Cut the reference at whisper segment boundaries.
+
+    ``backend`` is an ``asr.WhisperBackend``; by default the process-wide one
+    from ``asr.get_backend()``, configured through ``OPENVOICE_WHISPER_*``.
+    """
+    backend = backend or asr.get_backend()
     audio = AudioSegment.from_file(audio_path)
     max_len = len(audio)
 
     target_folder = os.path.join(target_dir, audio_name)
     
     # Actualizado para faster-whisper 1.2.1
-    segments, info = model.transcribe(audio_path, beam_size=5, word_timestamps=True, vad_filter=True)
-    segments = list(segments)    
+    segments, info = backend.transcribe(audio_path, beam_size=5, word_timestamps=True, vad_filter=True)
 
     # create directory
     os.makedirs(target_folder, exist_ok=True)
@@ -75,7 +79,9 @@ def split_audio_whisper(audio_path, audio_name, target_dir='processed'):
     return wavs_folder
 
 
-def split_audio_vad(audio_path, audio_name, target_dir, split_seconds=10.0):
+def get_vad_segments_seconds(audio_path):
+    """Voiced regions of ``audio_path`` as ``[(start, end), ...]`` in seconds, from Silero."""
+    from whisper_timestamped.transcribe import get_audio_tensor, get_vad_segments
     SAMPLE_RATE = 16000
     # Actualizado para librosa 0.11.0 y whisper-timestamped 1.15.9
     audio_vad = get_audio_tensor(audio_path)
@@ -87,43 +93,66 @@ def split_audio_vad(audio_path, audio_name, target_dir, split_seconds=10.0):
         method="silero",
     )
     segments = [(seg["start"], seg["end"]) for seg in segments]
-    segments = [(float(s) / SAMPLE_RATE, float(e) / SAMPLE_RATE) for s,e in segments]
-    print(segments)
-    
-    audio_active = AudioSegment.silent(duration=0)
-    audio = AudioSegment.from_file(audio_path)
+    return [(float(s) / SAMPLE_RATE, float(e) / SAMPLE_RATE) for s,e in segments]
 
-    for start_time, end_time in segments:
-        audio_active += audio[int( start_time * 1000) : int(end_time * 1000)]
-    
-    audio_dur = audio_active.duration_seconds
-    print(f'after vad: dur = {audio_dur}')
-    
-    target_folder = os.path.join(target_dir, audio_name)
-    wavs_folder = os.path.join(target_folder, 'wavs')
-    os.makedirs(wavs_folder, exist_ok=True)
-    
-    start_time = 0.
-    count = 0
-    num_splits = int(np.round(audio_dur / split_seconds))
+
+def concat_segments(audio, sr, segments):
+    """Join the ``(start, end)`` second ranges of ``audio`` with a single copy."""
+    n = audio.shape[-1]
+    pieces = [audio[..., min(int(s * sr), n): min(int(e * sr), n)] for s, e in segments]
+    if not pieces:
+        return audio[..., :0]
+    return np.concatenate(pieces, axis=-1)
+
+
+def split_even(audio, sr, split_seconds=10.0):
+    """Cut ``audio`` into ``round(duration / split_seconds)`` equal pieces (views, no copies)."""
+    n = audio.shape[-1]
+    num_splits = int(np.round(n / sr / split_seconds))
     assert num_splits > 0, 'input audio is too short'
-    interval = audio_dur / num_splits
-
-    for i in range(num_splits):
-        end_time = min(start_time + interval, audio_dur)
-        if i == num_splits - 1:
-            end_time = audio_dur
-        output_file = f"{wavs_folder}/{audio_name}_seg{count}.wav"
-        audio_seg = audio_active[int(start_time * 1000): int(end_time * 1000)]
-        audio_seg.export(output_file, format='wav')
-        start_time = end_time
-        count += 1
-    
+    bounds = np.linspace(0, n, num_splits + 1).astype(np.int64)
+    return [audio[..., bounds[i]: bounds[i + 1]] for i in range(num_splits)]
+
+
+def write_segments(segments, sr, wavs_folder, audio_name):
+    os.makedirs(wavs_folder, exist_ok=True)
+    paths = []
+    for count, seg in enumerate(segments):
+        output_file = os.path.join(wavs_folder, f"{audio_name}_seg{count}.wav")
+        soundfile.write(output_file, seg.T, sr, subtype='PCM_16')
+        paths.append(output_file)
+    return paths
+
+
+def split_audio_vad_arrays(audio_path, split_seconds=10.0, segments=None, method='silero'):
+    """Voiced audio of ``audio_path`` cut into ~``split_seconds`` pieces.
+
+    Returns ``(pieces, sr)`` with the pieces as float32 arrays at the native
+    rate. ``method`` is ``'silero'`` or ``'energy'`` (``openvoice.vad``, no
+    model needed); ``segments`` (seconds) skips running the VAD.
+    """
+    audio, sr = audio_io.load(audio_path, sr=None, mono=True)
+    if segments is None:
+        if method == 'energy':
+            segments = energy_vad(audio, sr)
+        else:
+            segments = get_vad_segments_seconds(audio_path)
+    logger.debug("vad segments: %s", segments)
+
+    audio_active = concat_segments(audio, sr, segments)
+    logger.info("after vad: dur = %.2f s", audio_active.shape[-1] / sr)
+    return split_even(audio_active, sr, split_seconds), sr
+
+
+def split_audio_vad(audio_path, audio_name, target_dir, split_seconds=10.0, method='silero'):
+    pieces, sr = split_audio_vad_arrays(audio_path, split_seconds=split_seconds, method=method)
+    wavs_folder = os.path.join(target_dir, audio_name, 'wavs')
+    write_segments(pieces, sr, wavs_folder, audio_name)
     return wavs_folder
 
 def hash_numpy_array(audio_path):
-    # Actualizado para librosa 0.11.0: especificar dtype
-    array, _ = librosa.load(audio_path, sr=None, mono=True, dtype=np.float32)
+    """Hash of the decoded samples: the same for two encodings of identical PCM, but needs a full decode."""
+    array, _ = audio_io.load(audio_path, sr=None, mono=True)
     # Convert the array to bytes
     array_bytes = array.tobytes()
     # Calculate the hash of the array bytes
@@ -133,25 +162,74 @@ def hash_numpy_array(audio_path):
     base64_value = base64.b64encode(hash_value)
     return base64_value.decode('utf-8')[:16].replace('/', '_^')
 
-def get_se(audio_path, vc_model, target_dir='processed', vad=True):
+def hash_file(audio_path, chunk_size=1 << 20):
+    """blake2b of the raw file bytes, read in chunks; 16 hex characters."""
+    hash_object = hashlib.blake2b(digest_size=8)
+    buffer = bytearray(chunk_size)
+    view = memoryview(buffer)
+    with open(audio_path, 'rb', buffering=0) as f:
+        while True:
+            n = f.readinto(buffer)
+            if not n:
+                break
+            hash_object.update(view[:n])
+    return hash_object.hexdigest()
+
+def _load_cached_se(se_path, device):
+    if os.path.isfile(se_path):
+        try:
+            return torch.load(se_path, map_location=device, weights_only=False)
+        except Exception as e:
+            logger.warning("Error loading existing se.pth, regenerating: %s", e)
+    return None
+
+def get_se(audio_path, vc_model, target_dir='processed', vad=True, dedupe=False, store=None):
+    """Tone color embedding of ``audio_path``, cached under ``target_dir``.
+
+    ``vad`` picks how the reference is segmented: ``True`` / ``'silero'``,
+    ``'energy'`` (numpy only, no model to load) or ``False`` / ``'whisper'``.
+
+    The cache is keyed on a hash of the file bytes, so a hit costs one read
+    of the file and no decoding. With ``dedupe=True`` a miss falls back to
+    the hash of the decoded samples, which also finds a re-encoded copy of
+    the same audio and embeddings cached by earlier versions.
+
+    With a ``speaker_store.SpeakerStore`` as ``store`` the embedding is looked
+    up in and added to the store instead of a per-voice ``se.pth``.
+    """
+    method = {True: 'silero', False: 'whisper'}.get(vad, vad)
+    if method not in VAD_METHODS:
+        raise ValueError(f"vad must be one of {VAD_METHODS}, True or False; got {vad!r}")
     device = vc_model.device
     version = vc_model.version
-    print("OpenVoice version:", version)
+    logger.debug("OpenVoice version: %s", version)
 
-    audio_name = f"{os.path.basename(audio_path).rsplit('.', 1)[0]}_{version}_{hash_numpy_array(audio_path)}"
+    prefix = f"{os.path.basename(audio_path).rsplit('.', 1)[0]}_{version}"
+    audio_name = f"{prefix}_{hash_file(audio_path)}"
     se_path = os.path.join(target_dir, audio_name, 'se.pth')
 
     # Comprobación y carga de embedding si ya existe
-    if os.path.isfile(se_path):
-        try:
-            se = torch.load(se_path, map_location=device, weights_only=False)
+    if store is not None and audio_name in store:
+        return store.get(audio_name, device=device), audio_name
+    se = _load_cached_se(se_path, device)
+    if se is not None:
+        if store is not None:
+            store.put(audio_name, se, source=audio_path)
+        return se, audio_name
+    if dedupe:
+        se = _load_cached_se(os.path.join(target_dir, f"{prefix}_{hash_numpy_array(audio_path)}", 'se.pth'), device)
+        if se is not None:
+            # guardar también bajo la clave nueva para que la próxima vez no haga falta decodificar
+            if store is not None:
+                store.put(audio_name, se, source=audio_path)
+            else:
+                os.makedirs(os.path.dirname(se_path), exist_ok=True)
+                torch.save(se.cpu(), se_path)
             return se, audio_name
-        except Exception as e:
-            print(f"Error loading existing se.pth, regenerating: {e}")
     
     # Si no existe o hay error, generamos uno nuevo
-    if vad:
-        wavs_folder = split_audio_vad(audio_path, target_dir=target_dir, audio_name=audio_name)
+    if method != 'whisper':
+        wavs_folder = split_audio_vad(audio_path, target_dir=target_dir, audio_name=audio_name, method=method)
     else:
         wavs_folder = split_audio_whisper(audio_path, target_dir=target_dir, audio_name=audio_name)
     
@@ -160,5 +238,9 @@ def get_se(audio_path, vc_model, target_dir='processed', vad=True):
         raise NotImplementedError('No audio segments found!')
     
     # Extraer el speaker embedding
-    se = vc_model.extract_se(audio_segs, se_save_path=se_path)
+    if store is not None:
+        se = vc_model.extract_se(audio_segs)
+        store.put(audio_name, se, source=audio_path, segments=len(audio_segs))
+    else:
+        se = vc_model.extract_se(audio_segs, se_save_path=se_path)
     return se, audio_name
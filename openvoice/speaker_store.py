@@ -0,0 +1,308 @@
+"""Tone color embeddings of many voices in one memory-mapped matrix.
+
+A store is a directory with these files:
+
+    embeddings.f32   float32 matrix [capacity, dim], memory-mapped
+    index.json       dim, capacity, free rows and {name: {"row": i, ...metadata}}
+    index.log        changes since index.json was written, one JSON line each
+
+``add``/``update``/``remove`` append one line to ``index.log`` instead of
+rewriting ``index.json``, so enrolling many voices stays linear. The log is
+folded into ``index.json`` by ``flush()``, when the matrix grows, and when
+it gets longer than the index itself.
+
+Opening a store reads the index and replays the log; rows are paged in by
+the OS as they are used. ``query`` compares a batch of embeddings against every stored
+voice with one matrix product. Removed rows go to a free list and are
+reused by later ``add`` calls. One process writes a store at a time; in
+that process the store may be shared between threads.
+"""
+import glob
+import json
+import os
+import threading
+import time
+
+import numpy as np
+import torch
+
+MATRIX_FILE = "embeddings.f32"
+INDEX_FILE = "index.json"
+LOG_FILE = "index.log"
+# the log is compacted once it has more lines than this or than entries
+MIN_LOG_LINES = 1024
+
+
+def _as_vector(se):
+    # tone colors are [1, dim, 1] tensors; accept any shape with dim elements
+    if isinstance(se, torch.Tensor):
+        se = se.detach().cpu().float().numpy()
+    return np.asarray(se, dtype=np.float32).reshape(-1)
+
+
+class SpeakerStore(object):
+    def __init__(self, path, dim=None, capacity=1024):
+        self.path = path
+        self._lock = threading.RLock()
+        self._matrix = None
+        self._normalized = None
+        # changes not yet in index.log, and lines in it
+        self._pending = []
+        self._log_lines = 0
+        os.makedirs(path, exist_ok=True)
+
+        index_path = os.path.join(path, INDEX_FILE)
+        if os.path.isfile(index_path):
+            with open(index_path, "r", encoding="utf-8") as f:
+                index = json.load(f)
+            self.dim = index["dim"]
+            self.capacity = index["capacity"]
+            self._entries = index["entries"]
+            self._free = index["free"]
+            if dim is not None and dim != self.dim:
+                raise ValueError(f"store at {path} holds {self.dim}-dim embeddings, not {dim}")
+            if self._replay_log():
+                used = {entry["row"] for entry in self._entries.values()}
+                self._free = [row for row in range(self.capacity - 1, -1, -1) if row not in used]
+            if self.dim is not None:
+                self._open_matrix()
+        else:
+            self.dim = dim
+            self.capacity = capacity
+            self._entries = {}
+            self._free = []
+
+    # ---- storage
+
+    def _matrix_path(self):
+        return os.path.join(self.path, MATRIX_FILE)
+
+    def _open_matrix(self):
+        expected = self.capacity * self.dim * 4
+        if not os.path.isfile(self._matrix_path()) or os.path.getsize(self._matrix_path()) < expected:
+            with open(self._matrix_path(), "ab") as f:
+                f.truncate(expected)
+        self._matrix = np.memmap(self._matrix_path(), dtype=np.float32, mode="r+",
+                                 shape=(self.capacity, self.dim))
+
+    def _grow(self):
+        old_capacity = self.capacity
+        self._matrix.flush()
+        self._matrix = None
+        self.capacity *= 2
+        self._open_matrix()
+        self._free.extend(range(self.capacity - 1, old_capacity - 1, -1))
+        # the log does not record the capacity
+        self.flush()
+
+    def _take_row(self):
+        if self._matrix is None:
+            self._open_matrix()
+            self._free = list(range(self.capacity - 1, -1, -1))
+            # dim and capacity are only in index.json, which the log builds on
+            self.flush()
+        if not self._free:
+            self._grow()
+        # the free list is kept in descending order, pop() gives the lowest row
+        return self._free.pop()
+
+    def _log_path(self):
+        return os.path.join(self.path, LOG_FILE)
+
+    def _replay_log(self):
+        """Apply ``index.log`` on top of the loaded index; returns whether it had any change."""
+        if not os.path.isfile(self._log_path()):
+            return False
+        with open(self._log_path(), "r", encoding="utf-8") as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    continue  # a line cut short by an interrupted write
+                if record["op"] == "put":
+                    self._entries[record["name"]] = record["entry"]
+                    if self.dim is None:
+                        self.dim = record["dim"]
+                else:
+                    self._entries.pop(record["name"], None)
+                self._log_lines += 1
+        return self._log_lines > 0
+
+    def _record(self, op, name, flush):
+        # called with self._lock held
+        record = {"op": op, "name": name}
+        if op == "put":
+            record.update(entry=self._entries[name], dim=self.dim)
+        self._pending.append(record)
+        if flush:
+            self._write_log()
+
+    def _write_log(self):
+        """Flush the matrix and append the pending changes to ``index.log``."""
+        with self._lock:
+            if not self._pending:
+                return
+            if self._log_lines + len(self._pending) > max(MIN_LOG_LINES, len(self._entries)):
+                self.flush()
+                return
+            if self._matrix is not None:
+                self._matrix.flush()
+            with open(self._log_path(), "a", encoding="utf-8") as f:
+                f.write("".join(json.dumps(record) + "\n" for record in self._pending))
+            self._log_lines += len(self._pending)
+            self._pending = []
+
+    def flush(self):
+        """Write the matrix and the whole index to disk, and empty the log."""
+        with self._lock:
+            if self._matrix is not None:
+                self._matrix.flush()
+            index = {"dim": self.dim, "capacity": self.capacity, "free": self._free, "entries": self._entries}
+            tmp_path = os.path.join(self.path, INDEX_FILE + ".tmp")
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(index, f)
+            os.replace(tmp_path, os.path.join(self.path, INDEX_FILE))
+            # replaying a log already in the index is harmless, so a crash
+            # before this point loses nothing
+            if os.path.isfile(self._log_path()):
+                os.remove(self._log_path())
+            self._log_lines = 0
+            self._pending = []
+
+    # ---- entries
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __contains__(self, name):
+        return name in self._entries
+
+    def names(self):
+        return list(self._entries)
+
+    def metadata(self, name):
+        entry = dict(self._entries[name])
+        entry.pop("row")
+        return entry
+
+    def add(self, name, se, flush=True, **metadata):
+        """Store ``se`` under ``name``; extra keyword arguments are kept as metadata."""
+        vector = _as_vector(se)
+        with self._lock:
+            if name in self._entries:
+                raise KeyError(f"speaker '{name}' already in the store, use update()")
+            if self.dim is None:
+                self.dim = vector.shape[0]
+            self._check_dim(vector)
+            row = self._take_row()
+            self._matrix[row] = vector
+            self._entries[name] = dict(metadata, row=row, updated=time.time())
+            self._normalized = None
+            self._record("put", name, flush)
+        return row
+
+    def update(self, name, se=None, flush=True, **metadata):
+        with self._lock:
+            entry = self._entries[name]
+            if se is not None:
+                vector = _as_vector(se)
+                self._check_dim(vector)
+                self._matrix[entry["row"]] = vector
+                self._normalized = None
+            entry.update(metadata, updated=time.time())
+            self._record("put", name, flush)
+
+    def put(self, name, se, flush=True, **metadata):
+        """``add``, or ``update`` if ``name`` is already stored."""
+        with self._lock:
+            if name in self._entries:
+                self.update(name, se, flush=flush, **metadata)
+            else:
+                self.add(name, se, flush=flush, **metadata)
+
+    def remove(self, name, flush=True):
+        with self._lock:
+            entry = self._entries.pop(name)
+            self._matrix[entry["row"]] = 0
+            self._free.append(entry["row"])
+            self._free.sort(reverse=True)
+            self._normalized = None
+            self._record("remove", name, flush)
+
+    def get(self, name, device="cpu"):
+        """The embedding of ``name`` as a ``[1, dim, 1]`` tensor, like ``torch.load`` of an ``se.pth``."""
+        with self._lock:
+            # _grow replaces the matrix under the lock
+            vector = torch.from_numpy(np.array(self._matrix[self._entries[name]["row"]]))
+        return vector.view(1, -1, 1).to(device)
+
+    def _check_dim(self, vector):
+        if vector.shape[0] != self.dim:
+            raise ValueError(f"expected a {self.dim}-dim embedding, got {vector.shape[0]}")
+
+    # ---- search
+
+    def _index(self):
+        """``(names, unit-norm matrix)`` of the stored voices, cached until the next write."""
+        with self._lock:
+            if self._normalized is None:
+                names = list(self._entries)
+                rows = np.array([self._entries[n]["row"] for n in names], dtype=np.int64)
+                matrix = np.asarray(self._matrix[rows]) if len(rows) else np.zeros((0, self.dim or 0), np.float32)
+                norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+                self._normalized = (names, matrix / np.maximum(norms, 1e-8))
+            return self._normalized
+
+    def query(self, ses, k=1):
+        """The ``k`` most similar stored voices for each embedding in ``ses``.
+
+        ``ses`` is one embedding or a batch (``[n, dim]``, ``[n, dim, 1]`` or a
+        list). Returns one list of ``(name, cosine similarity)`` per query,
+        best first.
+        """
+        if isinstance(ses, torch.Tensor):
+            ses = ses.detach().cpu().float().numpy()
+        if isinstance(ses, (list, tuple)):
+            ses = np.stack([_as_vector(se) for se in ses])
+        queries = np.asarray(ses, dtype=np.float32)
+        if self.dim is None:
+            # empty store: nothing to compare against, only the batch size matters
+            return [[] for _ in range(len(queries) if queries.ndim > 1 else 1)]
+        queries = queries.reshape(-1, self.dim)
+        names, matrix = self._index()
+        if not names:
+            return [[] for _ in range(len(queries))]
+
+        queries = queries / np.maximum(np.linalg.norm(queries, axis=1, keepdims=True), 1e-8)
+        scores = queries @ matrix.T
+        k = min(k, len(names))
+        top = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+        results = []
+        for q in range(len(queries)):
+            best = top[q][np.argsort(-scores[q, top[q]])]
+            results.append([(names[i], float(scores[q, i])) for i in best])
+        return results
+
+    def nearest(self, se, threshold=None):
+        """``(name, similarity)`` of the closest voice, or None if the store is empty or none reaches ``threshold``."""
+        matches = self.query(se, k=1)[0]
+        if not matches or (threshold is not None and matches[0][1] < threshold):
+            return None
+        return matches[0]
+
+    # ---- import
+
+    def import_pth(self, directory, overwrite=False):
+        """Add every ``<name>.pth`` in ``directory`` and every ``<name>/se.pth`` written by ``get_se``."""
+        paths = {os.path.basename(p)[:-4]: p for p in glob.glob(os.path.join(directory, "*.pth"))}
+        paths.update({os.path.basename(os.path.dirname(p)): p
+                      for p in glob.glob(os.path.join(directory, "*", "se.pth"))})
+        added = []
+        with self._lock:
+            for name, pth in sorted(paths.items()):
+                if name in self._entries and not overwrite:
+                    continue
+                self.put(name, torch.load(pth, map_location="cpu"), flush=False, source=pth)
+                added.append(name)
+            self.flush()
+        return added
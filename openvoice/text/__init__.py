@@ -1,5 +1,9 @@
 """ from https://github.com/keithito/tacotron """
+import logging
+
+from openvoice.text import cache
 from openvoice.text import cleaners
+from openvoice.text.cleaners import warmup
 from openvoice.text.symbols import symbols
 
 
@@ -7,6 +11,8 @@ from openvoice.text.symbols import symbols
 _symbol_to_id = {s: i for i, s in enumerate(symbols)}
 _id_to_symbol = {i: s for i, s in enumerate(symbols)}
 
+logger = logging.getLogger(__name__)
+
 
 def text_to_sequence(text, symbols, cleaner_names):
     '''Converts a string of text to a sequence of IDs corresponding to the symbols in the text.
@@ -20,14 +26,12 @@ def text_to_sequence(text, symbols, cleaner_names):
     sequence = []
     symbol_to_id = {s: i for i, s in enumerate(symbols)}
     clean_text = _clean_text(text, cleaner_names)
-    print(clean_text)
-    print(f" length:{len(clean_text)}")
     for symbol in clean_text:
         if symbol not in symbol_to_id.keys():
             continue
         symbol_id = symbol_to_id[symbol]
         sequence += [symbol_id]
-    print(f" length:{len(sequence)}")
+    logger.debug("%s (%d chars, %d symbols)", clean_text, len(clean_text), len(sequence))
     return sequence
 
 
@@ -77,9 +81,14 @@ def sequence_to_text(sequence):
 
 
 def _clean_text(text, cleaner_names):
+    key = (tuple(cleaner_names), text)
+    cleaned = cache.sentences.get(key)
+    if cleaned is not None:
+        return cleaned
     for name in cleaner_names:
         cleaner = getattr(cleaners, name, None)  # Added default None
         if cleaner is None:
             raise Exception('Unknown cleaner: %s' % name)
         text = cleaner(text)
+    cache.sentences.put(key, text)
     return text
@@ -0,0 +1,125 @@
+"""Memoized grapheme-to-phoneme lookups for the text cleaners.
+
+Three bounded LRU caches:
+
+    english_words   word -> eng_to_ipa transcription (skips the CMU sqlite query)
+    chinese_words   jieba word -> bopomofo (skips pypinyin)
+    sentences       (cleaner names, text) -> cleaned text
+
+Word caches can be written to disk and preloaded by a new process, so a
+worker starts with the vocabulary of earlier runs:
+
+    from openvoice.text import cache
+    cache.save('g2p_cache')       # after serving traffic
+    cache.load('g2p_cache')       # at startup, before the first request
+
+``OPENVOICE_G2P_CACHE`` names a directory that is loaded at import time.
+"""
+import json
+import os
+import threading
+from collections import OrderedDict
+
+
+class LRUCache(object):
+    """Thread-safe bounded mapping that evicts the least recently used key."""
+
+    def __init__(self, maxsize=100000):
+        self.maxsize = maxsize
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self):
+        return len(self._data)
+
+    def __contains__(self, key):
+        return key in self._data
+
+    def get(self, key, default=None):
+        with self._lock:
+            try:
+                value = self._data[key]
+            except KeyError:
+                self.misses += 1
+                return default
+            self._data.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def put(self, key, value):
+        if not self.maxsize:
+            return
+        with self._lock:
+            self._data[key] = value
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def update(self, items):
+        for key, value in items:
+            self.put(key, value)
+
+    def items(self):
+        with self._lock:
+            return list(self._data.items())
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+            self.hits = self.misses = 0
+
+    def stats(self):
+        return {"size": len(self._data), "maxsize": self.maxsize, "hits": self.hits, "misses": self.misses}
+
+    def save(self, path):
+        """Write the entries, least recently used first, as JSON."""
+        tmp_path = path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(self.items(), f, ensure_ascii=False)
+        os.replace(tmp_path, path)
+
+    def load(self, path):
+        with open(path, "r", encoding="utf-8") as f:
+            self.update((key if isinstance(key, str) else tuple(key), value) for key, value in json.load(f))
+
+
+english_words = LRUCache(100000)
+chinese_words = LRUCache(100000)
+sentences = LRUCache(10000)
+
+# files under the cache directory; sentence results depend on the cleaner
+# code and are not persisted
+_files = {
+    "english_words.json": english_words,
+    "chinese_words.json": chinese_words,
+}
+
+
+def save(directory):
+    os.makedirs(directory, exist_ok=True)
+    for name, cache in _files.items():
+        cache.save(os.path.join(directory, name))
+
+
+def load(directory):
+    """Preload the word caches saved by ``save``; missing files are skipped."""
+    for name, cache in _files.items():
+        path = os.path.join(directory, name)
+        if os.path.isfile(path):
+            cache.load(path)
+
+
+def clear():
+    for cache in (english_words, chinese_words, sentences):
+        cache.clear()
+
+
+def stats():
+    return {"english_words": english_words.stats(), "chinese_words": chinese_words.stats(),
+            "sentences": sentences.stats()}
+
+
+if os.environ.get("OPENVOICE_G2P_CACHE"):
+    load(os.environ["OPENVOICE_G2P_CACHE"])
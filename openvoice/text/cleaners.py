@@ -1,32 +1,89 @@
+import importlib
 import re
-from openvoice.text.english import english_to_lazy_ipa, english_to_ipa2, english_to_lazy_ipa2
-from openvoice.text.mandarin import number_to_chinese, chinese_to_bopomofo, latin_to_bopomofo, chinese_to_romaji, chinese_to_lazy_ipa, chinese_to_ipa, chinese_to_ipa2
 
-# Añadir importaciones para japonés y coreano si existen
-try:
-    from openvoice.text.japanese import japanese_to_ipa2
-except ImportError:
-    # Si no existen los módulos de japonés, crear función dummy
-    def japanese_to_ipa2(text):
-        raise ImportError("Japanese support not available")
-    
-try:
-    from openvoice.text.korean import korean_to_ipa
-except ImportError:
-    # Si no existen los módulos de coreano, crear función dummy
-    def korean_to_ipa(text):
-        raise ImportError("Korean support not available")
+# Language modules are imported the first time a sentence with their mark is
+# cleaned, so an English-only process never loads jieba, pypinyin or cn2an.
+_language_modules = {
+    'EN': 'openvoice.text.english',
+    'ZH': 'openvoice.text.mandarin',
+    'JA': 'openvoice.text.japanese',
+    'KO': 'openvoice.text.korean',
+}
+_language_names = {
+    'english': 'EN',
+    'chinese': 'ZH',
+    'japanese': 'JA',
+    'korean': 'KO',
+}
+_unavailable = {
+    'JA': "Japanese support not available",
+    'KO': "Korean support not available",
+}
+
+# names this module used to import eagerly, resolved on first access
+_lazy_names = {
+    'english_to_lazy_ipa': 'EN',
+    'english_to_ipa2': 'EN',
+    'english_to_lazy_ipa2': 'EN',
+    'number_to_chinese': 'ZH',
+    'chinese_to_bopomofo': 'ZH',
+    'latin_to_bopomofo': 'ZH',
+    'chinese_to_romaji': 'ZH',
+    'chinese_to_lazy_ipa': 'ZH',
+    'chinese_to_ipa': 'ZH',
+    'chinese_to_ipa2': 'ZH',
+    'japanese_to_ipa2': 'JA',
+    'korean_to_ipa': 'KO',
+}
+
+
+def language_module(mark):
+    """The cleaner module of a language mark (``'EN'``, ``'ZH'``, ...), imported on first use."""
+    try:
+        return importlib.import_module(_language_modules[mark])
+    except ImportError:
+        if mark in _unavailable:
+            raise ImportError(_unavailable[mark])
+        raise
+
+
+def __getattr__(name):
+    if name in _lazy_names:
+        return getattr(language_module(_lazy_names[name]), name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+def warmup(languages=('EN', 'ZH')):
+    """Import the cleaners of ``languages`` and load their dictionaries before serving.
+
+    Languages are marks (``'EN'``) or names (``'english'``); anything else
+    raises ValueError. Chinese loads the jieba dictionary, which jieba
+    otherwise does on the first sentence, and both run a short sentence to
+    open eng_to_ipa's database and pypinyin's tables.
+    """
+    for language in languages:
+        mark = _language_names.get(language.lower(), language.upper())
+        if mark not in _language_modules:
+            supported = ', '.join(f'{name.capitalize()} ({code})' for name, code in _language_names.items())
+            raise ValueError(f"unsupported language {language!r}; supported: {supported}")
+        module = language_module(mark)
+        if mark == 'ZH':
+            module.jieba.initialize()
+            module.chinese_to_ipa('你好')
+        elif mark == 'EN':
+            module.english_to_ipa2('hello')
+
 
 def cjke_cleaners2(text):
     """Cleaner for CJKE (Chinese, Japanese, Korean, English) text"""
     text = re.sub(r'\[ZH\](.*?)\[ZH\]',
-                  lambda x: chinese_to_ipa(x.group(1)) + ' ', text)
+                  lambda x: language_module('ZH').chinese_to_ipa(x.group(1)) + ' ', text)
     text = re.sub(r'\[JA\](.*?)\[JA\]',
-                  lambda x: japanese_to_ipa2(x.group(1)) + ' ', text)
+                  lambda x: language_module('JA').japanese_to_ipa2(x.group(1)) + ' ', text)
     text = re.sub(r'\[KO\](.*?)\[KO\]',
-                  lambda x: korean_to_ipa(x.group(1)) + ' ', text)
+                  lambda x: language_module('KO').korean_to_ipa(x.group(1)) + ' ', text)
     text = re.sub(r'\[EN\](.*?)\[EN\]',
-                  lambda x: english_to_ipa2(x.group(1)) + ' ', text)
+                  lambda x: language_module('EN').english_to_ipa2(x.group(1)) + ' ', text)
     text = re.sub(r'\s+$', '', text)
     text = re.sub(r'([^\.,!\?\-…~])$', r'\1.', text)
     return text
@@ -93,17 +150,17 @@ def multilingual_cleaners(text):
         content = match.group(2)
         
         if lang == 'ZH':
-            return chinese_to_ipa(content) + ' '
+            return language_module('ZH').chinese_to_ipa(content) + ' '
         elif lang == 'EN':
-            return english_to_ipa2(content) + ' '
+            return language_module('EN').english_to_ipa2(content) + ' '
         elif lang == 'JA':
             try:
-                return japanese_to_ipa2(content) + ' '
+                return language_module('JA').japanese_to_ipa2(content) + ' '
             except:
                 return content + ' '
         elif lang == 'KO':
             try:
-                return korean_to_ipa(content) + ' '
+                return language_module('KO').korean_to_ipa(content) + ' '
             except:
                 return content + ' '
         else:
@@ -14,10 +14,16 @@ hyperparameter. Some cleaners are English-specific. You'll typically want to use
 
 
 # Regular expression matching whitespace:
+import logging
 import re
 import inflect
 from unidecode import unidecode
 
+from openvoice.text import cache
+from openvoice.text.replacer import Replacer
+
+logger = logging.getLogger(__name__)
+
 # Intentar importar eng_to_ipa, con fallback alternativo
 try:
     import eng_to_ipa as ipa
@@ -65,7 +71,7 @@ _abbreviations = [(re.compile(r'\b%s\.' % re.escape(x[0]), re.IGNORECASE), x[1])
 
 
 # List of (ipa, lazy ipa) pairs:
-_lazy_ipa = [(re.compile(re.escape(x[0])), x[1]) for x in [
+_lazy_ipa = Replacer([
     ('r', 'ɹ'),
     ('æ', 'e'),
     ('ɑ', 'a'),
@@ -78,24 +84,24 @@ _lazy_ipa = [(re.compile(re.escape(x[0])), x[1]) for x in [
     ('ʒ', 'ʥ'),
     ('ʤ', 'ʥ'),
     ('ˈ', '↓'),
-]]
+])
 
 # List of (ipa, lazy ipa2) pairs:
-_lazy_ipa2 = [(re.compile(re.escape(x[0])), x[1]) for x in [
+_lazy_ipa2 = Replacer([
     ('r', 'ɹ'),
     ('ð', 'z'),
     ('θ', 's'),
     ('ʒ', 'ʑ'),
     ('ʤ', 'dʑ'),
     ('ˈ', '↓'),
-]]
+])
 
 # List of (ipa, ipa2) pairs
-_ipa_to_ipa2 = [(re.compile(re.escape(x[0])), x[1]) for x in [
+_ipa_to_ipa2 = Replacer([
     ('r', 'ɹ'),
     ('ʤ', 'dʒ'),
     ('ʧ', 'tʃ')
-]]
+])
 
 
 def expand_abbreviations(text):
@@ -170,6 +176,32 @@ def mark_dark_l(text):
     return re.sub(r'l([^aeiouæɑɔəɛɪʊ ]*(?: |$))', lambda x: 'ɫ'+x.group(1), text)
 
 
+def _words_to_ipa(text):
+    """``ipa.convert`` through the word cache.
+
+    eng_to_ipa transcribes every whitespace-separated word on its own, so
+    the words of a sentence can be looked up one by one; the ones not seen
+    before go to ``ipa.convert`` in a single call.
+    """
+    words = text.split()
+    known = {}
+    missing = []
+    for word in dict.fromkeys(words):
+        phonemes = cache.english_words.get(word)
+        if phonemes is None:
+            missing.append(word)
+        else:
+            known[word] = phonemes
+    if missing:
+        converted = ipa.convert(' '.join(missing)).split(' ')
+        if len(converted) != len(missing):
+            converted = [ipa.convert(word) for word in missing]
+        for word, phonemes in zip(missing, converted):
+            cache.english_words.put(word, phonemes)
+            known[word] = phonemes
+    return ' '.join(known[word] for word in words)
+
+
 def english_to_ipa(text):
     """Convert English text to IPA notation."""
     text = unidecode(text).lower()
@@ -178,12 +210,12 @@ def english_to_ipa(text):
     
     if ENG_TO_IPA_AVAILABLE:
         try:
-            phonemes = ipa.convert(text)
+            phonemes = _words_to_ipa(text)
         except Exception as e:
-            print(f"Warning: eng_to_ipa conversion failed: {e}")
+            logger.warning("eng_to_ipa conversion failed: %s", e)
             phonemes = text  # Fallback to plain text
     else:
-        print("Warning: eng_to_ipa not available, using fallback")
+        logger.warning("eng_to_ipa not available, using fallback")
         phonemes = text  # Fallback to plain text
     
     phonemes = collapse_whitespace(phonemes)
@@ -193,26 +225,21 @@ def english_to_ipa(text):
 def english_to_lazy_ipa(text):
     """Convert English text to lazy IPA notation."""
     text = english_to_ipa(text)
-    for regex, replacement in _lazy_ipa:
-        text = re.sub(regex, replacement, text)
-    return text
+    return _lazy_ipa(text)
 
 
 def english_to_ipa2(text):
     """Convert English text to IPA2 notation."""
     text = english_to_ipa(text)
     text = mark_dark_l(text)
-    for regex, replacement in _ipa_to_ipa2:
-        text = re.sub(regex, replacement, text)
+    text = _ipa_to_ipa2(text)
     return text.replace('...', '…')
 
 
 def english_to_lazy_ipa2(text):
     """Convert English text to lazy IPA2 notation."""
     text = english_to_ipa(text)
-    for regex, replacement in _lazy_ipa2:
-        text = re.sub(regex, replacement, text)
-    return text
+    return _lazy_ipa2(text)
 
 
 # Funciones de limpieza adicionales para compatibilidad
@@ -6,12 +6,13 @@ import jieba
 import cn2an
 import logging
 
-# Configurar logging
-logging.basicConfig(level=logging.WARNING)
+from openvoice.text import cache
+from openvoice.text.replacer import Replacer
+
 logger = logging.getLogger(__name__)
 
 # List of (Latin alphabet, bopomofo) pairs:
-_latin_to_bopomofo = [(re.compile(re.escape(x[0]), re.IGNORECASE), x[1]) for x in [
+_latin_to_bopomofo = Replacer([
     ('a', 'ㄟˉ'),
     ('b', 'ㄅㄧˋ'),
     ('c', 'ㄙㄧˉ'),
@@ -38,10 +39,10 @@ _latin_to_bopomofo = [(re.compile(re.escape(x[0]), re.IGNORECASE), x[1]) for x i
     ('x', 'ㄝˉㄎㄨˋㄙˋ'),
     ('y', 'ㄨㄞˋ'),
     ('z', 'ㄗㄟˋ')
-]]
+], ignore_case=True)
 
 # List of (bopomofo, romaji) pairs:
-_bopomofo_to_romaji = [(re.compile(re.escape(x[0])), x[1]) for x in [
+_bopomofo_to_romaji = Replacer([
     ('ㄅㄛ', 'p⁼wo'),
     ('ㄆㄛ', 'pʰwo'),
     ('ㄇㄛ', 'mwo'),
@@ -98,10 +99,10 @@ _bopomofo_to_romaji = [(re.compile(re.escape(x[0])), x[1]) for x in [
     ('！', '!'),
     ('？', '?'),
     ('—', '-')
-]]
+])
 
 # List of (romaji, ipa) pairs:
-_romaji_to_ipa = [(re.compile(re.escape(x[0]), re.IGNORECASE), x[1]) for x in [
+_romaji_to_ipa = Replacer([
     ('ʃy', 'ʃ'),
     ('ʧʰy', 'ʧʰ'),
     ('ʧ⁼y', 'ʧ⁼'),
@@ -109,10 +110,10 @@ _romaji_to_ipa = [(re.compile(re.escape(x[0]), re.IGNORECASE), x[1]) for x in [
     ('Ng', 'ŋ'),
     ('y', 'j'),
     ('h', 'x')
-]]
+], ignore_case=True)
 
 # List of (bopomofo, ipa) pairs:
-_bopomofo_to_ipa = [(re.compile(re.escape(x[0])), x[1]) for x in [
+_bopomofo_to_ipa = Replacer([
     ('ㄅㄛ', 'p⁼wo'),
     ('ㄆㄛ', 'pʰwo'),
     ('ㄇㄛ', 'mwo'),
@@ -171,10 +172,10 @@ _bopomofo_to_ipa = [(re.compile(re.escape(x[0])), x[1]) for x in [
     ('！', '!'),
     ('？', '?'),
     ('—', '-')
-]]
+])
 
 # List of (bopomofo, ipa2) pairs:
-_bopomofo_to_ipa2 = [(re.compile(re.escape(x[0])), x[1]) for x in [
+_bopomofo_to_ipa2 = Replacer([
     ('ㄅㄛ', 'pwo'),
     ('ㄆㄛ', 'pʰwo'),
     ('ㄇㄛ', 'mwo'),
@@ -233,7 +234,7 @@ _bopomofo_to_ipa2 = [(re.compile(re.escape(x[0])), x[1]) for x in [
     ('！', '!'),
     ('？', '?'),
     ('—', '-')
-]]
+])
 
 
 def number_to_chinese(text):
@@ -258,12 +259,16 @@ def chinese_to_bopomofo(text):
             if not re.search('[\u4e00-\u9fff]', word):
                 text += word
                 continue
-            bopomofos = lazy_pinyin(word, BOPOMOFO)
-            for i in range(len(bopomofos)):
-                bopomofos[i] = re.sub(r'([\u3105-\u3129])$', r'\1ˉ', bopomofos[i])
+            bopomofo = cache.chinese_words.get(word)
+            if bopomofo is None:
+                bopomofos = lazy_pinyin(word, BOPOMOFO)
+                for i in range(len(bopomofos)):
+                    bopomofos[i] = re.sub(r'([\u3105-\u3129])$', r'\1ˉ', bopomofos[i])
+                bopomofo = ''.join(bopomofos)
+                cache.chinese_words.put(word, bopomofo)
             if text != '':
                 text += ' '
-            text += ''.join(bopomofos)
+            text += bopomofo
         return text
     except Exception as e:
         logger.warning(f"Error in chinese_to_bopomofo: {e}")
@@ -272,30 +277,22 @@ def chinese_to_bopomofo(text):
 
 def latin_to_bopomofo(text):
     """Convert Latin characters to Bopomofo."""
-    for regex, replacement in _latin_to_bopomofo:
-        text = re.sub(regex, replacement, text)
-    return text
+    return _latin_to_bopomofo(text)
 
 
 def bopomofo_to_romaji(text):
     """Convert Bopomofo to Romaji."""
-    for regex, replacement in _bopomofo_to_romaji:
-        text = re.sub(regex, replacement, text)
-    return text
+    return _bopomofo_to_romaji(text)
 
 
 def bopomofo_to_ipa(text):
     """Convert Bopomofo to IPA."""
-    for regex, replacement in _bopomofo_to_ipa:
-        text = re.sub(regex, replacement, text)
-    return text
+    return _bopomofo_to_ipa(text)
 
 
 def bopomofo_to_ipa2(text):
     """Convert Bopomofo to IPA2."""
-    for regex, replacement in _bopomofo_to_ipa2:
-        text = re.sub(regex, replacement, text)
-    return text
+    return _bopomofo_to_ipa2(text)
 
 
 def chinese_to_romaji(text):
@@ -320,9 +317,7 @@ def chinese_to_lazy_ipa(text):
     """Convert Chinese text to lazy IPA."""
     try:
         text = chinese_to_romaji(text)
-        for regex, replacement in _romaji_to_ipa:
-            text = re.sub(regex, replacement, text)
-        return text
+        return _romaji_to_ipa(text)
     except Exception as e:
         logger.warning(f"Error in chinese_to_lazy_ipa: {e}")
         return text
@@ -0,0 +1,87 @@
+"""Ordered tables of literal (pattern, replacement) pairs for the text cleaners.
+
+The cleaners used to run ``re.sub`` with a regex per pair, a pass of the
+regex engine over the text for each of several dozen patterns. ``Replacer``
+gives the same output faster:
+
+* case-sensitive tables become a chain of ``str.replace``. For a literal
+  pattern this is exactly ``re.sub``, pair by pair, but each pass is a C
+  substring search; on bopomofo sentences it is several times faster than
+  both the regex loop and a single alternation regex, whose per-match Python
+  callback dominates.
+* case-insensitive tables are compiled into one alternation (earlier pairs
+  first, so they win at a given position) with a dict lookup for the
+  replacement: one scan instead of one per pair.
+
+A single scan only equals applying the pairs one after another if no
+replacement can be rewritten by a later pair and no later pattern can match
+across an earlier one. The constructor checks this; a table that fails
+(``mandarin._romaji_to_ipa``: ``NN`` -> ``n`` feeds ``Ng``) keeps the
+pair-by-pair ``re.sub``.
+"""
+import re
+
+
+def _single_pass_safe(pairs, flags):
+    def occurs(needle, haystack, start=0):
+        return re.compile(re.escape(needle), flags).search(haystack, start) is not None
+
+    for i, (a_i, r_i) in enumerate(pairs):
+        for a_j, _ in pairs[i + 1:]:
+            # a later pattern must not match inside an earlier replacement or
+            # across its edges, nor across the gap left by an empty one
+            if any(occurs(c, a_j) for c in r_i):
+                return False
+            if not r_i and len(a_j) > 1:
+                return False
+            # a later pattern starting before an earlier match must not
+            # overlap it: the scan would take the later one first
+            if occurs(a_i, a_j, 1):
+                return False
+            if any(re.match(re.escape(a_j[k:]), a_i, flags) for k in range(1, len(a_j))):
+                return False
+    return True
+
+
+class Replacer(object):
+    def __init__(self, pairs, ignore_case=False):
+        self.pairs = list(pairs)
+        self.ignore_case = ignore_case
+        self._flags = re.IGNORECASE if ignore_case else 0
+        if any("\\" in r for _, r in self.pairs):
+            # re.sub expands escapes in these replacements
+            self.mode = "sequential"
+        elif not ignore_case:
+            self.mode = "replace"
+        elif _single_pass_safe(self.pairs, self._flags):
+            self.mode = "regex"
+            self._regex = re.compile("|".join(re.escape(a) for a, _ in self.pairs), self._flags)
+            self._lookup = {}
+            for a, r in self.pairs:
+                self._lookup.setdefault(a.lower(), r)
+        else:
+            self.mode = "sequential"
+        if self.mode == "sequential":
+            self._sequential = [(re.compile(re.escape(a), self._flags), r) for a, r in self.pairs]
+
+    def _replacement(self, m):
+        s = m.group(0)
+        try:
+            return self._lookup[s.lower()]
+        except KeyError:
+            # case-insensitive matches whose lower() is not the pattern (e.g. KELVIN SIGN)
+            for a, r in self.pairs:
+                if re.fullmatch(re.escape(a), s, self._flags):
+                    return r
+            raise
+
+    def __call__(self, text):
+        if self.mode == "replace":
+            for a, r in self.pairs:
+                text = text.replace(a, r)
+            return text
+        if self.mode == "regex":
+            return self._regex.sub(self._replacement, text)
+        for regex, replacement in self._sequential:
+            text = regex.sub(replacement, text)
+        return text
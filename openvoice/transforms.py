@@ -1,3 +1,5 @@
+import functools
+
 import torch
 from torch.nn import functional as F
 
@@ -43,8 +45,18 @@ def piecewise_rational_quadratic_transform(
 
 
 def searchsorted(bin_locations, inputs, eps=1e-6):
-    bin_locations[..., -1] += eps
-    return torch.sum(inputs[..., None] >= bin_locations, dim=-1) - 1
+    # Same result as counting ``inputs >= bin_locations`` with the last edge
+    # nudged by ``eps``, without mutating ``bin_locations`` or broadcasting.
+    bin_idx = torch.searchsorted(
+        bin_locations[..., :-1].contiguous(), inputs[..., None].contiguous(), right=True
+    )[..., 0] - 1
+    return bin_idx + (inputs >= bin_locations[..., -1] + eps)
+
+
+@functools.lru_cache(maxsize=None)
+def _linear_tail_constant(min_derivative):
+    # Actualizado: usar torch en lugar de numpy para consistencia
+    return torch.log(torch.exp(torch.tensor(1 - min_derivative)) - 1).item()
 
 
 def unconstrained_rational_quadratic_spline(
@@ -59,32 +71,20 @@ def unconstrained_rational_quadratic_spline(
     min_bin_height=DEFAULT_MIN_BIN_HEIGHT,
     min_derivative=DEFAULT_MIN_DERIVATIVE,
 ):
-    inside_interval_mask = (inputs >= -tail_bound) & (inputs <= tail_bound)
-    outside_interval_mask = ~inside_interval_mask
-
-    outputs = torch.zeros_like(inputs)
-    logabsdet = torch.zeros_like(inputs)
-
     if tails == "linear":
-        unnormalized_derivatives = F.pad(unnormalized_derivatives, pad=(1, 1))
-        # Actualizado: usar torch en lugar de numpy para consistencia
-        constant = torch.log(torch.exp(torch.tensor(1 - min_derivative)) - 1)
-        unnormalized_derivatives[..., 0] = constant.to(unnormalized_derivatives.device)
-        unnormalized_derivatives[..., -1] = constant.to(unnormalized_derivatives.device)
-
-        outputs[outside_interval_mask] = inputs[outside_interval_mask]
-        logabsdet[outside_interval_mask] = 0
+        constant = _linear_tail_constant(min_derivative)
+        unnormalized_derivatives = F.pad(unnormalized_derivatives, pad=(1, 1), value=constant)
     else:
         raise RuntimeError("{} tails are not implemented.".format(tails))
 
-    (
-        outputs[inside_interval_mask],
-        logabsdet[inside_interval_mask],
-    ) = rational_quadratic_spline(
-        inputs=inputs[inside_interval_mask],
-        unnormalized_widths=unnormalized_widths[inside_interval_mask, :],
-        unnormalized_heights=unnormalized_heights[inside_interval_mask, :],
-        unnormalized_derivatives=unnormalized_derivatives[inside_interval_mask, :],
+    # The spline is elementwise, so evaluate it densely on clamped inputs and
+    # select afterwards instead of gathering/scattering through boolean masks.
+    inside_interval_mask = (inputs >= -tail_bound) & (inputs <= tail_bound)
+    spline_outputs, spline_logabsdet = rational_quadratic_spline(
+        inputs=inputs.clamp(-tail_bound, tail_bound),
+        unnormalized_widths=unnormalized_widths,
+        unnormalized_heights=unnormalized_heights,
+        unnormalized_derivatives=unnormalized_derivatives,
         inverse=inverse,
         left=-tail_bound,
         right=tail_bound,
@@ -95,6 +95,10 @@ def unconstrained_rational_quadratic_spline(
         min_derivative=min_derivative,
     )
 
+    # linear tails: identity outside the interval
+    outputs = torch.where(inside_interval_mask, spline_outputs, inputs)
+    logabsdet = spline_logabsdet.masked_fill(~inside_interval_mask, 0)
+
     return outputs, logabsdet
 
 
@@ -112,8 +116,10 @@ def rational_quadratic_spline(
     min_bin_height=DEFAULT_MIN_BIN_HEIGHT,
     min_derivative=DEFAULT_MIN_DERIVATIVE,
 ):
-    if torch.min(inputs) < left or torch.max(inputs) > right:
-        raise ValueError("Input to a transform is not within its domain")
+    if inputs.numel() > 0:
+        min_input, max_input = torch.aminmax(inputs)
+        if min_input < left or max_input > right:
+            raise ValueError("Input to a transform is not within its domain")
 
     num_bins = unnormalized_widths.shape[-1]
 
@@ -122,51 +128,34 @@ def rational_quadratic_spline(
     if min_bin_height * num_bins > 1.0:
         raise ValueError("Minimal bin height too large for the number of bins")
 
-    widths = F.softmax(unnormalized_widths, dim=-1)
-    widths = min_bin_width + (1 - min_bin_width * num_bins) * widths
-    cumwidths = torch.cumsum(widths, dim=-1)
-    cumwidths = F.pad(cumwidths, pad=(1, 0), mode="constant", value=0.0)
-    cumwidths = (right - left) * cumwidths + left
-    cumwidths[..., 0] = left
-    cumwidths[..., -1] = right
-    widths = cumwidths[..., 1:] - cumwidths[..., :-1]
-
+    cumwidths, widths = _bin_edges(unnormalized_widths, min_bin_width, left, right)
+    cumheights, heights = _bin_edges(unnormalized_heights, min_bin_height, bottom, top)
     derivatives = min_derivative + F.softplus(unnormalized_derivatives)
 
-    heights = F.softmax(unnormalized_heights, dim=-1)
-    heights = min_bin_height + (1 - min_bin_height * num_bins) * heights
-    cumheights = torch.cumsum(heights, dim=-1)
-    cumheights = F.pad(cumheights, pad=(1, 0), mode="constant", value=0.0)
-    cumheights = (top - bottom) * cumheights + bottom
-    cumheights[..., 0] = bottom
-    cumheights[..., -1] = top
-    heights = cumheights[..., 1:] - cumheights[..., :-1]
-
     if inverse:
         bin_idx = searchsorted(cumheights, inputs)[..., None]
     else:
         bin_idx = searchsorted(cumwidths, inputs)[..., None]
 
+    # Only the selected bin is needed per input, so gather first and derive
+    # the slope from the gathered width/height instead of for every bin.
     input_cumwidths = cumwidths.gather(-1, bin_idx)[..., 0]
     input_bin_widths = widths.gather(-1, bin_idx)[..., 0]
 
     input_cumheights = cumheights.gather(-1, bin_idx)[..., 0]
-    delta = heights / widths
-    input_delta = delta.gather(-1, bin_idx)[..., 0]
+    input_heights = heights.gather(-1, bin_idx)[..., 0]
+    input_delta = input_heights / input_bin_widths
 
     input_derivatives = derivatives.gather(-1, bin_idx)[..., 0]
     input_derivatives_plus_one = derivatives[..., 1:].gather(-1, bin_idx)[..., 0]
 
-    input_heights = heights.gather(-1, bin_idx)[..., 0]
+    derivatives_sum = input_derivatives + input_derivatives_plus_one - 2 * input_delta
 
     if inverse:
-        a = (inputs - input_cumheights) * (
-            input_derivatives + input_derivatives_plus_one - 2 * input_delta
-        ) + input_heights * (input_delta - input_derivatives)
-        b = input_heights * input_derivatives - (inputs - input_cumheights) * (
-            input_derivatives + input_derivatives_plus_one - 2 * input_delta
-        )
-        c = -input_delta * (inputs - input_cumheights)
+        shifted = inputs - input_cumheights
+        a = shifted * derivatives_sum + input_heights * (input_delta - input_derivatives)
+        b = input_heights * input_derivatives - shifted * derivatives_sum
+        c = -input_delta * shifted
 
         discriminant = b.pow(2) - 4 * a * c
         assert (discriminant >= 0).all()
@@ -174,37 +163,39 @@ def rational_quadratic_spline(
         root = (2 * c) / (-b - torch.sqrt(discriminant))
         outputs = root * input_bin_widths + input_cumwidths
 
-        theta_one_minus_theta = root * (1 - root)
-        denominator = input_delta + (
-            (input_derivatives + input_derivatives_plus_one - 2 * input_delta)
-            * theta_one_minus_theta
-        )
-        derivative_numerator = input_delta.pow(2) * (
-            input_derivatives_plus_one * root.pow(2)
-            + 2 * input_delta * theta_one_minus_theta
-            + input_derivatives * (1 - root).pow(2)
-        )
-        logabsdet = torch.log(derivative_numerator) - 2 * torch.log(denominator)
-
-        return outputs, -logabsdet
+        theta = root
     else:
         theta = (inputs - input_cumwidths) / input_bin_widths
-        theta_one_minus_theta = theta * (1 - theta)
 
+    theta_one_minus_theta = theta * (1 - theta)
+    denominator = input_delta + derivatives_sum * theta_one_minus_theta
+
+    if not inverse:
         numerator = input_heights * (
             input_delta * theta.pow(2) + input_derivatives * theta_one_minus_theta
         )
-        denominator = input_delta + (
-            (input_derivatives + input_derivatives_plus_one - 2 * input_delta)
-            * theta_one_minus_theta
-        )
         outputs = input_cumheights + numerator / denominator
 
-        derivative_numerator = input_delta.pow(2) * (
-            input_derivatives_plus_one * theta.pow(2)
-            + 2 * input_delta * theta_one_minus_theta
-            + input_derivatives * (1 - theta).pow(2)
-        )
-        logabsdet = torch.log(derivative_numerator) - 2 * torch.log(denominator)
+    derivative_numerator = input_delta.pow(2) * (
+        input_derivatives_plus_one * theta.pow(2)
+        + 2 * input_delta * theta_one_minus_theta
+        + input_derivatives * (1 - theta).pow(2)
+    )
+    logabsdet = torch.log(derivative_numerator) - 2 * torch.log(denominator)
+
+    if inverse:
+        return outputs, -logabsdet
+    return outputs, logabsdet
+
 
-        return outputs, logabsdet
+def _bin_edges(unnormalized_sizes, min_bin_size, low, high):
+    num_bins = unnormalized_sizes.shape[-1]
+    sizes = F.softmax(unnormalized_sizes, dim=-1)
+    sizes = min_bin_size + (1 - min_bin_size * num_bins) * sizes
+    cumsizes = torch.cumsum(sizes, dim=-1)
+    cumsizes = F.pad(cumsizes, pad=(1, 0), mode="constant", value=0.0)
+    cumsizes = (high - low) * cumsizes + low
+    cumsizes[..., 0] = low
+    cumsizes[..., -1] = high
+    sizes = cumsizes[..., 1:] - cumsizes[..., :-1]
+    return cumsizes, sizes
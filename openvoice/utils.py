@@ -1,7 +1,11 @@
 import re
 import json
+from collections import namedtuple
+
 import numpy as np
 
+from openvoice.text.replacer import Replacer
+
 
 def get_hparams_from_file(config_path):
     with open(config_path, "r", encoding="utf-8") as f:
@@ -76,13 +80,122 @@ def bits_to_string(bits_array):
     return output_string
 
 
-def split_sentence(text, min_len=10, language_str='[EN]'):
+SentenceSpan = namedtuple("SentenceSpan", ["text", "start", "end"])
+
+_PUNCT = ",.!?;。！？；，"
+# full-width punctuation as both splitters rewrite it
+_PUNCT_PAIRS = [('。', '.'), ('！', '.'), ('？', '.'), ('；', '.'), ('，', ',')]
+_punct_replacer = Replacer(_PUNCT_PAIRS)
+# runs of whitespace other than a single space, which would be replaced by itself
+_WHITESPACE = re.compile(r'[\n\t ]{2,}|[\n\t]')
+_PIECE = re.compile(r'[^,.!?;]*[,.!?;]|[^,.!?;]+')
+
+
+class _SentenceSplitter(object):
+    """``split_sentences_latin``/``split_sentences_zh`` without the ``$#!`` sentinel.
+
+    The text is normalized in one chain of ``str.replace`` and one regex pass
+    and cut into pieces ending at a punctuation mark. Pieces are grouped by
+    their word (latin) or character (zh) counts, so the groups are only
+    joined once, at the end.
+
+    For spans, the same pieces are found in the original text, leaving out
+    the whitespace around them (and, for latin text, the brackets and quotes
+    that normalization deletes).
+    """
+
+    def __init__(self, pairs, removed="", by_words=True):
+        self.normalize = Replacer(list(pairs) + [(c, '') for c in removed])
+        self.removed = removed
+        self.by_words = by_words
+        punct = re.escape(_PUNCT)
+        self._span_regex = re.compile(r'[\s%s]*([^%s]*[%s]|[^%s]+)' % (re.escape(removed), punct, punct, punct))
+
+    def pieces(self, text):
+        text = _WHITESPACE.sub(' ', self.normalize(text))
+        pieces = [piece.strip() for piece in _PIECE.findall(text)]
+        if pieces and not pieces[-1]:
+            del pieces[-1]
+        return pieces
+
+    def spans(self, text):
+        spans = [m.span(1) for m in self._span_regex.finditer(text)]
+        if spans and text[spans[-1][1] - 1] not in _PUNCT:
+            # trailing text without punctuation
+            start, end = spans.pop()
+            while end > start and (text[end - 1].isspace() or text[end - 1] in self.removed):
+                end -= 1
+            if end > start:
+                spans.append((start, end))
+        return spans
+
+    def groups(self, pieces, min_len=10):
+        """``(first, last)`` piece indices of each sentence."""
+        if self.by_words:
+            counts = [piece.count(' ') + 1 for piece in pieces]
+            gap = 0
+        else:
+            # joining pieces with ' ' adds a character, but no word
+            counts = [len(piece) for piece in pieces]
+            gap = 1
+
+        groups = []
+        first = 0
+        count = 0
+        for i, n in enumerate(counts):
+            count += n
+            if count > min_len:
+                groups.append([first, i, count + gap * (i - first)])
+                first = i + 1
+                count = 0
+        if first < len(counts):
+            groups.append([first, len(counts) - 1, count + gap * (len(counts) - 1 - first)])
+
+        # merge_short_sentences_*: a short sentence takes the next one
+        merged = []
+        for group in groups:
+            if merged and merged[-1][2] <= 2:
+                merged[-1][1] = group[1]
+                merged[-1][2] += gap + group[2]
+            else:
+                merged.append(group)
+        if len(merged) > 1 and merged[-1][2] <= 2:
+            last = merged.pop()
+            merged[-1][1] = last[1]
+        return [(first, last) for first, last, _ in merged]
+
+    def split(self, text, min_len=10):
+        pieces = self.pieces(text)
+        return [' '.join(pieces[i:j + 1]) for i, j in self.groups(pieces, min_len)]
+
+    def split_spans(self, text, min_len=10):
+        pieces = self.pieces(text)
+        spans = self.spans(text)
+        return [SentenceSpan(' '.join(pieces[i:j + 1]), spans[i][0], spans[j][1])
+                for i, j in self.groups(pieces, min_len)]
+
+
+_latin_splitter = _SentenceSplitter(_PUNCT_PAIRS + [('‘', "'"), ('’', "'")], removed='<>()[]"«»「」“”')
+_zh_splitter = _SentenceSplitter(_PUNCT_PAIRS, by_words=False)
+
+
+def normalize_punctuation(text):
+    """Full-width punctuation as it appears in ``split_sentence`` output (``'。'`` -> ``'.'``)."""
+    return _punct_replacer(text)
+
+
+def _splitter(language_str):
     # Corregido: compara con '[EN]' en lugar de 'EN'
-    if language_str == '[EN]':
-        sentences = split_sentences_latin(text, min_len=min_len)
-    else:
-        sentences = split_sentences_zh(text, min_len=min_len)
-    return sentences
+    return _latin_splitter if language_str == '[EN]' else _zh_splitter
+
+
+def split_sentence(text, min_len=10, language_str='[EN]'):
+    return _splitter(language_str).split(text, min_len=min_len)
+
+
+def split_sentence_spans(text, min_len=10, language_str='[EN]'):
+    """``split_sentence`` as ``SentenceSpan(text, start, end)``, with ``text[start:end]`` the source of each sentence."""
+    return _splitter(language_str).split_spans(text, min_len=min_len)
 
 
 def split_sentences_latin(text, min_len=10):
@@ -94,30 +207,7 @@ def split_sentences_latin(text, min_len=10):
     Returns:
         List[str]: list of output sentences.
     """
-    # deal with dirty sentences
-    text = re.sub(r'[。！？；]', '.', text)
-    text = re.sub(r'[，]', ',', text)
-    text = re.sub(r'[「」"“”]', '"', text)
-    text = re.sub(r'[‘’]', "'", text)
-    text = re.sub(r"[\<\>\(\)\[\]\"\«\»]+", "", text)
-    text = re.sub(r'[\n\t ]+', ' ', text)
-    text = re.sub(r'([,.!?;])', r'\1 $#!', text)
-    # split
-    sentences = [s.strip() for s in text.split('$#!')]
-    if len(sentences[-1]) == 0:
-        del sentences[-1]
-
-    new_sentences = []
-    new_sent = []
-    count_len = 0
-    for ind, sent in enumerate(sentences):
-        new_sent.append(sent)
-        count_len += len(sent.split(" "))
-        if count_len > min_len or ind == len(sentences) - 1:
-            count_len = 0
-            new_sentences.append(' '.join(new_sent))
-            new_sent = []
-    return merge_short_sentences_latin(new_sentences)
+    return _latin_splitter.split(text, min_len=min_len)
 
 
 def merge_short_sentences_latin(sens):
@@ -146,28 +236,7 @@ def merge_short_sentences_latin(sens):
 
 
 def split_sentences_zh(text, min_len=10):
-    text = re.sub(r'[。！？；]', '.', text)
-    text = re.sub(r'[，]', ',', text)
-    # 将文本中的换行符、空格和制表符替换为空格
-    text = re.sub(r'[\n\t ]+', ' ', text)
-    # 在标点符号后添加一个空格
-    text = re.sub(r'([,.!?;])', r'\1 $#!', text)
-    # 分隔句子并去除前后空格
-    sentences = [s.strip() for s in text.split('$#!')]
-    if len(sentences[-1]) == 0:
-        del sentences[-1]
-
-    new_sentences = []
-    new_sent = []
-    count_len = 0
-    for ind, sent in enumerate(sentences):
-        new_sent.append(sent)
-        count_len += len(sent)
-        if count_len > min_len or ind == len(sentences) - 1:
-            count_len = 0
-            new_sentences.append(' '.join(new_sent))
-            new_sent = []
-    return merge_short_sentences_zh(new_sentences)
+    return _zh_splitter.split(text, min_len=min_len)
 
 
 def merge_short_sentences_zh(sens):
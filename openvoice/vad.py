@@ -0,0 +1,108 @@
+"""Energy + spectral flatness voice activity detection, in numpy only.
+
+A frame is speech when it is loud relative to the noise floor of the
+recording and its spectrum is peaky (low flatness), which rejects
+broadband noise such as fans or hiss. Regions start on frames that pass
+the strict thresholds and extend while frames pass the loose ones (hysteresis), so
+quiet word endings are kept without letting every noise burst start a
+region. Good enough to pick the voiced parts of a reference recording;
+``se_extractor`` still offers Silero for hard, noisy material.
+"""
+import numpy as np
+
+from openvoice import audio as audio_io
+
+SAMPLE_RATE = 16000
+
+
+def frame_features(audio, frame_length=400, hop_length=160, band=(250, 4000), block_frames=2048):
+    """Per-frame ``(energy_db, flatness)`` of a mono 16 kHz float array.
+
+    Flatness is measured over ``band`` (Hz) only, where voiced speech has its
+    harmonics, so the roll-off of band-limited recordings does not make
+    plain noise look tonal.
+    """
+    if len(audio) < frame_length:
+        audio = np.pad(audio, (0, frame_length - len(audio)))
+    frames = np.lib.stride_tricks.sliding_window_view(audio, frame_length)[::hop_length]
+    window = np.hanning(frame_length).astype(np.float32)
+    lo, hi = (int(f * frame_length / SAMPLE_RATE) for f in band)
+
+    n_frames = frames.shape[0]
+    energy_db = np.empty(n_frames, dtype=np.float32)
+    flatness = np.empty(n_frames, dtype=np.float32)
+    # in blocks, so a long upload never holds the whole spectrogram
+    for start in range(0, n_frames, block_frames):
+        block = frames[start:start + block_frames]
+        energy_db[start:start + len(block)] = 10 * np.log10(np.mean(block * block, axis=1) + 1e-10)
+        power = np.abs(np.fft.rfft(block * window, axis=1)[:, lo:hi]) ** 2 + 1e-10
+        flatness[start:start + len(block)] = np.exp(np.mean(np.log(power), axis=1)) / np.mean(power, axis=1)
+    return energy_db, flatness
+
+
+def _runs(mask):
+    """``(starts, ends)`` of the runs of True in ``mask``, end exclusive."""
+    edges = np.diff(np.concatenate(([0], mask.astype(np.int8), [0])))
+    return np.flatnonzero(edges == 1), np.flatnonzero(edges == -1)
+
+
+def energy_vad(audio, sr,
+               high_db=12.0,
+               low_db=6.0,
+               max_flatness=0.3,
+               weak_flatness=0.5,
+               floor_percentile=10,
+               min_speech_duration=0.1,
+               min_silence_duration=1.0,
+               pad=0.05):
+    """Voiced regions of ``audio`` as ``[(start, end), ...]`` in seconds.
+
+    ``high_db`` / ``low_db`` are relative to the noise floor: the median
+    energy of the noise-like frames, or the ``floor_percentile`` of all
+    frame energies when the recording has hardly any; ``max_flatness`` /
+    ``weak_flatness`` are the matching flatness limits. Gaps shorter than
+    ``min_silence_duration`` are bridged, like the Silero settings used by
+    ``se_extractor``, after dropping regions shorter than
+    ``min_speech_duration``.
+    """
+    audio = np.asarray(audio, dtype=np.float32)
+    if audio.ndim > 1:
+        audio = audio.mean(axis=0)
+    audio = audio_io.resample(audio, sr, SAMPLE_RATE)
+    if len(audio) == 0:
+        return []
+
+    hop_length = SAMPLE_RATE // 100
+    energy_db, flatness = frame_features(audio, hop_length=hop_length)
+    # the noise floor: the typical level of noise-like frames, if there are any
+    noise_like = flatness >= weak_flatness
+    if noise_like.sum() >= 10:
+        floor = np.median(energy_db[noise_like])
+    else:
+        floor = np.percentile(energy_db, floor_percentile)
+    # white noise sits around 0.56 whatever its level, voiced speech far below
+    weak = (energy_db > floor + low_db) & (flatness < weak_flatness)
+    strong = (energy_db > floor + high_db) & (flatness < max_flatness)
+
+    # hysteresis: keep the weak runs that contain at least one strong frame
+    starts, ends = _runs(weak)
+    if len(starts) == 0:
+        return []
+    counts = np.concatenate(([0], np.cumsum(strong, dtype=np.int64)))
+    frame_seconds = hop_length / SAMPLE_RATE
+    # drop blips (a click, the edge of a noise burst) before they can bridge anything
+    keep = (counts[ends] - counts[starts] > 0) & ((ends - starts) * frame_seconds >= min_speech_duration)
+    starts, ends = starts[keep], ends[keep]
+    if len(starts) == 0:
+        return []
+
+    # bridge short silences
+    gaps = (starts[1:] - ends[:-1]) * frame_seconds
+    split = np.flatnonzero(gaps >= min_silence_duration)
+    starts = starts[np.concatenate(([0], split + 1))]
+    ends = ends[np.concatenate((split, [len(ends) - 1]))]
+
+    duration = len(audio) / SAMPLE_RATE
+    return [(max(0.0, s * frame_seconds - pad), min(duration, e * frame_seconds + pad))
+            for s, e in zip(starts.tolist(), ends.tolist())]
+
@@ -97,6 +97,7 @@ setup(
     entry_points={
         'console_scripts': [
             'openvoice=openvoice.cli:main',
+            'openvoice-batch=openvoice.batch:main',
         ],
     },
     include_package_data=True,
@@ -0,0 +1,35 @@
+import numpy as np
+import pytest
+
+from openvoice import audio
+from openvoice.api import BaseSpeakerTTS
+
+
+def test_concat_accepts_numpy_integers():
+    segments = [np.ones(3, dtype=np.float32), np.full(2, 2.0, dtype=np.float32)]
+    expected = np.array([1, 1, 1, 0, 0, 2, 2, 0, 0], dtype=np.float32)
+    for gaps in (2, np.int64(2), np.int32(2), [2, np.int64(2)], np.array([2, 2])):
+        np.testing.assert_array_equal(audio.concat(segments, gaps), expected)
+
+
+def test_concat_rejects_negative_gaps():
+    with pytest.raises(ValueError):
+        audio.concat([np.ones(3)], -1)
+    with pytest.raises(ValueError):
+        audio.concat([np.ones(3), np.ones(3)], [1, np.int64(-2)])
+
+
+def test_negative_pauses_are_rejected():
+    with pytest.raises(ValueError):
+        audio.pause_samples(22050, -0.1)
+    # checked before the config is read
+    with pytest.raises(ValueError):
+        BaseSpeakerTTS("unused.json", pause=-0.05)
+    with pytest.raises(ValueError):
+        BaseSpeakerTTS("unused.json", pauses={"。": -0.3})
+
+
+def test_audio_numpy_concat_with_numpy_pause():
+    segments = [np.ones(4, dtype=np.float32)] * 2
+    out = BaseSpeakerTTS.audio_numpy_concat(segments, 100, pause=np.float64(0.02))
+    np.testing.assert_array_equal(out, [1, 1, 1, 1, 0, 0] * 2)
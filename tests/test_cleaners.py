@@ -0,0 +1,9 @@
+import pytest
+
+from openvoice.text import cleaners
+
+
+@pytest.mark.parametrize("language", ["FR", "englsh", ""])
+def test_warmup_rejects_unknown_languages(language):
+    with pytest.raises(ValueError, match="supported: English \\(EN\\), Chinese \\(ZH\\)"):
+        cleaners.warmup([language])
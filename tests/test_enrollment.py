@@ -0,0 +1,21 @@
+import pytest
+import torch
+
+from openvoice.enrollment import VoiceEnrollment
+
+
+def test_remove_from_empty_enrollment():
+    enrollment = VoiceEnrollment()
+    enrollment.remove([])
+    assert len(enrollment) == 0
+    with pytest.raises(ValueError):
+        enrollment.se
+
+
+def test_remove_all_then_add():
+    enrollment = VoiceEnrollment()
+    enrollment.add(["a:0", "a:1"], torch.ones(2, 4))
+    enrollment.remove(["a:0", "a:1"])
+    enrollment.remove([])
+    enrollment.add(["b:0"], torch.full((1, 4), 2.0))
+    assert torch.equal(enrollment.se, torch.full((1, 4, 1), 2.0))
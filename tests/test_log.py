@@ -0,0 +1,20 @@
+import io
+import logging
+
+from openvoice.log import request_context, setup_logging
+
+
+def test_setup_logging_twice_keeps_one_handler():
+    logger = logging.getLogger("openvoice")
+    before = len(logger.handlers)
+    first, second = io.StringIO(), io.StringIO()
+    setup_logging("INFO", stream=first)
+    handler = setup_logging("INFO", fmt="[%(request_id)s] %(message)s", stream=second)
+    try:
+        assert len(logger.handlers) == before + 1
+        with request_context("abc"):
+            logging.getLogger("openvoice.test").info("hello")
+        assert first.getvalue() == ""
+        assert second.getvalue() == "[abc] hello\n"
+    finally:
+        logger.removeHandler(handler)
@@ -0,0 +1,93 @@
+import random
+import re
+
+import pytest
+
+from openvoice.text import english, mandarin
+from openvoice.text.replacer import Replacer
+
+ENGLISH = [
+    "OpenVoice is a versatile instant voice cloning approach.",
+    "The quick brown fox jumps over the lazy dog, doesn't it?",
+    "Mr. Smith paid $3.50 for 2 coffees on the 21st of June.",
+    "Thoughtfully, she measured the rhythm of the whispering breeze.",
+    "Yellow jewels, azure sky, and unusual vision: all pleasure.",
+]
+
+CHINESE = [
+    "今天天气真好，我们去公园散步吧。",
+    "微软公司于周五发布了新版本，用户可以免费下载。",
+    "他在2024年买了3本书和ABC牌的咖啡。",
+    "人工智能正在改变世界的方方面面！",
+    "请问去火车站怎么走？日出而作，日入而息。",
+]
+
+
+def english_ipa(text):
+    return english.english_to_ipa(text)
+
+
+def english_dark_l(text):
+    return english.mark_dark_l(english.english_to_ipa(text))
+
+
+def chinese_bopomofo(text):
+    return mandarin.chinese_to_bopomofo(mandarin.number_to_chinese(text))
+
+
+def chinese_bopomofo_latin(text):
+    return mandarin.latin_to_bopomofo(chinese_bopomofo(text))
+
+
+# table -> (the cleaning stages that run before it, sentences to feed them)
+TABLES = {
+    "english._lazy_ipa": (english._lazy_ipa, english_ipa, ENGLISH),
+    "english._lazy_ipa2": (english._lazy_ipa2, english_ipa, ENGLISH),
+    "english._ipa_to_ipa2": (english._ipa_to_ipa2, english_dark_l, ENGLISH),
+    "mandarin._latin_to_bopomofo": (mandarin._latin_to_bopomofo, chinese_bopomofo, CHINESE),
+    "mandarin._bopomofo_to_romaji": (mandarin._bopomofo_to_romaji, chinese_bopomofo_latin, CHINESE),
+    "mandarin._romaji_to_ipa": (mandarin._romaji_to_ipa, mandarin.chinese_to_romaji, CHINESE),
+    "mandarin._bopomofo_to_ipa": (mandarin._bopomofo_to_ipa, chinese_bopomofo_latin, CHINESE),
+    "mandarin._bopomofo_to_ipa2": (mandarin._bopomofo_to_ipa2, chinese_bopomofo_latin, CHINESE),
+}
+
+
+def legacy(replacer):
+    # the per-pair re.sub loop the cleaners ran before Replacer
+    pairs = [(re.compile(re.escape(a), replacer._flags), r) for a, r in replacer.pairs]
+
+    def apply(text):
+        for regex, replacement in pairs:
+            text = re.sub(regex, replacement, text)
+        return text
+    return apply
+
+
+@pytest.mark.parametrize("name", sorted(TABLES))
+def test_table_matches_per_pair_loop_on_corpus(name):
+    replacer, stages, sentences = TABLES[name]
+    old = legacy(replacer)
+    for sentence in sentences:
+        text = stages(sentence)
+        assert replacer(text) == old(text), sentence
+
+
+@pytest.mark.parametrize("name", sorted(TABLES))
+def test_table_matches_per_pair_loop_on_random_text(name):
+    replacer = TABLES[name][0]
+    old = legacy(replacer)
+    pieces = [a for a, _ in replacer.pairs] + [r for _, r in replacer.pairs if r]
+    pieces += [a.upper() for a, _ in replacer.pairs] + list(" .,xyzNn↓ㄧ")
+    rng = random.Random(name)
+    for _ in range(2000):
+        text = "".join(rng.choice(pieces) for _ in range(rng.randint(0, 24)))
+        assert replacer(text) == old(text), text
+
+
+def test_modes():
+    assert english._lazy_ipa.mode == "replace"
+    assert mandarin._latin_to_bopomofo.mode == "regex"
+    # NN -> n feeds Ng, so a single scan would differ
+    assert mandarin._romaji_to_ipa.mode == "sequential"
+    assert Replacer([("a", "b")]).mode == "replace"
+    assert Replacer([("a", r"\1")], ignore_case=True).mode == "sequential"
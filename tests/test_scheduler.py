@@ -0,0 +1,122 @@
+import threading
+
+import numpy as np
+import pytest
+import torch
+
+from openvoice.api import BaseSpeakerTTS
+from openvoice.scheduler import BatchScheduler, infer_many, plan_batches
+
+
+class StubFrontend(object):
+    def stream(self, sentences):
+        for sentence in sentences:
+            yield sentence, tokens_for(int(sentence), len(sentence) + 1)
+
+
+class StubModel(object):
+    """``infer_batch`` returns each sentence's id repeated once per token."""
+
+    sampling_rate = 100
+    audio_numpy_concat = staticmethod(BaseSpeakerTTS.audio_numpy_concat)
+
+    def __init__(self, fail_speed=None):
+        self.fail_speed = fail_speed
+        self.frontend = StubFrontend()
+        self.calls = []
+        self._lock = threading.Lock()
+
+    def infer_batch(self, tokens, speakers, speed=1.0, **params):
+        with self._lock:
+            self.calls.append((len(tokens), speed, params))
+        if speed == self.fail_speed:
+            raise RuntimeError("synthesis failed")
+        return [np.full(t.size(0), float(t[0]) + 1000 * speaker, dtype=np.float32)
+                for t, speaker in zip(tokens, speakers)]
+
+    def resolve_sdp_ratio(self, duration_mode, sdp_ratio):
+        return sdp_ratio
+
+    def prepare_sentences(self, text, language='English'):
+        # sentences are the ids themselves, "3 14 2"
+        return text.split()
+
+    def sentence_pause(self, sentence):
+        return 0.0
+
+
+def tokens_for(sentence_id, length):
+    return torch.full((length,), sentence_id, dtype=torch.long)
+
+
+def test_plan_batches():
+    lengths = [5, 1, 3, 8, 2]
+    assert plan_batches(lengths, max_tokens=10) == [[1, 4, 2], [0], [3]]
+    assert plan_batches(lengths, max_tokens=10, max_batch_size=2) == [[1, 4], [2, 0], [3]]
+    # too long for any batch: on its own
+    assert plan_batches([50, 1], max_tokens=10) == [[1], [0]]
+    assert plan_batches([], max_tokens=10) == []
+
+
+def test_plan_batches_stays_within_budget():
+    lengths = list(np.random.default_rng(0).integers(1, 60, size=200))
+    batches = plan_batches(lengths, max_tokens=256)
+    assert sorted(i for batch in batches for i in batch) == list(range(len(lengths)))
+    for batch in batches:
+        assert len(batch) == 1 or len(batch) * max(lengths[i] for i in batch) <= 256
+
+
+def test_infer_many_restores_order():
+    model = StubModel()
+    lengths = [7, 2, 9, 2, 5, 1]
+    tokens = [tokens_for(i, n) for i, n in enumerate(lengths)]
+    speakers = [0, 1, 0, 1, 0, 1]
+    audio = infer_many(model, tokens, speakers, max_tokens=12, speed=1.5, noise_scale=0.0)
+    for i, (n, speaker) in enumerate(zip(lengths, speakers)):
+        np.testing.assert_array_equal(audio[i], np.full(n, i + 1000 * speaker))
+    assert len(model.calls) == len(plan_batches(lengths, 12))
+    assert all(speed == 1.5 and params["noise_scale"] == 0.0 for _, speed, params in model.calls)
+
+
+def test_scheduler_batches_concurrent_requests_in_order():
+    model = StubModel()
+    with BatchScheduler(model, max_tokens=64, max_wait=0.2) as scheduler:
+        results = {}
+
+        def client(k):
+            ids = [10 * k + j for j in range(4)]
+            results[k] = (ids, scheduler.tts(" ".join(map(str, ids)), speaker=0))
+
+        threads = [threading.Thread(target=client, args=(k,)) for k in range(1, 4)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        stats = scheduler.stats()
+
+    for ids, audio in results.values():
+        expected = np.concatenate([np.full(len(str(i)) + 1, i) for i in ids])
+        np.testing.assert_array_equal(audio, expected)
+    assert stats["sentences"] == 12
+    # the three requests shared batches
+    assert stats["batches"] < 12
+
+
+def test_scheduler_propagates_exceptions_to_their_batch_only():
+    model = StubModel(fail_speed=2.0)
+    with BatchScheduler(model, max_tokens=64, max_wait=0.2) as scheduler:
+        ok = scheduler.submit(tokens_for(1, 3), 0, speed=1.0)
+        failing = [scheduler.submit(tokens_for(i, 3), 0, speed=2.0) for i in (2, 3)]
+        assert ok.result(timeout=10).tolist() == [1.0, 1.0, 1.0]
+        for future in failing:
+            with pytest.raises(RuntimeError, match="synthesis failed"):
+                future.result(timeout=10)
+        # the worker keeps serving after a failed batch
+        assert scheduler.submit(tokens_for(4, 2), 0).result(timeout=10).tolist() == [4.0, 4.0]
+
+
+def test_submit_after_shutdown():
+    scheduler = BatchScheduler(StubModel())
+    scheduler.shutdown()
+    with pytest.raises(RuntimeError):
+        scheduler.submit(tokens_for(1, 2), 0)
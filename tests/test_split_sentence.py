@@ -0,0 +1,118 @@
+import random
+import re
+
+import pytest
+
+from openvoice import utils
+
+CORPUS = [
+    "OpenVoice is a versatile instant voice cloning approach. It requires only a short audio clip!",
+    "Did you hear that? He said, “we leave at noon”; then (after a pause) he left.",
+    "  Leading spaces,\ttabs\nand newlines   everywhere .  ",
+    "Mr. Smith met Dr. Jones at 5 p.m. on Jan. 3rd, 2024.",
+    "‘Single quotes’ and «guillemets» and <angle> [square] brackets.",
+    "Short. Very short. Tiny. A. B. C.",
+    "No punctuation at the end of this one",
+    "...!!!???",
+    "",
+    "   ",
+    "今天天气真好，我们去公园散步吧。你觉得怎么样？",
+    "微软公司于周五发布了新版本！用户可以免费下载；但是需要注册。",
+    "「你好」，他说。OpenVoice 支持中文和 English 混合输入。",
+    "好。啊。对。是的。",
+]
+
+PIECES = (["word", "OpenVoice", "cloning", "a", "I", "你好", "天气", "公园", "x"] * 3
+          + list(",.!?;。！？；，") + list("<>()[]\"«»「」“”‘’'")
+          + [" ", " ", " ", "  ", "\n", "\t", "\r", "　", "\xa0"])
+
+
+# the regex chains utils used before the single-scan splitter
+
+def legacy_latin(text, min_len=10):
+    text = re.sub(r'[。！？；]', '.', text)
+    text = re.sub(r'[，]', ',', text)
+    text = re.sub(r'[「」"“”]', '"', text)
+    text = re.sub(r'[‘’]', "'", text)
+    text = re.sub(r"[\<\>\(\)\[\]\"«»]+", "", text)
+    text = re.sub(r'[\n\t ]+', ' ', text)
+    text = re.sub(r'([,.!?;])', r'\1 $#!', text)
+    sentences = [s.strip() for s in text.split('$#!')]
+    if len(sentences[-1]) == 0:
+        del sentences[-1]
+
+    new_sentences = []
+    new_sent = []
+    count_len = 0
+    for ind, sent in enumerate(sentences):
+        new_sent.append(sent)
+        count_len += len(sent.split(" "))
+        if count_len > min_len or ind == len(sentences) - 1:
+            count_len = 0
+            new_sentences.append(' '.join(new_sent))
+            new_sent = []
+    return utils.merge_short_sentences_latin(new_sentences)
+
+
+def legacy_zh(text, min_len=10):
+    text = re.sub(r'[。！？；]', '.', text)
+    text = re.sub(r'[，]', ',', text)
+    text = re.sub(r'[\n\t ]+', ' ', text)
+    text = re.sub(r'([,.!?;])', r'\1 $#!', text)
+    sentences = [s.strip() for s in text.split('$#!')]
+    if len(sentences[-1]) == 0:
+        del sentences[-1]
+
+    new_sentences = []
+    new_sent = []
+    count_len = 0
+    for ind, sent in enumerate(sentences):
+        new_sent.append(sent)
+        count_len += len(sent)
+        if count_len > min_len or ind == len(sentences) - 1:
+            count_len = 0
+            new_sentences.append(' '.join(new_sent))
+            new_sent = []
+    return utils.merge_short_sentences_zh(new_sentences)
+
+
+# language_str -> splitter it selects; BaseSpeakerTTS passes the bare marks
+LEGACY = {"[EN]": legacy_latin, "EN": legacy_zh, "ZH": legacy_zh}
+
+
+def cases(mark, n=3000):
+    rng = random.Random(mark)
+    yield from ((text, 10) for text in CORPUS)
+    for _ in range(n):
+        text = "".join(rng.choice(PIECES) for _ in range(rng.randint(0, 40)))
+        yield text, rng.choice([0, 2, 5, 10, 20])
+
+
+@pytest.mark.parametrize("mark", sorted(LEGACY))
+def test_split_sentence_matches_legacy(mark):
+    for text, min_len in cases(mark):
+        expected = LEGACY[mark](text, min_len=min_len)
+        assert utils.split_sentence(text, min_len=min_len, language_str=mark) == expected, (text, min_len)
+
+
+@pytest.mark.parametrize("mark", sorted(LEGACY))
+def test_spans_cover_their_sentences(mark):
+    for text, min_len in cases(mark):
+        spans = utils.split_sentence_spans(text, min_len=min_len, language_str=mark)
+        assert [span.text for span in spans] == LEGACY[mark](text, min_len=min_len)
+        end = 0
+        for span in spans:
+            assert end <= span.start < span.end <= len(text), (text, span)
+            end = span.end
+            # text[start:end], cleaned by the old splitter as one sentence,
+            # is the span's sentence up to the spaces between pieces
+            source = "".join(LEGACY[mark](text[span.start:span.end], min_len=1 << 30))
+            assert re.sub(r"\s", "", source) == re.sub(r"\s", "", span.text), (text, span)
+
+
+def test_routing():
+    text = "‘Quoted’ «words» here."
+    assert utils.split_sentence(text, language_str="[EN]") == ["'Quoted' words here."]
+    # the bare marks BaseSpeakerTTS passes keep the zh splitter, as before
+    assert utils.split_sentence(text, language_str="EN") == legacy_zh(text)
+    assert utils.split_sentence(text, language_str="EN") != legacy_latin(text)
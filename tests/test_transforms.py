@@ -0,0 +1,199 @@
+import pytest
+import torch
+from torch.nn import functional as F
+
+from openvoice import transforms
+
+
+# the implementation transforms.py had before torch.searchsorted, kept as the reference
+
+def legacy_searchsorted(bin_locations, inputs, eps=1e-6):
+    bin_locations[..., -1] += eps
+    return torch.sum(inputs[..., None] >= bin_locations, dim=-1) - 1
+
+
+def legacy_rational_quadratic_spline(inputs, unnormalized_widths, unnormalized_heights,
+                                     unnormalized_derivatives, inverse=False, left=0.0, right=1.0,
+                                     bottom=0.0, top=1.0, min_bin_width=1e-3, min_bin_height=1e-3,
+                                     min_derivative=1e-3):
+    num_bins = unnormalized_widths.shape[-1]
+
+    widths = F.softmax(unnormalized_widths, dim=-1)
+    widths = min_bin_width + (1 - min_bin_width * num_bins) * widths
+    cumwidths = torch.cumsum(widths, dim=-1)
+    cumwidths = F.pad(cumwidths, pad=(1, 0), mode="constant", value=0.0)
+    cumwidths = (right - left) * cumwidths + left
+    cumwidths[..., 0] = left
+    cumwidths[..., -1] = right
+    widths = cumwidths[..., 1:] - cumwidths[..., :-1]
+
+    derivatives = min_derivative + F.softplus(unnormalized_derivatives)
+
+    heights = F.softmax(unnormalized_heights, dim=-1)
+    heights = min_bin_height + (1 - min_bin_height * num_bins) * heights
+    cumheights = torch.cumsum(heights, dim=-1)
+    cumheights = F.pad(cumheights, pad=(1, 0), mode="constant", value=0.0)
+    cumheights = (top - bottom) * cumheights + bottom
+    cumheights[..., 0] = bottom
+    cumheights[..., -1] = top
+    heights = cumheights[..., 1:] - cumheights[..., :-1]
+
+    if inverse:
+        bin_idx = legacy_searchsorted(cumheights, inputs)[..., None]
+    else:
+        bin_idx = legacy_searchsorted(cumwidths, inputs)[..., None]
+
+    input_cumwidths = cumwidths.gather(-1, bin_idx)[..., 0]
+    input_bin_widths = widths.gather(-1, bin_idx)[..., 0]
+    input_cumheights = cumheights.gather(-1, bin_idx)[..., 0]
+    delta = heights / widths
+    input_delta = delta.gather(-1, bin_idx)[..., 0]
+    input_derivatives = derivatives.gather(-1, bin_idx)[..., 0]
+    input_derivatives_plus_one = derivatives[..., 1:].gather(-1, bin_idx)[..., 0]
+    input_heights = heights.gather(-1, bin_idx)[..., 0]
+
+    if inverse:
+        a = (inputs - input_cumheights) * (
+            input_derivatives + input_derivatives_plus_one - 2 * input_delta
+        ) + input_heights * (input_delta - input_derivatives)
+        b = input_heights * input_derivatives - (inputs - input_cumheights) * (
+            input_derivatives + input_derivatives_plus_one - 2 * input_delta
+        )
+        c = -input_delta * (inputs - input_cumheights)
+        discriminant = b.pow(2) - 4 * a * c
+        root = (2 * c) / (-b - torch.sqrt(discriminant))
+        outputs = root * input_bin_widths + input_cumwidths
+        theta_one_minus_theta = root * (1 - root)
+        denominator = input_delta + (
+            (input_derivatives + input_derivatives_plus_one - 2 * input_delta) * theta_one_minus_theta
+        )
+        derivative_numerator = input_delta.pow(2) * (
+            input_derivatives_plus_one * root.pow(2)
+            + 2 * input_delta * theta_one_minus_theta
+            + input_derivatives * (1 - root).pow(2)
+        )
+        logabsdet = torch.log(derivative_numerator) - 2 * torch.log(denominator)
+        return outputs, -logabsdet
+    else:
+        theta = (inputs - input_cumwidths) / input_bin_widths
+        theta_one_minus_theta = theta * (1 - theta)
+        numerator = input_heights * (input_delta * theta.pow(2) + input_derivatives * theta_one_minus_theta)
+        denominator = input_delta + (
+            (input_derivatives + input_derivatives_plus_one - 2 * input_delta) * theta_one_minus_theta
+        )
+        outputs = input_cumheights + numerator / denominator
+        derivative_numerator = input_delta.pow(2) * (
+            input_derivatives_plus_one * theta.pow(2)
+            + 2 * input_delta * theta_one_minus_theta
+            + input_derivatives * (1 - theta).pow(2)
+        )
+        logabsdet = torch.log(derivative_numerator) - 2 * torch.log(denominator)
+        return outputs, logabsdet
+
+
+def legacy_unconstrained_rational_quadratic_spline(inputs, unnormalized_widths, unnormalized_heights,
+                                                   unnormalized_derivatives, inverse=False, tail_bound=1.0,
+                                                   min_derivative=1e-3):
+    inside_interval_mask = (inputs >= -tail_bound) & (inputs <= tail_bound)
+    outside_interval_mask = ~inside_interval_mask
+    outputs = torch.zeros_like(inputs)
+    logabsdet = torch.zeros_like(inputs)
+    unnormalized_derivatives = F.pad(unnormalized_derivatives, pad=(1, 1))
+    constant = torch.log(torch.exp(torch.tensor(1 - min_derivative)) - 1)
+    unnormalized_derivatives[..., 0] = constant
+    unnormalized_derivatives[..., -1] = constant
+    outputs[outside_interval_mask] = inputs[outside_interval_mask]
+    logabsdet[outside_interval_mask] = 0
+    outputs[inside_interval_mask], logabsdet[inside_interval_mask] = legacy_rational_quadratic_spline(
+        inputs=inputs[inside_interval_mask],
+        unnormalized_widths=unnormalized_widths[inside_interval_mask, :],
+        unnormalized_heights=unnormalized_heights[inside_interval_mask, :],
+        unnormalized_derivatives=unnormalized_derivatives[inside_interval_mask, :],
+        inverse=inverse, left=-tail_bound, right=tail_bound, bottom=-tail_bound, top=tail_bound,
+        min_derivative=min_derivative,
+    )
+    return outputs, logabsdet
+
+
+TAIL_BOUND = 5.0
+NUM_BINS = 10
+
+
+def make_params(frames, seed=0):
+    # [b, 1, t, bins] parameters, as ConvFlow produces them
+    generator = torch.Generator().manual_seed(seed)
+    widths = torch.randn(2, 1, frames, NUM_BINS, generator=generator)
+    heights = torch.randn(2, 1, frames, NUM_BINS, generator=generator)
+    derivatives = torch.randn(2, 1, frames, NUM_BINS - 1, generator=generator)
+    return widths, heights, derivatives, generator
+
+
+def edges(unnormalized, low, high):
+    return transforms._bin_edges(unnormalized, transforms.DEFAULT_MIN_BIN_WIDTH, low, high)[0]
+
+
+def on_edges(bin_locations):
+    # the k-th row on its (k mod bins+1)-th edge, so every edge gets hit
+    rows = bin_locations.shape[-2]
+    index = (torch.arange(rows) % bin_locations.shape[-1]).expand(bin_locations.shape[:-1])
+    return bin_locations.gather(-1, index[..., None])[..., 0]
+
+
+def test_searchsorted_matches_legacy_and_keeps_bin_locations():
+    generator = torch.Generator().manual_seed(0)
+    bin_locations = edges(torch.randn(3, 50, NUM_BINS, generator=generator), -1.0, 1.0)
+    inputs = torch.rand(3, 50, generator=generator) * 2 - 1
+    # each row exactly on one of its own edges, then the last edge nudged on
+    # both sides of eps, and the bounds
+    inputs[:, :44] = on_edges(bin_locations)[:, :44]
+    inputs[:, -4:] = torch.tensor([-1.0, 1.0, 1.0 + 5e-7, 1.0 + 2e-6])
+    before = bin_locations.clone()
+
+    got = transforms.searchsorted(bin_locations, inputs)
+
+    assert torch.equal(bin_locations, before)
+    assert torch.equal(got, legacy_searchsorted(bin_locations.clone(), inputs))
+
+
+@pytest.mark.parametrize("inverse", [False, True])
+def test_rational_quadratic_spline_matches_legacy(inverse):
+    widths, heights, derivatives, generator = make_params(200)
+    derivatives = F.pad(derivatives, pad=(1, 1))
+    inputs = torch.rand(2, 1, 200, generator=generator)
+    # the bin edges the inputs are searched in, and both ends of the interval
+    cumulative = edges(heights if inverse else widths, 0.0, 1.0)
+    inputs[..., :110] = on_edges(cumulative)[..., :110]
+    inputs[..., -2:] = torch.tensor([0.0, 1.0])
+
+    got = transforms.rational_quadratic_spline(inputs, widths, heights, derivatives, inverse=inverse)
+    expected = legacy_rational_quadratic_spline(inputs, widths, heights, derivatives, inverse=inverse)
+    assert torch.equal(got[0], expected[0])
+    assert torch.equal(got[1], expected[1])
+
+
+@pytest.mark.parametrize("inverse", [False, True])
+def test_linear_tails_match_legacy(inverse):
+    widths, heights, derivatives, generator = make_params(400, seed=1)
+    inputs = torch.randn(2, 1, 400, generator=generator) * TAIL_BOUND * 0.8
+    # on and just past the tail bounds
+    inputs[..., :6] = torch.tensor([-TAIL_BOUND, 0.0, TAIL_BOUND, -TAIL_BOUND - 1e-3, TAIL_BOUND + 1e-3, 20.0])
+    assert ((inputs < -TAIL_BOUND) | (inputs > TAIL_BOUND)).any()
+
+    with torch.no_grad():
+        got = transforms.piecewise_rational_quadratic_transform(
+            inputs, widths, heights, derivatives, inverse=inverse, tails="linear", tail_bound=TAIL_BOUND)
+        expected = legacy_unconstrained_rational_quadratic_spline(
+            inputs, widths, heights, derivatives, inverse=inverse, tail_bound=TAIL_BOUND)
+    assert torch.equal(got[0], expected[0])
+    assert torch.equal(got[1], expected[1])
+
+
+def test_inverse_undoes_forward():
+    widths, heights, derivatives, generator = make_params(100, seed=2)
+    inputs = torch.randn(2, 1, 100, generator=generator) * TAIL_BOUND
+    outputs, logabsdet = transforms.piecewise_rational_quadratic_transform(
+        inputs, widths, heights, derivatives, tails="linear", tail_bound=TAIL_BOUND)
+    restored, inverse_logabsdet = transforms.piecewise_rational_quadratic_transform(
+        outputs, widths, heights, derivatives, inverse=True, tails="linear", tail_bound=TAIL_BOUND)
+    assert torch.allclose(restored, inputs, atol=1e-4)
+    assert torch.allclose(logabsdet, -inverse_logabsdet, atol=1e-4)